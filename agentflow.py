@@ -4,7 +4,6 @@ import argparse
 import pathlib
 import socket
 import sys
-import uvicorn
 
 # Ensure ./src is importable
 _REPO_ROOT = pathlib.Path(__file__).resolve().parent
@@ -12,8 +11,6 @@ _SRC = _REPO_ROOT / "src"
 if str(_SRC) not in sys.path:
     sys.path.insert(0, str(_SRC))
 
-from server.app import create_app  # noqa: E402
-
 
 def _port_is_free(host: str, port: int) -> bool:
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
@@ -37,6 +34,11 @@ def main(argv: list[str] | None = None) -> None:
     parser.add_argument("--port", type=int, default=8080)
     args = parser.parse_args(argv)
 
+    # Imported here so --help and tooling that imports this module stay fast.
+    import uvicorn
+
+    from server.app import create_app
+
     app = create_app()
     port = _pick_port(args.host, args.port)
     print(f"Serving AgentFlow on http://{args.host}:{port}")
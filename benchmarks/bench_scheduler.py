@@ -0,0 +1,115 @@
+"""Scaling benchmark for the exec scheduler in Engine.run.
+
+Usage:
+    python benchmarks/bench_scheduler.py [--sizes 10 100 1000 10000 100000] [--repeat 3]
+"""
+from __future__ import annotations
+
+import argparse
+import pathlib
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+_SRC = pathlib.Path(__file__).resolve().parent.parent / "src"
+if str(_SRC) not in sys.path:
+    sys.path.insert(0, str(_SRC))
+
+import nodes  # noqa: E402,F401
+from runtime.engine import Engine  # noqa: E402
+from runtime.events import EventBus  # noqa: E402
+from runtime.plan import compile_plan  # noqa: E402
+from runtime.services import ServiceContainer  # noqa: E402
+from server.schemas import GraphModel  # noqa: E402
+
+
+def _const(i: int) -> Dict:
+    return {"id": f"n{i}", "type": "AgentFlow/Const", "params": {"value": i}}
+
+
+def chain(n: int) -> GraphModel:
+    """n0 -> n1 -> ... -> n{n-1}"""
+    return GraphModel.model_validate(
+        {
+            "nodes": [_const(i) for i in range(n)],
+            "edges": {"exec": [{"src": f"n{i}", "dst": f"n{i + 1}"} for i in range(n - 1)]},
+        }
+    )
+
+
+def fan_out(n: int) -> GraphModel:
+    """n0 -> every other node."""
+    return GraphModel.model_validate(
+        {
+            "nodes": [_const(i) for i in range(n)],
+            "edges": {"exec": [{"src": "n0", "dst": f"n{i}"} for i in range(1, n)]},
+        }
+    )
+
+
+def diamond(n: int) -> GraphModel:
+    """Repeated diamonds: join -> (left, right) -> next join."""
+    exec_edges: List[Dict[str, str]] = []
+    join = 0
+    while join + 3 < n:
+        left, right, nxt = join + 1, join + 2, join + 3
+        for a, b in ((join, left), (join, right), (left, nxt), (right, nxt)):
+            exec_edges.append({"src": f"n{a}", "dst": f"n{b}"})
+        join = nxt
+    return GraphModel.model_validate(
+        {"nodes": [_const(i) for i in range(n)], "edges": {"exec": exec_edges}}
+    )
+
+
+def random_dag(n: int, max_parents: int = 3) -> GraphModel:
+    """Each node waits on up to ``max_parents`` random earlier nodes (seeded by n)."""
+    rng = random.Random(n)
+    exec_edges: List[Dict[str, str]] = []
+    for i in range(1, n):
+        for p in {rng.randrange(i) for _ in range(rng.randint(1, max_parents))}:
+            exec_edges.append({"src": f"n{p}", "dst": f"n{i}"})
+    return GraphModel.model_validate(
+        {"nodes": [_const(i) for i in range(n)], "edges": {"exec": exec_edges}}
+    )
+
+
+SHAPES: Dict[str, Callable[[int], GraphModel]] = {
+    "chain": chain,
+    "fan_out": fan_out,
+    "diamond": diamond,
+    "random": random_dag,
+}
+
+
+def _best(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    engine = Engine(ServiceContainer(), EventBus())
+    print(f"{'shape':<8} {'nodes':>8} {'compile ms':>12} {'run ms':>10} {'us/node':>9}")
+    for name, build in SHAPES.items():
+        for n in args.sizes:
+            graph = build(n)
+            compile_s = _best(lambda graph=graph: compile_plan(graph), args.repeat)
+            plan = compile_plan(graph)
+            run_s = _best(lambda plan=plan: engine.run(plan), args.repeat)
+            print(
+                f"{name:<8} {n:>8} {compile_s * 1e3:>12.2f} {run_s * 1e3:>10.2f} "
+                f"{run_s / n * 1e6:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""Benchmark suite for the engine, schema validation, IR files, EventBus, HTTP API and startup.
+
+Usage:
+    python benchmarks/suite.py [--only engine ir ...] [--full] [--json results.json]
+                               [--baseline benchmarks/baseline.json] [--tolerance 0.25]
+                               [--save-baseline]
+
+Results are printed as a table, or as JSON with ``--format json``. With a baseline,
+any result more than ``--tolerance`` worse than its baseline value is reported and
+the exit status is 1. A fixed calibration loop is timed with every run and saved
+with the baseline; baseline values are scaled by the ratio of the two timings, so
+a faster or slower host does not read as a change in the code. Baselines without
+a calibration are only compared on the host they were recorded on.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import pathlib
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterator, List
+
+_HERE = pathlib.Path(__file__).resolve().parent
+_SRC = _HERE.parent / "src"
+for _p in (_SRC, _HERE):
+    if str(_p) not in sys.path:
+        sys.path.insert(0, str(_p))
+
+from bench_scheduler import SHAPES, _best  # noqa: E402
+
+import ir  # noqa: E402
+import nodes  # noqa: E402,F401
+from runtime.aot import AotCompiler  # noqa: E402
+from runtime.engine import Engine  # noqa: E402
+from runtime.events import Event, EventBus  # noqa: E402
+from runtime.plan import compile_plan  # noqa: E402
+from runtime.services import ServiceContainer  # noqa: E402
+from server.schemas import GraphModel  # noqa: E402
+
+DEFAULT_BASELINE = _HERE / "baseline.json"
+
+
+@dataclass
+class Result:
+    name: str
+    value: float
+    unit: str
+    better: str = "lower"  # or "higher"
+
+
+def _graph_json(n: int) -> Dict[str, Any]:
+    """Chain of n Concat nodes with data and exec edges, as sent by the editor."""
+    return {
+        "version": "0.2.0",
+        "meta": {"id": f"bench-{n}"},
+        "nodes": [
+            {
+                "id": f"n{i}",
+                "type": "AgentFlow/Concat",
+                "params": {},
+                "inputs": {"a": "", "b": "x"},
+                "position": [i * 10.0, 0.0],
+            }
+            for i in range(n)
+        ],
+        "edges": {
+            "data": [{"src": [f"n{i}", "out"], "dst": [f"n{i + 1}", "a"]} for i in range(n - 1)],
+            "exec": [{"src": f"n{i}", "dst": f"n{i + 1}"} for i in range(n - 1)],
+        },
+    }
+
+
+def _ir_doc(n: int) -> Dict[str, Any]:
+    doc = ir.new_ir()
+    g = doc["graph"]
+    g["nodes"] = [
+        {"id": f"n{i}", "kind": "AgentFlow/Concat", "inputs": {"a": ""}, "outputs": {}}
+        for i in range(n)
+    ]
+    g["edges"]["exec"] = [
+        {"from": [f"n{i}", "out"], "to": [f"n{i + 1}", "exec"]} for i in range(n - 1)
+    ]
+    g["edges"]["data"] = [
+        {"from": [f"n{i}", "out"], "to": [f"n{i + 1}", "a"]} for i in range(n - 1)
+    ]
+    return doc
+
+
+def bench_engine(sizes: List[int], repeat: int) -> Iterator[Result]:
+    engine = Engine(ServiceContainer(), EventBus())
+    aot = AotCompiler(engine)
+    for shape, build in SHAPES.items():
+        for n in sizes:
+            graph = build(n)
+            yield Result(
+                f"engine.compile/{shape}/{n}",
+                _best(lambda graph=graph: compile_plan(graph), repeat),
+                "s",
+            )
+            plan = compile_plan(graph)
+            yield Result(
+                f"engine.run/{shape}/{n}", _best(lambda plan=plan: engine.run(plan), repeat), "s"
+            )
+            yield Result(
+                f"engine.run_model/{shape}/{n}",
+                _best(lambda graph=graph: engine.run(graph), repeat),
+                "s",
+            )
+            compiled = aot.compile(plan)
+            yield Result(f"engine.aot/{shape}/{n}", _best(compiled.run, repeat), "s")
+
+
+def bench_schema(sizes: List[int], repeat: int) -> Iterator[Result]:
+    for n in sizes:
+        raw = json.dumps(_graph_json(n)).encode("utf-8")
+        yield Result(
+            f"schema.validate/{n}",
+            _best(lambda raw=raw: GraphModel.model_validate_json(raw), repeat),
+            "s",
+        )
+        model = GraphModel.model_validate_json(raw)
+        yield Result(
+            f"schema.dump/{n}", _best(lambda model=model: model.model_dump_json(), repeat), "s"
+        )
+
+
+def bench_ir(sizes: List[int], repeat: int) -> Iterator[Result]:
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            doc = _ir_doc(n)
+            path = pathlib.Path(tmp) / f"graph-{n}.json"
+            yield Result(
+                f"ir.save/{n}", _best(lambda doc=doc, path=path: ir.save_ir(doc, path), repeat), "s"
+            )
+            yield Result(f"ir.load/{n}", _best(lambda path=path: ir.load_ir(path), repeat), "s")
+
+
+def bench_events(subscribers: List[int], repeat: int, count: int = 20_000) -> Iterator[Result]:
+    for n_subs in subscribers:
+        def publish(n_subs: int = n_subs) -> None:
+            bus = EventBus()
+            subs = [bus.open(maxsize=count) for _ in range(n_subs)]
+            for i in range(count):
+                bus.publish(
+                    Event("NodeFinished", {"run_id": "r", "node_id": f"n{i}"}, lambda: {"x": 1})
+                )
+            for sub in subs:
+                sub.close()
+
+        seconds = _best(publish, repeat)
+        yield Result(f"events.publish/{n_subs}subs", count / seconds, "events/s", "higher")
+
+
+def bench_api(sizes: List[int], repeat: int, requests: int = 200) -> Iterator[Result]:
+    from fastapi.testclient import TestClient
+
+    from server.app import create_app
+
+    client = TestClient(create_app())
+    for n in sizes:
+        client.put("/api/graph", json=_graph_json(n)).raise_for_status()
+        client.post("/api/run", json={}).raise_for_status()  # warm plan and instances
+        latencies: List[float] = []
+        t0 = time.perf_counter()
+        for _ in range(requests):
+            t = time.perf_counter()
+            client.post("/api/run", json={}).raise_for_status()
+            latencies.append(time.perf_counter() - t)
+        total = time.perf_counter() - t0
+        q = statistics.quantiles(latencies, n=100)
+        yield Result(f"api.run/{n}/p50", q[49], "s")
+        yield Result(f"api.run/{n}/p95", q[94], "s")
+        yield Result(f"api.run/{n}/throughput", requests / total, "req/s", "higher")
+
+
+def _first_run(timeout: float = 30.0) -> float:
+    """Seconds from launching the server to its first successful POST /api/run."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/api/run", data=b"{}",
+        headers={"Content-Type": "application/json"}, method="POST",
+    )
+    t0 = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, str(_HERE.parent / "agentflow.py"), "--host", "127.0.0.1",
+         "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - t0 < timeout:
+            try:
+                with urllib.request.urlopen(request, timeout=timeout) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - t0
+            except OSError:
+                if server.poll() is not None:
+                    raise RuntimeError(f"Server exited with code {server.returncode}") from None
+                time.sleep(0.01)
+        raise RuntimeError(f"Server did not answer within {timeout}s")
+    finally:
+        server.kill()
+        server.wait()
+
+
+def bench_startup(repeat: int) -> Iterator[Result]:
+    """Cold start in fresh interpreters, so nothing is already imported."""
+    code = "import sys; sys.path.insert(0, sys.argv[1]); import server.app as a; a.create_app()"
+    cmd = [sys.executable, "-c", code, str(_SRC)]
+    yield Result(
+        "startup.import_app", _best(lambda: subprocess.run(cmd, check=True), repeat), "s"
+    )
+    if importlib.util.find_spec("uvicorn") is not None:
+        yield Result("startup.first_run", min(_first_run() for _ in range(repeat)), "s")
+
+
+SUITES: Dict[str, Callable[[bool, int], Iterator[Result]]] = {
+    "engine": lambda full, r: bench_engine([10, 1000, 10_000] + ([100_000] if full else []), r),
+    "schema": lambda full, r: bench_schema([1000, 10_000] + ([100_000] if full else []), r),
+    "ir": lambda full, r: bench_ir([1000, 10_000] + ([100_000] if full else []), r),
+    "events": lambda full, r: bench_events([1, 10, 100], r),
+    "api": lambda full, r: bench_api([10, 1000], r),
+    "startup": lambda full, r: bench_startup(r),
+}
+
+
+def calibrate(repeat: int) -> float:
+    """Seconds for a fixed pure-Python workload, the yardstick of the host's speed."""
+
+    def work() -> None:
+        d: Dict[int, List[int]] = {}
+        for i in range(200_000):
+            d.setdefault(i % 1000, []).append(i * 7 % 13)
+        sorted(sum(v) for v in d.values())
+
+    return _best(work, max(repeat, 5))
+
+
+def compare(
+    results: List[Result], baseline: Dict[str, Any], tolerance: float, env: Dict[str, Any]
+) -> List[str]:
+    """Human-readable lines for results more than ``tolerance`` worse than the baseline,
+    after scaling the baseline to this host's speed (``env`` of this run)."""
+    base_env = baseline.get("env", {})
+    if base_env.get("calibration") and env.get("calibration"):
+        speed = env["calibration"] / base_env["calibration"]  # > 1: this host is slower
+    elif all(base_env.get(k) == env.get(k) for k in ("python", "platform", "machine")):
+        speed = 1.0
+    else:
+        print("Baseline is uncalibrated and from another host; not compared", file=sys.stderr)
+        return []
+    base = {b["name"]: b for b in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        b = base.get(r.name)
+        if b is None or not b["value"]:
+            continue
+        expected = b["value"] * speed if r.better == "lower" else b["value"] / speed
+        ratio = r.value / expected
+        worse = ratio - 1 if r.better == "lower" else 1 / ratio - 1 if ratio else float("inf")
+        if worse > tolerance:
+            regressions.append(
+                f"{r.name}: {r.value:.6g} {r.unit} vs baseline {expected:.6g} "
+                f"({worse:+.0%} worse)"
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=sorted(SUITES), default=list(SUITES))
+    parser.add_argument("--full", action="store_true", help="include 100k-node cases")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--format", choices=["table", "json"], default="table")
+    parser.add_argument("--json", type=pathlib.Path, help="also write results to this file")
+    parser.add_argument("--baseline", type=pathlib.Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    calibration = calibrate(args.repeat)
+    results: List[Result] = []
+    for suite in args.only:
+        for r in SUITES[suite](args.full, args.repeat):
+            results.append(r)
+            if args.format == "table":
+                print(f"{r.name:<36} {r.value:>14.6g} {r.unit}", flush=True)
+
+    doc = {
+        "env": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "calibration": calibration,
+        },
+        "results": [asdict(r) for r in results],
+    }
+    if args.format == "json":
+        print(json.dumps(doc, indent=2))
+    if args.json:
+        args.json.write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(doc, indent=2) + "\n", encoding="utf-8")
+        return 0
+
+    if not args.baseline.exists():
+        return 0
+    baseline = json.loads(args.baseline.read_text("utf-8"))
+    regressions = compare(results, baseline, args.tolerance, doc["env"])
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
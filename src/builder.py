@@ -1,18 +1,11 @@
 from __future__ import annotations
 
+import json
 import shlex
-from typing import Any, Dict
-
-from .ir import (
-    new_ir,
-    save_ir,
-    load_ir,
-    add_node,
-    add_exec_edge,
-    add_data_edge,
-    remove_node,
-    describe,
-)
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+from .ir import IRDocument, canonicalize, describe, load_ir, save_ir
 
 BANNER = (
     "AgentFlow Builder — type 'help' for commands. "
@@ -22,7 +15,68 @@ BANNER = (
 
 class FlowBuilder:
     def __init__(self, ir: Dict[str, Any] | None = None) -> None:
-        self.ir: Dict[str, Any] = ir or new_ir()
+        self._doc = IRDocument(ir)
+        self._ir: Dict[str, Any] | None = None  # handed out by ``ir``, may have been edited
+        self._quiet = False
+
+    @property
+    def doc(self) -> IRDocument:
+        if self._ir is not None:
+            self._doc = IRDocument(self._ir)
+            self._ir = None
+        return self._doc
+
+    @doc.setter
+    def doc(self, doc: IRDocument) -> None:
+        self._doc = doc
+        self._ir = None
+
+    @property
+    def ir(self) -> Dict[str, Any]:
+        """The flow as a plain IR dict, built once until the flow next changes.
+
+        Edits made to it are picked up by the next command; take ``to_ir()`` for a
+        copy that does not track the builder.
+        """
+        if self._ir is None:
+            self._ir = self._doc.to_ir()
+        return self._ir
+
+    @ir.setter
+    def ir(self, ir: Dict[str, Any]) -> None:
+        self.doc = IRDocument(ir)
+
+    def to_ir(self) -> Dict[str, Any]:
+        return self.doc.to_ir()
+
+    def graph(self) -> Dict[str, Any]:
+        """The flow in the canonical 0.2 form run by the engine and the server."""
+        return canonicalize(self.doc.to_ir())
+
+    def run_script(self, lines: Iterable[str]) -> int:
+        """Run builder commands in batch mode; returns the number of commands run.
+
+        Blank lines and ``#`` comments are skipped and per-command output is
+        suppressed. The first failing command raises ValueError naming its line,
+        and the flow is restored to its state before the script.
+        """
+        snapshot = self.doc.to_ir()
+        count = 0
+        quiet, self._quiet = self._quiet, True
+        try:
+            for lineno, line in enumerate(lines, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                try:
+                    self.execute(line)
+                except Exception as exc:
+                    self.doc = IRDocument(snapshot)
+                    raise ValueError(f"line {lineno}: {line}: {exc}") from exc
+                count += 1
+        finally:
+            self._quiet = quiet  # a nested ``source`` keeps its caller quiet
+        return count
 
     def cmdloop(self) -> None:
         print(BANNER)
@@ -39,68 +93,85 @@ class FlowBuilder:
             self.handle(line)
 
     def handle(self, line: str) -> None:
+        try:
+            self.execute(line)
+        except Exception as exc:
+            print(f"Error: {exc}")
+
+    def execute(self, line: str) -> None:
+        """Run one command, raising on errors."""
         parts = shlex.split(line)
         cmd = parts[0].lower()
         args = parts[1:]
 
-        try:
-            if cmd in {"help", "h", "?"}:
-                self.cmd_help()
-            elif cmd == "show":
-                self.cmd_show()
-            elif cmd == "new":
-                self.ir = new_ir()
-                print("Started a new empty flow.")
-            elif cmd == "load":
-                self._require(len(args) == 1, "Usage: load <path>")
-                self.ir = load_ir(args[0])
-                print(f"Loaded IR from {args[0]}")
-            elif cmd == "save":
-                self._require(len(args) == 1, "Usage: save <path>")
-                save_ir(self.ir, args[0])
-                print(f"Saved IR to {args[0]}")
-            elif cmd == "add":
-                self._require(args, "Usage: add <node|exec|data> ...")
-                sub = args[0].lower()
-                if sub == "node":
-                    self._require(len(args) == 3, "Usage: add node <id> <kind>")
-                    add_node(self.ir, args[1], args[2])
-                    print(f"Added node {args[1]} ({args[2]})")
-                elif sub == "exec":
-                    self._require(len(args) == 3, "Usage: add exec <from_node> <to_node>")
-                    add_exec_edge(self.ir, args[1], args[2])
-                    print(f"Added exec edge: {args[1]} -> {args[2]}")
-                elif sub == "data":
-                    self._require(len(args) == 5, "Usage: add data <from_node> <from_port> <to_node> <to_port>")
-                    add_data_edge(self.ir, args[1], args[2], args[3], args[4])
-                    print(f"Added data edge: {args[1]}:{args[2]} -> {args[3]}:{args[4]}")
-                else:
-                    print("Unknown 'add' subtype. Use: node | exec | data")
-            elif cmd == "remove":
-                self._require(len(args) == 2 and args[0] == "node", "Usage: remove node <id>")
-                remove_node(self.ir, args[1])
-                print(f"Removed node {args[1]} (and connected edges)")
-            elif cmd == "list":
-                self._require(args, "Usage: list <nodes|edges>")
-                sub = args[0].lower()
-                g = self.ir["graph"]
-                if sub == "nodes":
-                    for n in g["nodes"]:
-                        print(f"- {n['id']} ({n.get('kind')})")
-                elif sub == "edges":
-                    for e in g["edges"]["exec"]:
-                        print(f"- exec: {e['from'][0]} -> {e['to'][0]}")
-                    for e in g["edges"]["data"]:
-                        print(f"- data: {e['from'][0]}:{e['from'][1]} -> {e['to'][0]}:{e['to'][1]}")
-                else:
-                    print("Unknown list target. Use: nodes | edges")
+        if cmd in {"help", "h", "?"}:
+            self.cmd_help()
+        elif cmd == "show":
+            self.cmd_show()
+        elif cmd == "new":
+            self.doc = IRDocument()
+            self._say("Started a new empty flow.")
+        elif cmd == "load":
+            self._require(len(args) == 1, "Usage: load <path>")
+            self.doc = IRDocument(load_ir(args[0]))
+            self._say(f"Loaded IR from {args[0]}")
+        elif cmd == "save":
+            self._require(len(args) == 1, "Usage: save <path>")
+            save_ir(self.doc, args[0])
+            self._say(f"Saved IR to {args[0]}")
+        elif cmd == "export":
+            self._require(len(args) == 1, "Usage: export <path>")
+            Path(args[0]).write_text(json.dumps(self.graph(), indent=2), encoding="utf-8")
+            self._say(f"Exported graph to {args[0]}")
+        elif cmd in {"source", "batch"}:
+            self._require(len(args) == 1, f"Usage: {cmd} <path>")
+            count = self.run_script(Path(args[0]).read_text(encoding="utf-8").splitlines())
+            self._say(f"Ran {count} commands from {args[0]}")
+        elif cmd == "add":
+            self._require(args, "Usage: add <node|exec|data> ...")
+            sub = args[0].lower()
+            if sub == "node":
+                self._require(len(args) == 3, "Usage: add node <id> <kind>")
+                self.doc.add_node(args[1], args[2])
+                self._say(f"Added node {args[1]} ({args[2]})")
+            elif sub == "exec":
+                self._require(len(args) == 3, "Usage: add exec <from_node> <to_node>")
+                self.doc.add_exec_edge(args[1], args[2])
+                self._say(f"Added exec edge: {args[1]} -> {args[2]}")
+            elif sub == "data":
+                self._require(
+                    len(args) == 5, "Usage: add data <from_node> <from_port> <to_node> <to_port>"
+                )
+                self.doc.add_data_edge(args[1], args[2], args[3], args[4])
+                self._say(f"Added data edge: {args[1]}:{args[2]} -> {args[3]}:{args[4]}")
             else:
-                print("Unknown command. Type 'help' for assistance.")
-        except Exception as exc:
-            print(f"Error: {exc}")
+                raise ValueError("Unknown 'add' subtype. Use: node | exec | data")
+        elif cmd == "remove":
+            self._require(len(args) == 2 and args[0] == "node", "Usage: remove node <id>")
+            self.doc.remove_node(args[1])
+            self._say(f"Removed node {args[1]} (and connected edges)")
+        elif cmd == "list":
+            self._require(args, "Usage: list <nodes|edges>")
+            sub = args[0].lower()
+            if sub == "nodes":
+                for n in self.doc.nodes():
+                    print(f"- {n['id']} ({n.get('kind')})")
+            elif sub == "edges":
+                for e in self.doc.exec_edges():
+                    print(f"- exec: {e['from'][0]} -> {e['to'][0]}")
+                for e in self.doc.data_edges():
+                    print(f"- data: {e['from'][0]}:{e['from'][1]} -> {e['to'][0]}:{e['to'][1]}")
+            else:
+                raise ValueError("Unknown list target. Use: nodes | edges")
+        else:
+            raise ValueError("Unknown command. Type 'help' for assistance.")
+
+    def _say(self, msg: str) -> None:
+        if not self._quiet:
+            print(msg)
 
     def cmd_show(self) -> None:
-        print(describe(self.ir))
+        print(describe(self.doc))
 
     @staticmethod
     def _require(condition: bool, msg: str) -> None:
@@ -116,6 +187,8 @@ class FlowBuilder:
   new                         Start a new empty flow
   load <path>                 Load an IR from JSON
   save <path>                 Save the current flow to JSON
+  export <path>               Save the flow as a runnable 0.2 graph JSON
+  source <path>               Run a script of commands (all or nothing)
   add node <id> <kind>        Add a node
   add exec <from> <to>        Add an execution edge
   add data <from> <fp> <to> <tp>  Add a data edge (ports)
@@ -1,19 +1,186 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+import itertools
+import logging
+import threading
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from .persistent import PersistentMap
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ("run", "graph", "global")
+
+# callback(scope, key, value, version); version 0 means the key was deleted
+Listener = Callable[[str, str, Any, int], None]
+
+_MISSING = object()
+
+
+class BlackboardSnapshot(Mapping[str, Any]):
+    """Immutable view of a blackboard scope at one point in time (O(1) to take)."""
+
+    __slots__ = ("_entries",)
+
+    def __init__(self, entries: PersistentMap) -> None:
+        self._entries = entries
+
+    def __getitem__(self, key: str) -> Any:
+        return self._entries[key][0]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def version(self, key: str) -> int:
+        entry = self._entries.get(key)
+        return entry[1] if entry is not None else 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Copy of the entries, in the order they were last written."""
+        entries = sorted(self._entries.items(), key=lambda kv: kv[1][1])
+        return {k: v for k, (v, _) in entries}
 
 
 class Blackboard:
-    """Shared key-value store."""
+    """Shared key-value store, safe for concurrent readers and writers.
+
+    Entries live in a PersistentMap of ``key -> (value, version)``: reads take no
+    lock, writes swap in a new map under the board's lock, and ``snapshot()`` is
+    O(1). Versions increase on every write to the board, so ``version(key)``
+    changes whenever the key does.
+
+    Boards chain by scope, ``run -> graph -> global``: ``get`` falls back to the
+    outer scopes, and writers pick a scope with ``scope=`` (default: this board's).
+    ``subscribe`` calls listeners after each write to the board they are on.
+    """
 
-    def __init__(self) -> None:
-        self._data: Dict[str, Any] = {}
+    def __init__(self, scope: str = "run", parent: Blackboard | None = None) -> None:
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown blackboard scope {scope!r} (expected one of {SCOPES})")
+        self.scope = scope
+        self.parent = parent
+        self._entries = PersistentMap()
+        self._clock = itertools.count(1)
+        self._lock = threading.Lock()
+        self._listeners: Tuple[Tuple[Listener, Optional[frozenset[str]]], ...] = ()
+
+    def board(self, scope: str | None = None) -> Blackboard:
+        """This board or the enclosing one of ``scope``."""
+        b: Blackboard | None = self
+        while b is not None:
+            if scope is None or b.scope == scope:
+                return b
+            b = b.parent
+        raise KeyError(f"No {scope!r} blackboard above this {self.scope!r} one")
 
     def get(self, key: str, default: Any = None) -> Any:
-        return self._data.get(key, default)
+        b: Blackboard | None = self
+        while b is not None:
+            entry = b._entries.get(key)
+            if entry is not None:
+                return entry[0]
+            b = b.parent
+        return default
+
+    def version(self, key: str) -> int:
+        """Version of ``key`` in this scope (0 if absent)."""
+        entry = self._entries.get(key)
+        return entry[1] if entry is not None else 0
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def set(self, key: str, value: Any, *, scope: str | None = None) -> int:
+        """Write ``key`` and return its new version."""
+        return self.board(scope)._write(key, lambda _: value)
+
+    def update(
+        self, key: str, fn: Callable[[Any], Any], default: Any = None, *, scope: str | None = None
+    ) -> Any:
+        """Atomically replace ``key`` with ``fn(current or default)``; returns the new value."""
+        b = self.board(scope)
+        result: list[Any] = []
+
+        def apply(entry: Optional[Tuple[Any, int]]) -> Any:
+            result.append(fn(entry[0] if entry is not None else default))
+            return result[-1]
+
+        b._write(key, apply)
+        return result[-1]
 
-    def set(self, key: str, value: Any) -> None:
-        self._data[key] = value
+    def compare_and_set(
+        self, key: str, version: int, value: Any, *, scope: str | None = None
+    ) -> bool:
+        """Write ``key`` only if its version is still ``version`` (0: still absent)."""
+        return self.board(scope)._write(key, lambda _: value, expect=version) > 0
+
+    def delete(self, key: str, *, scope: str | None = None) -> bool:
+        b = self.board(scope)
+        with b._lock:
+            if key not in b._entries:
+                return False
+            b._entries = b._entries.delete(key)
+            listeners = b._listeners
+        b._notify(listeners, key, None, 0)
+        return True
+
+    def snapshot(self) -> BlackboardSnapshot:
+        """O(1) immutable view of this scope's entries."""
+        return BlackboardSnapshot(self._entries)
 
     def as_dict(self) -> Dict[str, Any]:
-        return dict(self._data)
+        """Copy of this scope's entries."""
+        return self.snapshot().as_dict()
+
+    def subscribe(
+        self, listener: Listener, keys: Iterable[str] | None = None
+    ) -> Callable[[], None]:
+        """Call ``listener`` after writes to ``keys`` (all keys if None) in this scope.
+
+        Listeners run on the writing thread, after the write is visible. Returns a
+        function that removes the subscription.
+        """
+        sub = (listener, frozenset(keys) if keys is not None else None)
+        with self._lock:
+            self._listeners = self._listeners + (sub,)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                self._listeners = tuple(s for s in self._listeners if s is not sub)
+
+        return unsubscribe
+
+    def _write(
+        self, key: str, make: Callable[[Any], Any], expect: int | None = None
+    ) -> int:
+        with self._lock:
+            entry = self._entries.get(key)
+            if expect is not None and (entry[1] if entry is not None else 0) != expect:
+                return 0
+            value = make(entry)
+            version = next(self._clock)
+            self._entries = self._entries.set(key, (value, version))
+            listeners = self._listeners
+        self._notify(listeners, key, value, version)
+        return version
+
+    def _notify(
+        self,
+        listeners: Tuple[Tuple[Listener, Optional[frozenset[str]]], ...],
+        key: str,
+        value: Any,
+        version: int,
+    ) -> None:
+        for listener, keys in listeners:
+            if keys is None or key in keys:
+                try:
+                    listener(self.scope, key, value, version)
+                except Exception:
+                    logger.exception("Blackboard listener failed for %r", key)
@@ -1,7 +1,15 @@
 from __future__ import annotations
 
+from array import array
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Literal, Optional, Tuple, TypedDict
+from types import MappingProxyType
+from typing import (
+    TYPE_CHECKING, Any, Dict, Iterator, List, Literal, Mapping, Optional, Sequence, Tuple,
+    TypedDict,
+)
+
+if TYPE_CHECKING:
+    from server.schemas import GraphModel as GraphSchema
 
 
 PortDirection = Literal["in", "out"]
@@ -75,3 +83,293 @@ class CompiledGraph:
             exec_next=exec_next,
             exec_prev_count=exec_prev_count,
         )
+
+
+_EMPTY: Mapping[str, Any] = MappingProxyType({})  # shared by nodes with an empty dict field
+
+
+def _shared(d: Optional[Dict[str, Any]]) -> Optional[Mapping[str, Any]]:
+    # None (key absent) and {} are kept apart so IR documents round-trip exactly
+    return _EMPTY if d is not None and not d else d
+
+
+class CompactNode:
+    """Per-node payload of a CompactGraph; ids, types and edges live in its arrays."""
+
+    __slots__ = ("params", "inputs", "position", "cache", "extra")
+
+    def __init__(
+        self,
+        params: Optional[Mapping[str, Any]] = None,
+        inputs: Optional[Mapping[str, Any]] = None,
+        position: Optional[Tuple[float, float]] = None,
+        cache: Optional[bool] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.params = params
+        self.inputs = inputs
+        self.position = position
+        self.cache = cache
+        self.extra = extra  # unknown keys, kept for lossless round trips
+
+
+def _csr(n: int, keys: Sequence[int]) -> Tuple[array, array]:
+    """Group edge indices by ``keys[e]``: edges of row i are ``idx[ptr[i]:ptr[i + 1]]``."""
+    ptr = array("i", bytes(4 * (n + 1)))
+    for k in keys:
+        ptr[k + 1] += 1
+    for i in range(n):
+        ptr[i + 1] += ptr[i]
+    fill = array("i", ptr[:-1])
+    idx = array("i", bytes(4 * len(keys)))
+    for e, k in enumerate(keys):
+        idx[fill[k]] = e
+        fill[k] += 1
+    return ptr, idx
+
+
+def _laid_out(layout: Optional[Dict[str, Any]], known: Dict[str, Any]) -> Dict[str, Any]:
+    """``known`` merged into a copy of ``layout`` (unknown keys in document order)."""
+    if layout is None:
+        return known
+    out = dict(layout)
+    out.update(known)
+    return out
+
+
+class CompactGraph:
+    """Array-backed graph: node ids, types and port names interned to ints.
+
+    Edges are stored in document order as parallel ``array('i')`` columns and indexed
+    by CSR adjacency (``*_ptr``/``*_idx`` pairs) in both directions, so traversals
+    touch contiguous ints instead of dicts keyed by strings. Converts losslessly
+    to and from GraphModel (pydantic or dict form) and the IR document format.
+    Built once and treated as read-only.
+    """
+
+    __slots__ = (
+        "version", "meta", "ids", "index", "type_names", "types", "ports", "nodes",
+        "data_src", "data_src_port", "data_dst", "data_dst_port",
+        "exec_src", "exec_dst", "exec_ports", "edge_extra", "ir_layout",
+        "data_out_ptr", "data_out_idx", "data_in_ptr", "data_in_idx",
+        "exec_out_ptr", "exec_out_idx", "exec_in_ptr", "exec_in_idx",
+    )
+
+    def __init__(self, version: str, meta: Dict[str, Any]) -> None:
+        self.version = version
+        self.meta = meta
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.type_names: List[str] = []
+        self.types = array("i")
+        self.ports: List[str] = []
+        self.nodes: List[CompactNode] = []
+        self.data_src = array("i")
+        self.data_src_port = array("i")
+        self.data_dst = array("i")
+        self.data_dst_port = array("i")
+        self.exec_src = array("i")
+        self.exec_dst = array("i")
+        self.exec_ports: Optional[array] = None  # IR only: (src port, dst port) per edge
+        self.edge_extra: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        # IR only: unknown keys of the document, "graph" and "edges" objects, in
+        # document order (known keys hold None and are filled in by to_ir)
+        self.ir_layout: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _port(self, name: str, table: Dict[str, int]) -> int:
+        i = table.get(name)
+        if i is None:
+            i = table[name] = len(self.ports)
+            self.ports.append(name)
+        return i
+
+    def _node(self, node_id: str, type_name: str, node: CompactNode, types: Dict[str, int]) -> None:
+        if node_id in self.index:
+            raise ValueError(f"Duplicate node id: {node_id}")
+        t = types.get(type_name)
+        if t is None:
+            t = types[type_name] = len(self.type_names)
+            self.type_names.append(type_name)
+        self.index[node_id] = len(self.ids)
+        self.ids.append(node_id)
+        self.types.append(t)
+        self.nodes.append(node)
+
+    def _ref(self, node_id: str) -> int:
+        try:
+            return self.index[node_id]
+        except KeyError:
+            raise ValueError(f"Edge references unknown node: {node_id}") from None
+
+    def _finish(self) -> "CompactGraph":
+        n = len(self.ids)
+        self.data_out_ptr, self.data_out_idx = _csr(n, self.data_src)
+        self.data_in_ptr, self.data_in_idx = _csr(n, self.data_dst)
+        self.exec_out_ptr, self.exec_out_idx = _csr(n, self.exec_src)
+        self.exec_in_ptr, self.exec_in_idx = _csr(n, self.exec_dst)
+        return self
+
+    @classmethod
+    def from_model(cls, graph: "GraphModel | GraphSchema") -> "CompactGraph":
+        """From a GraphModel dict or a pydantic ``server.schemas.GraphModel``."""
+        if not isinstance(graph, dict):
+            graph = graph.model_dump(mode="json")  # type: ignore[assignment]
+        g = cls(graph.get("version", IR_VERSION), dict(graph.get("meta", {})))
+        types: Dict[str, int] = {}
+        ports: Dict[str, int] = {}
+        known = ("id", "type", "params", "inputs", "position", "cache")
+        for n in graph.get("nodes", []):
+            pos = n.get("position")
+            extra = {k: v for k, v in n.items() if k not in known}
+            node = CompactNode(
+                _shared(n.get("params")),
+                _shared(n.get("inputs")),
+                (float(pos[0]), float(pos[1])) if pos is not None else None,
+                n.get("cache"),
+                extra or None,
+            )
+            g._node(n["id"], n["type"], node, types)
+        edges = graph.get("edges", {})
+        for e in edges.get("data", []):
+            g.data_src.append(g._ref(e["src"][0]))
+            g.data_src_port.append(g._port(e["src"][1], ports))
+            g.data_dst.append(g._ref(e["dst"][0]))
+            g.data_dst_port.append(g._port(e["dst"][1], ports))
+        for e in edges.get("exec", []):
+            g.exec_src.append(g._ref(e["src"]))
+            g.exec_dst.append(g._ref(e["dst"]))
+        return g._finish()
+
+    @classmethod
+    def from_ir(cls, ir: Dict[str, Any]) -> "CompactGraph":
+        """From an IR document (see ``ir.py``)."""
+        g = cls(ir.get("version", ""), dict(ir.get("meta", {})))
+        for part, obj, known in (
+            ("doc", ir, ("version", "meta", "graph")),
+            ("graph", ir["graph"], ("nodes", "edges")),
+            ("edges", ir["graph"]["edges"], ("exec", "data")),
+        ):
+            if any(k not in known for k in obj):
+                g.ir_layout[part] = {k: None if k in known else v for k, v in obj.items()}
+        types: Dict[str, int] = {}
+        ports: Dict[str, int] = {}
+        for n in ir["graph"]["nodes"]:
+            extra = {k: v for k, v in n.items() if k not in ("id", "kind", "inputs")}
+            node = CompactNode(inputs=_shared(n.get("inputs")), extra=extra or None)
+            g._node(n["id"], n["kind"], node, types)
+        edges = ir["graph"]["edges"]
+        for i, e in enumerate(edges["data"]):
+            g.data_src.append(g._ref(e["from"][0]))
+            g.data_src_port.append(g._port(e["from"][1], ports))
+            g.data_dst.append(g._ref(e["to"][0]))
+            g.data_dst_port.append(g._port(e["to"][1], ports))
+            if len(e) > 2:
+                g.edge_extra[("data", i)] = {k: v for k, v in e.items() if k not in ("from", "to")}
+        g.exec_ports = array("i")
+        for i, e in enumerate(edges["exec"]):
+            g.exec_src.append(g._ref(e["from"][0]))
+            g.exec_dst.append(g._ref(e["to"][0]))
+            g.exec_ports.append(g._port(e["from"][1], ports))
+            g.exec_ports.append(g._port(e["to"][1], ports))
+            if len(e) > 2:
+                g.edge_extra[("exec", i)] = {k: v for k, v in e.items() if k not in ("from", "to")}
+        return g._finish()
+
+    def to_dict(self) -> GraphModel:
+        """GraphModel dict form, as ``server.schemas.GraphModel.model_dump`` writes it."""
+        ids, ports = self.ids, self.ports
+        nodes: List[NodeInstance] = []
+        for i, n in enumerate(self.nodes):
+            node: Dict[str, Any] = {
+                "id": ids[i],
+                "type": self.type_names[self.types[i]],
+                "params": dict(n.params or {}),
+                "inputs": dict(n.inputs or {}),
+                "position": list(n.position) if n.position is not None else None,
+                "cache": n.cache,
+            }
+            if n.extra:
+                node.update(n.extra)
+            nodes.append(node)  # type: ignore[arg-type]
+        data = [
+            {"src": [ids[s], ports[sp]], "dst": [ids[d], ports[dp]]}
+            for s, sp, d, dp in zip(
+                self.data_src, self.data_src_port, self.data_dst, self.data_dst_port, strict=True
+            )
+        ]
+        exec_ = [
+            {"src": ids[s], "dst": ids[d]}
+            for s, d in zip(self.exec_src, self.exec_dst, strict=True)
+        ]
+        return {
+            "version": self.version,
+            "meta": dict(self.meta),
+            "nodes": nodes,
+            "edges": {"data": data, "exec": exec_},
+        }
+
+    def to_model(self) -> "GraphSchema":
+        from server.schemas import GraphModel as GraphSchema
+
+        return GraphSchema.model_validate(self.to_dict())
+
+    def to_ir(self) -> Dict[str, Any]:
+        ids, ports = self.ids, self.ports
+        nodes = []
+        for i, n in enumerate(self.nodes):
+            node: Dict[str, Any] = {"id": ids[i], "kind": self.type_names[self.types[i]]}
+            if n.inputs is not None:
+                node["inputs"] = dict(n.inputs)
+            if n.extra:
+                node.update(n.extra)
+            nodes.append(node)
+        data = []
+        for i, (s, sp, d, dp) in enumerate(
+            zip(self.data_src, self.data_src_port, self.data_dst, self.data_dst_port, strict=True)
+        ):
+            edge = {"from": [ids[s], ports[sp]], "to": [ids[d], ports[dp]]}
+            data.append({**edge, **self.edge_extra.get(("data", i), {})})
+        exec_ = []
+        ep = self.exec_ports
+        for i, (s, d) in enumerate(zip(self.exec_src, self.exec_dst, strict=True)):
+            sp, dp = (ports[ep[2 * i]], ports[ep[2 * i + 1]]) if ep is not None else ("out", "exec")
+            edge = {"from": [ids[s], sp], "to": [ids[d], dp]}
+            exec_.append({**edge, **self.edge_extra.get(("exec", i), {})})
+        layout = self.ir_layout
+        return _laid_out(layout.get("doc"), {
+            "version": self.version,
+            "meta": dict(self.meta),
+            "graph": _laid_out(layout.get("graph"), {
+                "nodes": nodes,
+                "edges": _laid_out(layout.get("edges"), {"exec": exec_, "data": data}),
+            }),
+        })
+
+    def type_of(self, i: int) -> str:
+        return self.type_names[self.types[i]]
+
+    def exec_next(self, i: int) -> Iterator[int]:
+        dst, idx = self.exec_dst, self.exec_out_idx
+        return (dst[idx[k]] for k in range(self.exec_out_ptr[i], self.exec_out_ptr[i + 1]))
+
+    def exec_prev(self, i: int) -> Iterator[int]:
+        src, idx = self.exec_src, self.exec_in_idx
+        return (src[idx[k]] for k in range(self.exec_in_ptr[i], self.exec_in_ptr[i + 1]))
+
+    def exec_prev_count(self, i: int) -> int:
+        return self.exec_in_ptr[i + 1] - self.exec_in_ptr[i]
+
+    def data_in(self, i: int) -> Iterator[Tuple[int, int, int]]:
+        """(dst port, src node, src port) of the data edges into node ``i``."""
+        for k in range(self.data_in_ptr[i], self.data_in_ptr[i + 1]):
+            e = self.data_in_idx[k]
+            yield self.data_dst_port[e], self.data_src[e], self.data_src_port[e]
+
+    def data_out(self, i: int) -> Iterator[Tuple[int, int, int]]:
+        """(src port, dst node, dst port) of the data edges out of node ``i``."""
+        for k in range(self.data_out_ptr[i], self.data_out_ptr[i + 1]):
+            e = self.data_out_idx[k]
+            yield self.data_src_port[e], self.data_dst[e], self.data_dst_port[e]
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, Mapping, Optional, Tuple
+from typing import TYPE_CHECKING, Any, FrozenSet, List, Mapping, Optional, Sequence
+
+if TYPE_CHECKING:
+    from core.blackboard import Blackboard
+    from runtime.services import ServiceContainer
 
 
 @dataclass
@@ -20,6 +24,28 @@ class Node:
     INPUTS: Mapping[str, str] = {}   # port -> type name
     OUTPUTS: Mapping[str, str] = {}
     PARAMS: Mapping[str, str] = {}
+    # How run_async executes a blocking ``run``: "thread", "process" or "inline".
+    # Process nodes get a private services/blackboard pair and must be picklable.
+    EXECUTOR: str = "thread"
+    MAX_CONCURRENCY: Optional[int] = None  # per-run cap for this node type
+    # Pure nodes (output depends only on params + inputs) may be served from the result cache.
+    CACHEABLE: bool = False
+    # Input ports that take a stream of chunks (see runtime.streams.OutputStream) instead
+    # of the producer's joined value. Under run_async such nodes start while the upstream
+    # is still streaming, so they should be async or use the "thread" executor.
+    STREAM_INPUTS: FrozenSet[str] = frozenset()
+    # Lifetime of an instance (see runtime.instances.InstancePool): "process" shares warm
+    # instances across all graphs, "graph" across runs of one graph, "run" within one run
+    # only (torn down when it ends). Instances are never used by two executions at once.
+    # The default is "run" so nodes that keep per-run state on ``self`` never see another
+    # run's; stateless nodes with costly setup should opt into "graph" or "process".
+    SCOPE: str = "run"
+
+    def setup(self, services: "ServiceContainer") -> None:
+        """Build expensive state (clients, models); called once per instance before use."""
+
+    def teardown(self) -> None:
+        """Release what ``setup`` acquired; called when the instance leaves its scope."""
 
     def run(
         self,
@@ -27,5 +53,21 @@ class Node:
         inputs: Mapping[str, Any],
         params: Mapping[str, Any],
     ) -> Mapping[str, Any]:
-        """Execute node and return output dict."""
+        """Execute node and return output dict. May be declared ``async def``.
+
+        An output value may be a generator or async generator to stream that port.
+        """
         raise NotImplementedError
+
+    def run_batch(
+        self,
+        ctxs: Sequence[NodeContext],
+        inputs: Sequence[Mapping[str, Any]],
+        params: Mapping[str, Any],
+    ) -> List[Mapping[str, Any]]:
+        """Vectorized ``run`` over many items; returns one output dict per item.
+
+        Engine.run_many calls this once per chunk when a subclass overrides it;
+        otherwise ``run`` is called item by item.
+        """
+        return [self.run(ctx, item, params) for ctx, item in zip(ctxs, inputs, strict=True)]
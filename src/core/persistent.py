@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any, Iterator, Optional, Tuple
+
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_BITS = 64
+_MISSING = object()
+
+
+def _hash(key: Any) -> int:
+    return hash(key) & ((1 << _HASH_BITS) - 1)
+
+
+class _Bitmap:
+    """Trie node: ``slots`` holds, in bit order, one entry per set bit of ``bitmap``.
+    An entry is a leaf ``(hash, key, value)`` or a child node."""
+
+    __slots__ = ("bitmap", "slots")
+
+    def __init__(self, bitmap: int, slots: Tuple[Any, ...]) -> None:
+        self.bitmap = bitmap
+        self.slots = slots
+
+
+class _Collision:
+    """Keys whose 64-bit hashes are all equal."""
+
+    __slots__ = ("hash", "pairs")
+
+    def __init__(self, h: int, pairs: Tuple[Tuple[Any, Any], ...]) -> None:
+        self.hash = h
+        self.pairs = pairs
+
+
+_Node = (_Bitmap, _Collision)
+_EMPTY_ROOT = _Bitmap(0, ())
+
+
+def _lookup(node: Any, h: int, key: Any) -> Any:
+    shift = 0
+    while True:
+        if isinstance(node, _Collision):
+            for k, v in node.pairs:
+                if k == key:
+                    return v
+            return _MISSING
+        bit = 1 << ((h >> shift) & _MASK)
+        if not node.bitmap & bit:
+            return _MISSING
+        slot = node.slots[(node.bitmap & (bit - 1)).bit_count()]
+        if isinstance(slot, _Node):
+            node = slot
+            shift += _BITS
+            continue
+        sh, k, v = slot
+        return v if sh == h and (k is key or k == key) else _MISSING
+
+
+def _merge(a: Tuple[int, Any, Any], b: Tuple[int, Any, Any], shift: int) -> Any:
+    if shift >= _HASH_BITS:
+        return _Collision(a[0], ((a[1], a[2]), (b[1], b[2])))
+    ia, ib = (a[0] >> shift) & _MASK, (b[0] >> shift) & _MASK
+    if ia == ib:
+        return _Bitmap(1 << ia, (_merge(a, b, shift + _BITS),))
+    return _Bitmap((1 << ia) | (1 << ib), (a, b) if ia < ib else (b, a))
+
+
+def _assoc(node: Any, h: int, shift: int, key: Any, value: Any) -> Tuple[Any, bool]:
+    """``node`` with key set, sharing every untouched branch; also whether key is new."""
+    if isinstance(node, _Collision):
+        pairs = tuple(p for p in node.pairs if p[0] != key)
+        return _Collision(h, pairs + ((key, value),)), len(pairs) == len(node.pairs)
+    bit = 1 << ((h >> shift) & _MASK)
+    i = (node.bitmap & (bit - 1)).bit_count()
+    if not node.bitmap & bit:
+        slots = node.slots[:i] + ((h, key, value),) + node.slots[i:]
+        return _Bitmap(node.bitmap | bit, slots), True
+    slot = node.slots[i]
+    if isinstance(slot, _Node):
+        child, added = _assoc(slot, h, shift + _BITS, key, value)
+    elif slot[0] == h and slot[1] == key:
+        child, added = (h, key, value), False
+    else:
+        child, added = _merge(slot, (h, key, value), shift + _BITS), True
+    return _Bitmap(node.bitmap, node.slots[:i] + (child,) + node.slots[i + 1:]), added
+
+
+def _dissoc(node: Any, h: int, shift: int, key: Any) -> Tuple[Any, bool]:
+    """``node`` without key (None if it becomes empty, a leaf if one entry is left)."""
+    if isinstance(node, _Collision):
+        pairs = tuple(p for p in node.pairs if p[0] != key)
+        if len(pairs) == len(node.pairs):
+            return node, False
+        if len(pairs) == 1:
+            return (h, *pairs[0]), True
+        return _Collision(h, pairs), True
+    bit = 1 << ((h >> shift) & _MASK)
+    if not node.bitmap & bit:
+        return node, False
+    i = (node.bitmap & (bit - 1)).bit_count()
+    slot = node.slots[i]
+    if isinstance(slot, _Node):
+        child, removed = _dissoc(slot, h, shift + _BITS, key)
+        if not removed:
+            return node, False
+    elif slot[0] == h and slot[1] == key:
+        child = None
+    else:
+        return node, False
+    if child is None:
+        bitmap, slots = node.bitmap & ~bit, node.slots[:i] + node.slots[i + 1:]
+    else:
+        bitmap, slots = node.bitmap, node.slots[:i] + (child,) + node.slots[i + 1:]
+    if shift and len(slots) == 1 and not isinstance(slots[0], _Node):
+        return slots[0], True  # collapse a lone leaf into the parent
+    if not slots:
+        return (None if shift else _EMPTY_ROOT), True
+    return _Bitmap(bitmap, slots), True
+
+
+def _items(node: Any) -> Iterator[Tuple[Any, Any]]:
+    if isinstance(node, _Collision):
+        yield from node.pairs
+        return
+    for slot in node.slots:
+        if isinstance(slot, _Node):
+            yield from _items(slot)
+        else:
+            yield slot[1], slot[2]
+
+
+class PersistentMap(Mapping[Any, Any]):
+    """Immutable hash map (a hash array mapped trie) with structural sharing.
+
+    ``set`` and ``delete`` return a new map in O(log32 n), copying only the path to
+    the changed key; the old map is unchanged and shares everything else. Holding
+    on to a map is therefore an O(1) snapshot.
+    """
+
+    __slots__ = ("_root", "_size")
+
+    def __init__(self, items: Optional[Mapping[Any, Any]] = None) -> None:
+        self._root: Any = _EMPTY_ROOT
+        self._size = 0
+        for k, v in (items or {}).items():
+            self._root, added = _assoc(self._root, _hash(k), 0, k, v)
+            self._size += added
+
+    @classmethod
+    def _make(cls, root: Any, size: int) -> PersistentMap:
+        m = cls.__new__(cls)
+        m._root = root
+        m._size = size
+        return m
+
+    def __getitem__(self, key: Any) -> Any:
+        v = _lookup(self._root, _hash(key), key)
+        if v is _MISSING:
+            raise KeyError(key)
+        return v
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        v = _lookup(self._root, _hash(key), key)
+        return default if v is _MISSING else v
+
+    def __contains__(self, key: object) -> bool:
+        return _lookup(self._root, _hash(key), key) is not _MISSING
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Any]:
+        return (k for k, _ in _items(self._root))
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:  # type: ignore[override]
+        return _items(self._root)
+
+    def set(self, key: Any, value: Any) -> PersistentMap:
+        root, added = _assoc(self._root, _hash(key), 0, key, value)
+        return PersistentMap._make(root, self._size + added)
+
+    def delete(self, key: Any) -> PersistentMap:
+        root, removed = _dissoc(self._root, _hash(key), 0, key)
+        return PersistentMap._make(root, self._size - removed) if removed else self
+
+    def __repr__(self) -> str:
+        return f"PersistentMap({dict(self.items())!r})"
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import argparse
+import ast
+import hashlib
+import importlib
+import importlib.util
+import json
+import logging
+import os
+import sys
+from dataclasses import asdict
+from importlib.metadata import entry_points
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .registry import REGISTRY, NodeInfo, NodeRegistry
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "agentflow.nodes"  # value: "module" or "module:NodeClass"
+MANIFEST_VERSION = 1
+_METADATA = {"TYPE_NAME": "type", "INPUTS": "inputs", "OUTPUTS": "outputs", "PARAMS": "params"}
+
+
+class OpaqueModuleError(ValueError):
+    """Raised when a module's node metadata cannot be read without importing it."""
+
+
+def scan_source(source: str, module: str, only: str | None = None) -> List[NodeInfo]:
+    """Node types defined in ``source``, read from its syntax tree.
+
+    A node class is one decorated with ``register_node`` (or, with ``only``, the
+    class of that name). TYPE_NAME, INPUTS, OUTPUTS and PARAMS must be literals in
+    the class body or in a base class defined in the same module; otherwise
+    OpaqueModuleError is raised.
+    """
+    tree = ast.parse(source)
+    classes = {n.name: n for n in tree.body if isinstance(n, ast.ClassDef)}
+
+    def attrs(name: str, seen: Tuple[str, ...] = ()) -> Dict[str, Any]:
+        node = classes.get(name)
+        if node is None or name in seen:
+            return {}
+        found: Dict[str, Any] = {}
+        for base in node.bases:  # earlier bases win, as in the MRO
+            if isinstance(base, ast.Name):
+                found = {**attrs(base.id, seen + (name,)), **found}
+        for stmt in node.body:
+            target, value = None, None
+            if isinstance(stmt, ast.Assign) and len(stmt.targets) == 1:
+                target, value = stmt.targets[0], stmt.value
+            elif isinstance(stmt, ast.AnnAssign):
+                target, value = stmt.target, stmt.value
+            if isinstance(target, ast.Name) and target.id in _METADATA and value is not None:
+                try:
+                    found[target.id] = ast.literal_eval(value)
+                except ValueError:
+                    raise OpaqueModuleError(
+                        f"{module}.{name}.{target.id} is not a literal"
+                    ) from None
+        return found
+
+    infos = []
+    for name, node in classes.items():
+        decorated = any(
+            (isinstance(d, ast.Name) and d.id == "register_node")
+            or (isinstance(d, ast.Attribute) and d.attr == "register_node")
+            for d in node.decorator_list
+        )
+        if not (name == only if only is not None else decorated):
+            continue
+        found = attrs(name)
+        if not isinstance(found.get("TYPE_NAME"), str):
+            raise OpaqueModuleError(f"{module}.{name} has no literal TYPE_NAME")
+        infos.append(
+            NodeInfo(
+                module=module,
+                cls=name,
+                **{_METADATA[k]: v for k, v in found.items()},
+            )
+        )
+    return infos
+
+
+def _sources(
+    paths: Iterable[str | os.PathLike[str]], use_entry_points: bool
+) -> Iterator[Tuple[str, Path, Optional[str]]]:
+    """(module, file, class or None) of every place node types may be defined."""
+    builtin = Path(__file__).resolve().parent.parent / "nodes"
+    for f in sorted(builtin.glob("*.py")):
+        if f.stem != "__init__":
+            yield f"nodes.{f.stem}", f, None
+    for d in paths:
+        d = Path(d).resolve()
+        if str(d) not in sys.path:
+            sys.path.append(str(d))
+        for f in sorted(d.glob("*.py")):
+            yield f.stem, f, None
+    if use_entry_points:
+        for ep in entry_points(group=ENTRY_POINT_GROUP):
+            module, _, cls = ep.value.partition(":")
+            spec = importlib.util.find_spec(module.strip())
+            if spec is None or spec.origin is None:
+                logger.warning("Node plugin %s: module %s not found", ep.name, module)
+                continue
+            yield module.strip(), Path(spec.origin), cls.strip() or None
+
+
+class Manifest:
+    """On-disk cache of scanned node metadata, keyed by module.
+
+    An entry is reused while the content hash of its file matches, so a manifest
+    built ahead of time (``python -m core.plugins``) stays valid wherever the code
+    is deployed and only changed files are re-scanned.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = Path(path)
+        self.modules: Dict[str, Dict[str, Any]] = {}
+        self.dirty = False
+        try:
+            doc = json.loads(self.path.read_text("utf-8"))
+            if doc.get("version") == MANIFEST_VERSION:
+                self.modules = doc["modules"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def nodes(self, module: str, file: Path, only: str | None = None) -> List[NodeInfo]:
+        data = file.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        entry = self.modules.get(module)
+        if entry is None or entry.get("sha256") != digest or entry.get("only") != only:
+            try:
+                infos = [asdict(i) for i in scan_source(data.decode("utf-8"), module, only)]
+            except OpaqueModuleError as exc:
+                logger.info("%s; importing %s to register its nodes", exc, module)
+                infos = None
+            entry = self.modules[module] = {"sha256": digest, "only": only, "nodes": infos}
+            self.dirty = True
+        if entry["nodes"] is None:
+            importlib.import_module(module)
+            return []
+        return [NodeInfo(**n) for n in entry["nodes"]]
+
+    def save(self) -> None:
+        doc = {"version": MANIFEST_VERSION, "modules": self.modules}
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        try:
+            tmp.write_text(json.dumps(doc, indent=1, sort_keys=True) + "\n", encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError as exc:
+            logger.debug("Node manifest %s not saved: %s", self.path, exc)
+            return
+        self.dirty = False
+
+
+def default_manifest() -> Path:
+    env = os.environ.get("AGENTFLOW_NODE_MANIFEST")
+    return Path(env) if env else Path(__file__).resolve().parent.parent / "nodes" / "manifest.json"
+
+
+def discover(
+    registry: NodeRegistry = REGISTRY,
+    *,
+    paths: Iterable[str | os.PathLike[str]] | None = None,
+    manifest: str | os.PathLike[str] | None = None,
+    use_entry_points: bool = True,
+) -> List[NodeInfo]:
+    """Register node types lazily from the built-in ``nodes`` package, plugin
+    directories (``paths``, default ``$AGENTFLOW_NODE_PATH``) and the
+    ``agentflow.nodes`` entry points, without importing any of them.
+
+    Metadata comes from the manifest, refreshed (and re-saved when writable) for
+    files that changed.
+    """
+    if paths is None:
+        paths = [p for p in os.environ.get("AGENTFLOW_NODE_PATH", "").split(os.pathsep) if p]
+    cache = Manifest(manifest or default_manifest())
+    found: List[NodeInfo] = []
+    for module, file, only in _sources(paths, use_entry_points):
+        try:
+            infos = cache.nodes(module, file, only)
+        except (OSError, SyntaxError, UnicodeDecodeError) as exc:
+            logger.warning("Skipping node module %s: %s", module, exc)
+            continue
+        for info in infos:
+            registry.register_lazy(info)
+        found.extend(infos)
+    if cache.dirty:
+        cache.save()
+    return found
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Rebuild the node manifest: ``python -m core.plugins [--manifest PATH] [DIR ...]``."""
+    parser = argparse.ArgumentParser(description="Rebuild the AgentFlow node manifest.")
+    parser.add_argument("paths", nargs="*", help="plugin directories to scan")
+    parser.add_argument("--manifest", type=Path, default=None)
+    args = parser.parse_args(argv)
+    path = args.manifest or default_manifest()
+    path.unlink(missing_ok=True)
+    infos = discover(NodeRegistry(), paths=args.paths or None, manifest=path)
+    print(f"{path}: {len(infos)} node types")  # noqa: T201
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
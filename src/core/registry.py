@@ -1,25 +1,88 @@
 from __future__ import annotations
 
-from typing import Dict, Iterable, Type
+import importlib
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Type
 from .node import Node
 
 
+@dataclass(frozen=True)
+class NodeInfo:
+    """Metadata of a node type, known without importing the module that defines it."""
+    type: str
+    module: str
+    cls: str
+    inputs: Dict[str, str] = field(default_factory=dict)
+    outputs: Dict[str, str] = field(default_factory=dict)
+    params: Dict[str, str] = field(default_factory=dict)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "type": self.type, "inputs": self.inputs, "outputs": self.outputs,
+            "params": self.params,
+        }
+
+
 class NodeRegistry:
-    """Global pluggable node registry."""
+    """Global pluggable node registry.
+
+    Types are registered either as classes (``register``) or lazily by name
+    (``register_lazy``, see core.plugins); a lazy type's module is imported the
+    first time ``get`` asks for it.
+    """
 
     def __init__(self) -> None:
         self._types: Dict[str, Type[Node]] = {}
+        self._lazy: Dict[str, NodeInfo] = {}
+        self._described: Optional[List[Dict[str, Any]]] = None
+        self._lock = threading.Lock()
 
     def register(self, cls: Type[Node]) -> None:
         self._types[cls.TYPE_NAME] = cls
+        self._described = None
+
+    def register_lazy(self, info: NodeInfo) -> None:
+        if info.type not in self._types:
+            self._lazy[info.type] = info
+            self._described = None
 
     def get(self, type_name: str) -> Type[Node]:
-        if type_name not in self._types:
+        cls = self._types.get(type_name)
+        if cls is not None:
+            return cls
+        info = self._lazy.get(type_name)
+        if info is None:
             raise KeyError(f"Unknown node type: {type_name}")
-        return self._types[type_name]
+        module = importlib.import_module(info.module)  # registers its classes
+        with self._lock:
+            cls = self._types.get(type_name)
+            if cls is None:
+                cls = getattr(module, info.cls)
+                self._types[type_name] = cls
+        return cls
 
     def list_types(self) -> Iterable[str]:
-        return sorted(self._types.keys())
+        return sorted(self._types.keys() | self._lazy.keys())
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """Ports and params of every type, sorted by name; imports nothing."""
+        described = self._described
+        if described is None:
+            described = []
+            for t in self.list_types():
+                cls = self._types.get(t)
+                if cls is None:
+                    described.append(self._lazy[t].describe())
+                else:
+                    described.append({
+                        "type": t,
+                        "inputs": dict(getattr(cls, "INPUTS", {})),
+                        "outputs": dict(getattr(cls, "OUTPUTS", {})),
+                        "params": dict(getattr(cls, "PARAMS", {})),
+                    })
+            self._described = described
+        return described
 
 
 REGISTRY = NodeRegistry()
@@ -1,10 +1,21 @@
 from __future__ import annotations
 
+import argparse
 import json
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
 from pathlib import Path
-from typing import Any, Dict
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 IR_VERSION = "0.1.0"
+CANONICAL_VERSION = "0.2.0"  # GraphModel's format, run by the engine and served by the API
+BINARY_MAGIC = b"AFIR"
+BINARY_VERSION = 1
+BINARY_SUFFIX = ".afir"
+FORMATS = ("json", "stream", "binary")
 
 
 def new_ir() -> Dict[str, Any]:
@@ -17,6 +28,9 @@ def new_ir() -> Dict[str, Any]:
 
 def load_ir(path: str | Path) -> Dict[str, Any]:
     p = Path(path)
+    if _is_binary(p):
+        with open_ir(p) as doc:
+            return _materialize(doc)
     data = json.loads(p.read_text(encoding="utf-8"))
     if "graph" not in data or not isinstance(data["graph"], dict):
         raise ValueError("Invalid IR: missing 'graph' object.")
@@ -29,10 +43,26 @@ def load_ir(path: str | Path) -> Dict[str, Any]:
     return data
 
 
-def save_ir(ir: Dict[str, Any], path: str | Path) -> None:
+def save_ir(ir: Dict[str, Any] | IRDocument, path: str | Path, fmt: str = "json") -> None:
+    """Write ``ir`` as indented JSON, as ``stream`` JSON (one node or edge per line,
+    written incrementally) or as the mmap-able ``binary`` format."""
+    if isinstance(ir, IRDocument):
+        ir = ir.to_ir()
     p = Path(path)
     p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text(json.dumps(ir, indent=2), encoding="utf-8")
+    if fmt == "json":
+        p.write_text(json.dumps(_materialize(ir), indent=2), encoding="utf-8")
+    elif fmt == "stream":
+        with p.open("w", encoding="utf-8") as f:
+            write_ir_stream(ir, f)
+    elif fmt == "binary":
+        with p.open("wb") as f:
+            w = _BinaryWriter(f)
+            for event in _events(ir):
+                w.feed(*event)
+            w.close()
+    else:
+        raise ValueError(f"Unknown IR format {fmt!r} (expected one of {FORMATS})")
 
 
 def add_node(ir: Dict[str, Any], node_id: str, kind: str) -> None:
@@ -69,7 +99,9 @@ def add_data_edge(
     )
 
 
-def describe(ir: Dict[str, Any]) -> str:
+def describe(ir: Dict[str, Any] | IRDocument) -> str:
+    if isinstance(ir, IRDocument):
+        ir = ir.to_ir()
     g = ir["graph"]
     nodes = g["nodes"]
     exec_edges = g["edges"]["exec"]
@@ -80,3 +112,787 @@ def describe(ir: Dict[str, Any]) -> str:
         f"Exec edges: {len(exec_edges)}\n"
         f"Data edges: {len(data_edges)}"
     )
+
+
+def ir_version(doc: Mapping[str, Any]) -> str:
+    """Format of a graph document: "0.1" (this module's IR) or "0.2" (GraphModel)."""
+    version = str(doc.get("version", ""))
+    if version.startswith("0.1") or ("graph" in doc and "nodes" not in doc):
+        return "0.1"
+    if version.startswith("0.2") or "nodes" in doc:
+        return "0.2"
+    raise ValueError(f"Unsupported graph format version: {version or 'unknown'}")
+
+
+def canonicalize(doc: Mapping[str, Any]) -> Dict[str, Any]:
+    """Upgrade a graph document of any supported version to the canonical 0.2 form.
+
+    0.1 ``kind`` becomes ``type`` and ``from``/``to`` edges become ``src``/``dst``
+    (exec edge ports are implied in 0.2). IR ``outputs`` declarations have no 0.2
+    counterpart and are dropped. 0.2 documents are returned unchanged.
+    """
+    if ir_version(doc) == "0.2":
+        return dict(doc)
+    try:
+        g = doc["graph"]
+        nodes = []
+        for n in g.get("nodes", []):
+            node = {
+                "id": n["id"],
+                "type": n["kind"],
+                "params": dict(n.get("params") or {}),
+                "inputs": dict(n.get("inputs") or {}),
+            }
+            for key in ("position", "cache"):
+                if key in n:
+                    node[key] = n[key]
+            nodes.append(node)
+        edges = g.get("edges", {})
+        data = [{"src": list(e["from"]), "dst": list(e["to"])} for e in edges.get("data", [])]
+        exec_ = [{"src": e["from"][0], "dst": e["to"][0]} for e in edges.get("exec", [])]
+    except (KeyError, IndexError, TypeError, AttributeError) as exc:
+        raise ValueError(f"Invalid IR document: missing or malformed {exc}") from exc
+    return {
+        "version": CANONICAL_VERSION,
+        "meta": dict(doc.get("meta") or {}),
+        "nodes": nodes,
+        "edges": {"data": data, "exec": exec_},
+    }
+
+
+_EdgeKey = Tuple[str, str, str, str]  # (from node, from port, to node, to port)
+
+
+def _edge_key(e: Dict[str, Any]) -> _EdgeKey:
+    return e["from"][0], e["from"][1], e["to"][0], e["to"][1]
+
+
+class IRDocument:
+    """An IR document with id and edge indexes, for scripted edits of large flows.
+
+    Nodes and edges live in insertion-ordered dicts keyed by node id and by
+    ``(from node, from port, to node, to port)``, plus a node -> edges index, so
+    adding, removing and looking up nodes or edges is O(1) (removing a node is
+    O(its edges)) and duplicate edges are rejected. ``to_ir()`` returns the plain
+    document, equal to the one loaded when it had no duplicate edges.
+    """
+
+    def __init__(self, ir: Dict[str, Any] | None = None) -> None:
+        ir = ir if ir is not None else new_ir()
+        g = ir["graph"]
+        self._top = {k: v for k, v in ir.items() if k != "graph"}
+        self._graph_extra = {k: v for k, v in g.items() if k not in ("nodes", "edges")}
+        self._edges_extra = {k: v for k, v in g["edges"].items() if k not in ("exec", "data")}
+        self._nodes: Dict[str, Dict[str, Any]] = {}
+        self._exec: Dict[_EdgeKey, Dict[str, Any]] = {}
+        self._data: Dict[_EdgeKey, Dict[str, Any]] = {}
+        self._links: Dict[str, Set[Tuple[str, _EdgeKey]]] = {}
+        for n in g["nodes"]:
+            if n["id"] in self._nodes:
+                raise ValueError(f"Node id already exists: {n['id']}")
+            self._nodes[n["id"]] = n
+        for kind, table in (("exec", self._exec), ("data", self._data)):
+            for e in g["edges"][kind]:
+                key = _edge_key(e)
+                table[key] = e
+                self._link(kind, key)
+
+    @classmethod
+    def load(cls, path: str | Path) -> IRDocument:
+        return cls(load_ir(path))
+
+    def save(self, path: str | Path) -> None:
+        save_ir(self, path)
+
+    def to_ir(self) -> Dict[str, Any]:
+        return {
+            **self._top,
+            "graph": {
+                **self._graph_extra,
+                "nodes": list(self._nodes.values()),
+                "edges": {
+                    **self._edges_extra,
+                    "exec": list(self._exec.values()),
+                    "data": list(self._data.values()),
+                },
+            },
+        }
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __contains__(self, node_id: object) -> bool:
+        return node_id in self._nodes
+
+    def node(self, node_id: str) -> Dict[str, Any]:
+        try:
+            return self._nodes[node_id]
+        except KeyError:
+            raise KeyError(f"Unknown node: {node_id}") from None
+
+    def nodes(self) -> List[Dict[str, Any]]:
+        return list(self._nodes.values())
+
+    def exec_edges(self) -> List[Dict[str, Any]]:
+        return list(self._exec.values())
+
+    def data_edges(self) -> List[Dict[str, Any]]:
+        return list(self._data.values())
+
+    def edges_of(self, node_id: str) -> List[Dict[str, Any]]:
+        """Exec and data edges touching ``node_id``."""
+        tables = {"exec": self._exec, "data": self._data}
+        return [tables[kind][key] for kind, key in self._links.get(node_id, ())]
+
+    def add_node(self, node_id: str, kind: str) -> None:
+        self.add_nodes([(node_id, kind)])
+
+    def add_nodes(self, items: Iterable[Tuple[str, str]]) -> None:
+        """Add ``(id, kind)`` pairs; nothing is added if any id is taken."""
+        items = list(items)
+        seen: Set[str] = set()
+        for node_id, _ in items:
+            if node_id in self._nodes or node_id in seen:
+                raise ValueError(f"Node id already exists: {node_id}")
+            seen.add(node_id)
+        for node_id, kind in items:
+            self._nodes[node_id] = {"id": node_id, "kind": kind, "inputs": {}, "outputs": {}}
+
+    def remove_node(self, node_id: str) -> None:
+        self.remove_nodes([node_id])
+
+    def remove_nodes(self, node_ids: Iterable[str]) -> None:
+        """Remove nodes and their edges. Unknown ids are ignored, as in ``remove_node``."""
+        tables = {"exec": self._exec, "data": self._data}
+        for node_id in node_ids:
+            if self._nodes.pop(node_id, None) is None:
+                continue
+            for kind, key in self._links.pop(node_id, ()):
+                tables[kind].pop(key, None)
+                other = key[2] if key[0] == node_id else key[0]
+                if other in self._links:
+                    self._links[other].discard((kind, key))
+
+    def add_exec_edge(self, src_node: str, dst_node: str) -> None:
+        self.add_exec_edges([(src_node, dst_node)])
+
+    def add_exec_edges(self, pairs: Iterable[Tuple[str, str]]) -> None:
+        """Add ``(src, dst)`` exec edges; nothing is added if any is invalid or present."""
+        self._add_edges("exec", [(src, "out", dst, "exec") for src, dst in pairs])
+
+    def add_data_edge(self, src_node: str, src_port: str, dst_node: str, dst_port: str) -> None:
+        self.add_data_edges([(src_node, src_port, dst_node, dst_port)])
+
+    def add_data_edges(self, edges: Iterable[_EdgeKey]) -> None:
+        """Add ``(src, src port, dst, dst port)`` data edges, all or nothing."""
+        self._add_edges("data", list(edges))
+
+    def remove_exec_edge(self, src_node: str, dst_node: str) -> None:
+        self._remove_edge("exec", (src_node, "out", dst_node, "exec"))
+
+    def remove_data_edge(
+        self, src_node: str, src_port: str, dst_node: str, dst_port: str
+    ) -> None:
+        self._remove_edge("data", (src_node, src_port, dst_node, dst_port))
+
+    def _add_edges(self, kind: str, keys: List[_EdgeKey]) -> None:
+        table = self._exec if kind == "exec" else self._data
+        seen: Set[_EdgeKey] = set()
+        for key in keys:
+            for node_id in (key[0], key[2]):
+                if node_id not in self._nodes:
+                    raise ValueError(f"Unknown node: {node_id}")
+            if key in table or key in seen:
+                raise ValueError(f"{kind.capitalize()} edge already exists: {_fmt(key)}")
+            seen.add(key)
+        for key in keys:
+            table[key] = {"from": [key[0], key[1]], "to": [key[2], key[3]]}
+            self._link(kind, key)
+
+    def _remove_edge(self, kind: str, key: _EdgeKey) -> None:
+        table = self._exec if kind == "exec" else self._data
+        if table.pop(key, None) is None:
+            raise ValueError(f"No such {kind} edge: {_fmt(key)}")
+        for node_id in (key[0], key[2]):
+            if node_id in self._links:
+                self._links[node_id].discard((kind, key))
+
+    def _link(self, kind: str, key: _EdgeKey) -> None:
+        self._links.setdefault(key[0], set()).add((kind, key))
+        self._links.setdefault(key[2], set()).add((kind, key))
+
+
+def _fmt(key: _EdgeKey) -> str:
+    return f"{key[0]}:{key[1]} -> {key[2]}:{key[3]}"
+
+
+# Streaming and binary formats.
+#
+# Readers and writers exchange (section, key, value) events in document order:
+# ("top", key, value) and ("graph", key, value) for plain entries of the document
+# and of its "graph" object, ("edges", key, value) for unknown edge lists, and
+# ("node", None, node), ("exec", None, edge), ("data", None, edge) per item. An
+# empty node or edge list comes as a plain entry, ("graph", "nodes", []) or
+# ("edges", kind, []), so writers can keep every key in its place.
+
+_DECODER = json.JSONDecoder()
+_WS = " \t\n\r"
+
+
+class _JsonScanner:
+    """Pull-style tokenizer over a text file that decodes one JSON value at a time."""
+
+    def __init__(self, fp: IO[str], chunk: int = 1 << 16) -> None:
+        self._fp = fp
+        self._chunk = chunk
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size: int) -> bool:
+        data = self._fp.read(size)
+        if not data:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            buf, pos = self._buf, self._pos
+            while pos < len(buf) and buf[pos] in _WS:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill(self._chunk):
+                return ""
+
+    def expect(self, ch: str) -> None:
+        got = self.peek()
+        if got != ch:
+            raise ValueError(f"Invalid IR JSON: expected {ch!r}, got {got or 'end of file'!r}")
+        self._pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        size = self._chunk
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._eof or not self._fill(size):
+                    raise
+                size *= 2  # a large value: grow reads instead of retrying per chunk
+                continue
+            if end == len(self._buf) and not self._eof and self._fill(size):
+                continue  # a number may continue in the next chunk
+            self._pos = end
+            return value
+
+    def members(self) -> Iterator[str]:
+        """Keys of an object; the caller consumes each value before resuming."""
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            sep = self.peek()
+            self._pos += 1
+            if sep == "}":
+                return
+            if sep != ",":
+                raise ValueError(f"Invalid IR JSON: expected ',' or '}}', got {sep!r}")
+
+    def items(self) -> Iterator[Any]:
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            sep = self.peek()
+            self._pos += 1
+            if sep == "]":
+                return
+            if sep != ",":
+                raise ValueError(f"Invalid IR JSON: expected ',' or ']', got {sep!r}")
+
+
+def _scan_json(fp: IO[str]) -> Iterator[Tuple[str, Optional[str], Any]]:
+    sc = _JsonScanner(fp)
+    for key in sc.members():
+        if key != "graph":
+            yield "top", key, sc.value()
+            continue
+        for gkey in sc.members():
+            if gkey == "nodes":
+                empty = True
+                for node in sc.items():
+                    empty = False
+                    yield "node", None, node
+                if empty:
+                    yield "graph", gkey, []
+            elif gkey == "edges":
+                for ekey in sc.members():
+                    if ekey in ("exec", "data"):
+                        empty = True
+                        for edge in sc.items():
+                            empty = False
+                            yield ekey, None, edge
+                        if empty:
+                            yield "edges", ekey, []
+                    else:
+                        yield "edges", ekey, sc.value()
+            else:
+                yield "graph", gkey, sc.value()
+
+
+def _events(ir: Dict[str, Any]) -> Iterator[Tuple[str, Optional[str], Any]]:
+    for key, value in ir.items():
+        if key != "graph":
+            yield "top", key, value
+            continue
+        for gkey, gvalue in value.items():
+            if gkey == "nodes":
+                for node in gvalue:
+                    yield "node", None, node
+                if not len(gvalue):
+                    yield "graph", gkey, []
+            elif gkey == "edges":
+                for ekey, items in gvalue.items():
+                    if ekey in ("exec", "data"):
+                        for edge in items:
+                            yield ekey, None, edge
+                        if not len(items):
+                            yield "edges", ekey, []
+                    else:
+                        yield "edges", ekey, items
+            else:
+                yield "graph", gkey, gvalue
+
+
+def iter_ir(path: str | Path) -> Iterator[Tuple[str, Optional[str], Any]]:
+    """Stream the entries of an IR file (JSON or binary) without loading it whole."""
+    p = Path(path)
+    if _is_binary(p):
+        with open_ir(p) as doc:
+            yield from _events(doc)
+        return
+    with p.open("r", encoding="utf-8") as f:
+        yield from _scan_json(f)
+
+
+def write_ir_stream(ir: Dict[str, Any], fp: IO[str]) -> None:
+    """Write compact JSON, one node or edge per line, without building the whole text.
+
+    ``ir`` may be a lazy document from ``open_ir``; nodes are materialized one at a time.
+    """
+    dump = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+    def items(values: Iterable[Any]) -> None:
+        fp.write("[")
+        sep = "\n"
+        for v in values:
+            fp.write(sep)
+            fp.write(dump(dict(v)))
+            sep = ",\n"
+        fp.write("\n]")
+
+    def members(obj: Mapping[str, Any], path: str = "") -> None:
+        fp.write("{")
+        for i, (key, value) in enumerate(obj.items()):
+            fp.write(f"{',' if i else ''}{dump(key)}:")
+            sub = f"{path}/{key}"
+            if sub in ("/graph", "/graph/edges"):
+                members(value, sub)
+            elif sub in ("/graph/nodes", "/graph/edges/exec", "/graph/edges/data"):
+                items(value)
+            else:
+                fp.write(dump(value))
+        fp.write("}")
+
+    members(ir)
+    fp.write("\n")
+
+
+# Binary layout (little-endian), sections padded to 8 bytes:
+#   "AFIR" u16 version u16 reserved
+#   node payloads: compact JSON of each node without "id"/"kind"
+#   node columns: id u32[n], kind u32[n] (0xFFFFFFFF = absent), payload offset u64[n],
+#                 payload length u32[n]
+#   exec edges, data edges: (from node, from port, to node, to port) u32[4 * m]
+#   string table: offsets u64[s + 1], then UTF-8 bytes
+#   header: JSON with the document's other entries and extra edge keys
+#   footer: u64 nodes, n, exec, n_exec, data, n_data, strings, n_strings, header,
+#           header_len, then "AFIR"
+
+_FOOTER = struct.Struct("<10Q4s")
+_NO_KIND = 0xFFFFFFFF
+
+
+def _is_binary(path: Path) -> bool:
+    with path.open("rb") as f:
+        return f.read(4) == BINARY_MAGIC
+
+
+def _le(a: array) -> bytes:
+    if sys.byteorder != "little":
+        a = array(a.typecode, a)
+        a.byteswap()
+    return a.tobytes()
+
+
+class _BinaryWriter:
+    def __init__(self, fp: IO[bytes]) -> None:
+        self._fp = fp
+        self._off = 0
+        self._strings: Dict[str, int] = {}
+        self._ids = array("I")
+        self._kinds = array("I")
+        self._payload_off = array("Q")
+        self._payload_len = array("I")
+        self._edges = {"exec": array("I"), "data": array("I")}
+        self._header: Dict[str, Any] = {
+            "top": {}, "graph": {}, "edges": {}, "edge_extra": {"exec": {}, "data": {}},
+        }
+        self._write(BINARY_MAGIC + struct.pack("<HH", BINARY_VERSION, 0))
+
+    def _write(self, data: bytes) -> None:
+        self._fp.write(data)
+        self._off += len(data)
+
+    def _pad(self) -> int:
+        self._write(b"\0" * (-self._off % 8))
+        return self._off
+
+    def _str(self, s: str) -> int:
+        i = self._strings.get(s)
+        if i is None:
+            i = self._strings[s] = len(self._strings)
+        return i
+
+    def feed(self, section: str, key: Optional[str], value: Any) -> None:
+        h = self._header
+        if section == "node":
+            rest = {k: v for k, v in value.items() if k not in ("id", "kind")}
+            blob = json.dumps(rest, separators=(",", ":"), ensure_ascii=False) if rest else ""
+            data = blob.encode("utf-8")
+            self._ids.append(self._str(value["id"]))
+            self._kinds.append(self._str(value["kind"]) if "kind" in value else _NO_KIND)
+            self._payload_off.append(self._off)
+            self._payload_len.append(len(data))
+            self._write(data)
+        elif section in ("exec", "data"):
+            edges = self._edges[section]
+            (a, ap), (b, bp) = value["from"], value["to"]
+            edges.extend((self._str(a), self._str(ap), self._str(b), self._str(bp)))
+            extra = {k: v for k, v in value.items() if k not in ("from", "to")}
+            if extra:
+                h["edge_extra"][section][str(len(edges) // 4 - 1)] = extra
+        else:
+            h[section][key] = value
+        # None placeholders record where nodes/edges sat, to restore the key order
+        if section != "top":
+            h["top"].setdefault("graph", None)
+        if section == "node":
+            h["graph"].setdefault("nodes", None)
+        elif section in ("exec", "data", "edges"):
+            h["graph"].setdefault("edges", None)
+        if section in ("exec", "data"):
+            h["edges"].setdefault(section, None)
+
+    def close(self) -> None:
+        n, n_exec, n_data = len(self._ids), len(self._edges["exec"]), len(self._edges["data"])
+        nodes = self._pad()
+        for col in (self._ids, self._kinds, self._payload_off, self._payload_len):
+            self._write(_le(col))
+            self._pad()
+        sections = []
+        for kind in ("exec", "data"):
+            sections.append(self._pad())
+            self._write(_le(self._edges[kind]))
+        strings = self._pad()
+        blobs = [s.encode("utf-8") for s in self._strings]
+        offsets = array("Q", [0])
+        for b in blobs:
+            offsets.append(offsets[-1] + len(b))
+        self._write(_le(offsets))
+        self._write(b"".join(blobs))
+        header = self._pad()
+        blob = json.dumps(self._header, separators=(",", ":"), ensure_ascii=False).encode()
+        self._write(blob)
+        self._write(_FOOTER.pack(
+            nodes, n, sections[0], n_exec // 4, sections[1], n_data // 4,
+            strings, len(blobs), header, len(blob), BINARY_MAGIC,
+        ))
+
+
+class _BinaryIR:
+    """Column views over a memory-mapped binary IR file."""
+
+    def __init__(self, path: Path) -> None:
+        with path.open("rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        mm = self.mm
+        if len(mm) < 8 + _FOOTER.size or mm[:4] != BINARY_MAGIC:
+            raise ValueError(f"Not a binary IR file: {path}")
+        (version,) = struct.unpack_from("<H", mm, 4)
+        if version != BINARY_VERSION:
+            raise ValueError(f"Unsupported binary IR version {version}: {path}")
+        (nodes, n, exec_, n_exec, data, n_data, strings, n_strings, header, header_len,
+         magic) = _FOOTER.unpack_from(mm, len(mm) - _FOOTER.size)
+        if magic != BINARY_MAGIC:
+            raise ValueError(f"Truncated binary IR file: {path}")
+        self.n = n
+        self.ids = self._col(nodes, "I", n)
+        nodes += -(-4 * n // 8) * 8
+        self.kinds = self._col(nodes, "I", n)
+        nodes += -(-4 * n // 8) * 8
+        self.payload_off = self._col(nodes, "Q", n)
+        nodes += 8 * n
+        self.payload_len = self._col(nodes, "I", n)
+        self.exec = self._col(exec_, "I", 4 * n_exec)
+        self.data = self._col(data, "I", 4 * n_data)
+        self.str_off = self._col(strings, "Q", n_strings + 1)
+        self.str_base = strings + 8 * (n_strings + 1)
+        self._strings: List[Optional[str]] = [None] * n_strings
+        self.header = json.loads(mm[header:header + header_len])
+
+    def close(self) -> None:
+        """Unmap the file, releasing the column views first."""
+        cols = (
+            self.ids, self.kinds, self.payload_off, self.payload_len, self.exec, self.data,
+            self.str_off,
+        )
+        for col in cols:
+            if isinstance(col, memoryview):
+                col.release()
+        self.mm.close()
+
+    def _col(self, off: int, code: str, count: int) -> Sequence[int]:
+        size = array(code).itemsize
+        view = memoryview(self.mm)[off:off + size * count]
+        if sys.byteorder == "little":
+            return view.cast(code)
+        a = array(code, view.tobytes())
+        a.byteswap()
+        return a
+
+    def string(self, i: int) -> str:
+        s = self._strings[i]
+        if s is None:
+            a, b = self.str_base + self.str_off[i], self.str_base + self.str_off[i + 1]
+            s = self._strings[i] = self.mm[a:b].decode("utf-8")
+        return s
+
+    def all_strings(self) -> List[str]:
+        mm, base, off = self.mm, self.str_base, self.str_off
+        return [
+            mm[base + off[i]:base + off[i + 1]].decode("utf-8") for i in range(len(self._strings))
+        ]
+
+    def all_nodes(self, strings: List[str]) -> List[Dict[str, Any]]:
+        """Every node as a dict, decoding all payloads in one pass."""
+        mm = self.mm
+        blobs = [
+            mm[o:o + n] if n else b"{}"
+            for o, n in zip(self.payload_off, self.payload_len, strict=True)
+        ]
+        payloads = json.loads(b"[" + b",".join(blobs) + b"]")
+        nodes = []
+        for i, k, rest in zip(self.ids, self.kinds, payloads, strict=True):
+            node = {"id": strings[i], "kind": strings[k]} if k != _NO_KIND else {"id": strings[i]}
+            node.update(rest)
+            nodes.append(node)
+        return nodes
+
+    def all_edges(self, kind: str, strings: List[str]) -> List[Dict[str, Any]]:
+        c = self.exec if kind == "exec" else self.data
+        s = strings
+        edges = [
+            {"from": [s[c[j]], s[c[j + 1]]], "to": [s[c[j + 2]], s[c[j + 3]]]}
+            for j in range(0, len(c), 4)
+        ]
+        for i, extra in self.header["edge_extra"][kind].items():
+            edges[int(i)].update(extra)
+        return edges
+
+    def node(self, i: int) -> Dict[str, Any]:
+        node = {"id": self.string(self.ids[i])}
+        if self.kinds[i] != _NO_KIND:
+            node["kind"] = self.string(self.kinds[i])
+        node.update(self.payload(i))
+        return node
+
+    def payload(self, i: int) -> Dict[str, Any]:
+        size = self.payload_len[i]
+        if not size:
+            return {}
+        off = self.payload_off[i]
+        result: Dict[str, Any] = json.loads(self.mm[off:off + size])
+        return result
+
+
+class LazyNode(Mapping[str, Any]):
+    """Read-only node of a binary IR file; fields besides id/kind are decoded on first use."""
+
+    __slots__ = ("_ir", "_i", "_rest")
+
+    def __init__(self, ir: _BinaryIR, i: int) -> None:
+        self._ir = ir
+        self._i = i
+        self._rest: Optional[Dict[str, Any]] = None
+
+    def _fields(self) -> Dict[str, Any]:
+        if self._rest is None:
+            self._rest = self._ir.payload(self._i)
+        return self._rest
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "id":
+            return self._ir.string(self._ir.ids[self._i])
+        if key == "kind" and self._ir.kinds[self._i] != _NO_KIND:
+            return self._ir.string(self._ir.kinds[self._i])
+        return self._fields()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield "id"
+        if self._ir.kinds[self._i] != _NO_KIND:
+            yield "kind"
+        yield from self._fields()
+
+    def __len__(self) -> int:
+        return 1 + (self._ir.kinds[self._i] != _NO_KIND) + len(self._fields())
+
+    def __repr__(self) -> str:
+        return f"LazyNode({self['id']!r})"
+
+
+class LazyNodes(Sequence[LazyNode]):
+    def __init__(self, ir: _BinaryIR) -> None:
+        self.ir = ir
+        self._nodes: List[Optional[LazyNode]] = [None] * ir.n
+
+    def __len__(self) -> int:
+        return self.ir.n
+
+    def __getitem__(self, i: Any) -> Any:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        node = self._nodes[i]
+        if node is None:
+            node = self._nodes[i] = LazyNode(self.ir, i % self.ir.n)
+        return node
+
+
+class LazyEdges(Sequence[Dict[str, Any]]):
+    def __init__(self, ir: _BinaryIR, kind: str) -> None:
+        self._ir = ir
+        self._cols = ir.exec if kind == "exec" else ir.data
+        self._extra = ir.header["edge_extra"][kind]
+
+    def __len__(self) -> int:
+        return len(self._cols) // 4
+
+    def __getitem__(self, i: Any) -> Any:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        i = range(len(self))[i]
+        c, s = self._cols, self._ir.string
+        edge = {"from": [s(c[4 * i]), s(c[4 * i + 1])], "to": [s(c[4 * i + 2]), s(c[4 * i + 3])]}
+        extra = self._extra.get(str(i))
+        return {**edge, **extra} if extra else edge
+
+
+class IRFile(Dict[str, Any]):
+    """An IR document returned by open_ir. ``close()``, or leaving a ``with`` block,
+    unmaps a binary file; its lazy nodes and edges cannot be read after that."""
+
+    def __init__(self, doc: Dict[str, Any], backing: Optional[_BinaryIR] = None) -> None:
+        super().__init__(doc)
+        self._backing = backing
+
+    def close(self) -> None:
+        if self._backing is not None:
+            self._backing.close()
+
+    def __enter__(self) -> IRFile:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def open_ir(path: str | Path) -> IRFile:
+    """An IR document, lazily backed by the file when it is in the binary format.
+
+    The binary file is memory-mapped: ``graph.nodes`` and the edge lists are
+    read-only sequences that decode entries on access, and node fields other than
+    id/kind are only parsed when touched. JSON files are loaded with ``load_ir``.
+    Close the document (or use it as a context manager) when done with it.
+    """
+    p = Path(path)
+    if not _is_binary(p):
+        return IRFile(load_ir(p))
+    b = _BinaryIR(p)
+    h = b.header
+    edges = {k: LazyEdges(b, k) if k in ("exec", "data") else v for k, v in h["edges"].items()}
+    edges.setdefault("exec", LazyEdges(b, "exec"))
+    edges.setdefault("data", LazyEdges(b, "data"))
+    graph = dict(h["graph"])
+    graph["nodes"] = LazyNodes(b)
+    graph["edges"] = edges
+    top = dict(h["top"])
+    top["graph"] = graph
+    top.setdefault("version", IR_VERSION)
+    return IRFile(top, b)
+
+
+def _materialize(ir: Dict[str, Any]) -> Dict[str, Any]:
+    """``ir`` with lazy node and edge sequences replaced by plain lists of dicts."""
+    g = ir["graph"]
+    if not isinstance(g.get("nodes"), LazyNodes):
+        return ir
+    b: _BinaryIR = g["nodes"].ir
+    strings = b.all_strings()
+    edges = {
+        k: b.all_edges(k, strings) if isinstance(v, LazyEdges) else v
+        for k, v in g["edges"].items()
+    }
+    graph = {**g, "nodes": b.all_nodes(strings), "edges": edges}
+    return {**ir, "graph": graph}
+
+
+def convert_ir(src: str | Path, dst: str | Path, fmt: Optional[str] = None) -> None:
+    """Convert between IR formats, streaming entries from ``src``.
+
+    ``fmt`` defaults to ``binary`` for a ``.afir`` destination, else ``stream``.
+    """
+    fmt = fmt or ("binary" if Path(dst).suffix == BINARY_SUFFIX else "stream")
+    if fmt == "binary":
+        with Path(dst).open("wb") as f:
+            w = _BinaryWriter(f)
+            for event in iter_ir(src):
+                w.feed(*event)
+            w.close()
+    else:
+        with open_ir(src) as doc:
+            save_ir(doc, dst, fmt)
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Convert AgentFlow IR files.")
+    parser.add_argument("src")
+    parser.add_argument("dst")
+    parser.add_argument("--format", choices=FORMATS, default=None)
+    args = parser.parse_args(argv)
+    convert_ir(args.src, args.dst, args.format)
+
+
+if __name__ == "__main__":
+    main()
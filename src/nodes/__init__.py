@@ -1 +1,3 @@
-from . import core
+from core.plugins import discover
+
+discover()
@@ -2,13 +2,16 @@ from __future__ import annotations
 
 from typing import Any, Mapping
 
-from src.core.node import Node, NodeContext
-from src.core.registry import register_node
+from core.node import Node, NodeContext
+from core.registry import register_node
 
 
 @register_node
 class AFConst(Node):
     TYPE_NAME = "AgentFlow/Const"
+    EXECUTOR = "inline"
+    SCOPE = "process"
+    CACHEABLE = True
     OUTPUTS = {"out": "any"}
     PARAMS = {"value": "any"}
 
@@ -19,6 +22,9 @@ class AFConst(Node):
 @register_node
 class AFConcat(Node):
     TYPE_NAME = "AgentFlow/Concat"
+    EXECUTOR = "inline"
+    SCOPE = "process"
+    CACHEABLE = True
     INPUTS = {"a": "string", "b": "string"}
     OUTPUTS = {"out": "string"}
 
@@ -31,6 +37,8 @@ class AFConcat(Node):
 @register_node
 class AFBranch(Node):
     TYPE_NAME = "AgentFlow/Branch"
+    EXECUTOR = "inline"
+    SCOPE = "process"
     INPUTS = {"value": "any"}
     PARAMS = {"bb_key": "string", "equals": "any"}
     OUTPUTS = {"out": "any"}  # pass-through
@@ -0,0 +1,599 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import importlib.util
+import inspect
+import json
+import logging
+import os
+import threading
+import types
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from core.blackboard import Blackboard
+from core.node import Node
+from runtime.engine import Engine, _await, _detached, _run_detached
+from runtime.loader import GraphPath
+from runtime.plan import ExecutionPlan, ScheduleMode
+from runtime.streams import OutputStream, StreamReader, is_stream
+from server.schemas import GraphModel
+
+logger = logging.getLogger(__name__)
+
+FORMAT = 1  # bump whenever the shape of the generated code changes
+
+
+def _sync(out: Any) -> Any:
+    """Drive an async node's result to completion (as Engine.run does)."""
+    return asyncio.run(_await(out)) if inspect.isawaitable(out) else out
+
+
+def _reader(value: Any) -> StreamReader:
+    if isinstance(value, OutputStream):
+        return value.reader()
+    return value if isinstance(value, StreamReader) else OutputStream.of(value).reader()
+
+
+_Emitter = Callable[[str, str, str], Callable[[int, Any], None]]
+
+
+def _drain(
+    out: Any, emit: _Emitter | None = None, run_id: str = "", node_id: str = ""
+) -> Tuple[Dict[str, Any], Dict[str, OutputStream]]:
+    """Pump the generator ports of ``out`` to the end. Returns the outputs with joined
+    values and the finished streams by port (for STREAM_INPUTS consumers);
+    ``emit(run_id, node_id, port)`` gives each stream's chunk callback."""
+    result = dict(out)
+    streams: Dict[str, OutputStream] = {}
+    for port, value in result.items():
+        if is_stream(value):
+            stream = streams[port] = OutputStream(emit(run_id, node_id, port) if emit else None)
+            stream.pump(value)
+            result[port] = stream.value()
+    return result, streams
+
+
+async def _adrain(
+    out: Any,
+    pool: Executor | None,
+    emit: _Emitter | None = None,
+    run_id: str = "",
+    node_id: str = "",
+) -> Tuple[Dict[str, Any], Dict[str, OutputStream]]:
+    """_drain for the event loop: awaits ``out`` if needed and pumps sync generators
+    on ``pool`` so they never block the loop (inline without one)."""
+    if inspect.isawaitable(out):
+        out = await out
+    result = dict(out)
+    streams: Dict[str, OutputStream] = {}
+    for port, value in result.items():
+        if is_stream(value):
+            stream = streams[port] = OutputStream(emit(run_id, node_id, port) if emit else None)
+            if inspect.isasyncgen(value):
+                await stream.apump(value)
+            elif pool is None:
+                stream.pump(value)
+            else:
+                await asyncio.get_running_loop().run_in_executor(pool, stream.pump, value)
+            result[port] = stream.value()
+    return result, streams
+
+
+async def _gather(*aws: Any) -> List[Any]:
+    """asyncio.gather that cancels the siblings of a failing node."""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def _levels(order: List[int], next_: Tuple[Tuple[int, ...], ...]) -> List[List[int]]:
+    """``order`` grouped into waves: every node runs one wave after its last predecessor."""
+    level: Dict[int, int] = dict.fromkeys(order, 0)
+    for i in order:
+        for j in next_[i]:
+            level[j] = max(level[j], level[i] + 1)
+    waves: List[List[int]] = [[] for _ in range(max(level.values(), default=-1) + 1)]
+    for i in order:
+        waves[level[i]].append(i)
+    return waves
+
+
+def generate(
+    plan: ExecutionPlan,
+    *,
+    mode: ScheduleMode = "exec",
+    targets: Iterable[str] | None = None,
+    parallel: bool = False,
+    hooks: bool = False,
+    awaiting: bool = False,
+) -> str:
+    """Source of a module whose ``bind(rt)`` returns a function running ``plan``.
+
+    The function calls every node's ``run`` in schedule order with its inputs
+    wired through local variables (``parallel``: an ``async def`` that gathers
+    each wave of independent nodes; ``awaiting``: an ``async def`` that runs them
+    one at a time and awaits async nodes on the calling loop). Node events and
+    journaling are called only when ``hooks`` is set. Params and defaults are
+    taken from the plan at bind time, so the source depends on the graph's shape
+    and node classes only.
+    """
+    targets = tuple(sorted(set(targets))) if targets is not None else None
+    awaiting = awaiting and not parallel
+    schedule = plan.schedule(mode, targets)
+    order = schedule.order()
+    nodes = plan.nodes
+    waves = _levels(order, schedule.next) if parallel else [[i] for i in order]
+    # a node runs in "detached" form when run_async would send it to a process pool
+    detached = {i for i in order if parallel and _detached(nodes[i].cls)}
+    per_run = [i for i in order if i not in detached and nodes[i].cls.SCOPE == "run"]
+    # producers whose streams a consumer reads chunk by chunk keep them (as r<i>)
+    streamed = {
+        src for i in order for dst, src, _ in nodes[i].bindings
+        if dst in nodes[i].cls.STREAM_INPUTS
+    }
+
+    head = [
+        f"# AgentFlow graph {plan.key!r}: mode={mode!r}, targets={targets!r},",
+        f"# {'parallel' if parallel else 'awaiting' if awaiting else 'sequential'},"
+        f" hooks={hooks}."
+        f" Generated by runtime.aot (format {FORMAT}); do not edit.",
+        "from core.node import NodeContext",
+        "from runtime.aot import _adrain, _drain, _gather, _reader, _sync",
+        "from runtime.streams import materialize",
+        "",
+        "",
+        "def bind(rt):",
+        "    services = rt.services",
+        "    P = rt.params",
+        "    D = rt.defaults",
+    ]
+    held = [i for i in order if i not in detached and i not in per_run]
+    if held:
+        head.append(f"    N = rt.instances({tuple(held)!r})")
+    if hooks:
+        head += [
+            "    S = rt.plan.nodes",
+            "    started = rt.started", "    finished = rt.finished", "    chunk = rt.chunk",
+        ]
+    if per_run:
+        head += ["    acquire = rt.acquire", "    release = rt.release"]
+    if parallel:
+        head += ["    threads = rt.threads"]
+    if detached:
+        head += [
+            "    C = rt.classes", "    processes = rt.processes", "    detached = rt.detached",
+            "    key = rt.plan.key",
+        ]
+
+    body: List[str] = []
+    done: set[int] = set()
+    for wave in waves:
+        calls: List[Tuple[int, str]] = []  # (index, awaitable expression) to gather
+        for i in wave:
+            spec = nodes[i]
+            body.append(f"# {spec.id!r} ({spec.type!r})")  # user strings only ever as repr()
+            node = f"n{i}" if i in per_run else f"N[{i}]"
+            if i in per_run:
+                body.append(f"n{i} = acquire({i}, leased)")
+            body.append(f"i{i} = dict(D[{i}])" if spec.defaults else f"i{i} = {{}}")
+            for dst, src, port in spec.bindings:
+                if src not in done:
+                    logger.warning(
+                        "Node %s: producer of input %r does not run before it; "
+                        "compiled with its default", spec.id, dst,
+                    )
+                    continue
+                value = f"o{src}[{port!r}]"
+                if dst in spec.cls.STREAM_INPUTS:
+                    value = f"r{src}.get({port!r}, {value})"
+                body += [f"if {port!r} in o{src}:", f"    i{i}[{dst!r}] = {value}"]
+            for port in sorted(spec.cls.STREAM_INPUTS):
+                body += [f"if {port!r} in i{i}:", f"    i{i}[{port!r}] = _reader(i{i}[{port!r}])"]
+            if hooks:
+                body.append(f"started(run_id, S[{i}])")
+            ctx = f"NodeContext(run_id, {spec.id!r}, services, bb)"
+            call = f"{node}.run({ctx}, i{i}, P[{i}])"
+            emit = f", chunk, run_id, {spec.id!r}" if hooks else ""
+            if awaiting:
+                body.append(f"o{i}, r{i} = await _adrain({call}, None{emit})")
+                if hooks:
+                    body.append(f"finished(run_id, S[{i}], o{i}, False)")
+            elif not parallel:
+                if inspect.iscoroutinefunction(spec.cls.run):
+                    call = f"_sync({call})"
+                if hooks or i in streamed:
+                    body.append(f"o{i}, r{i} = _drain({call}{emit})")
+                else:
+                    body.append(f"o{i} = materialize({call})")
+                if hooks:
+                    body.append(f"finished(run_id, S[{i}], o{i}, False)")
+            elif i in detached:
+                calls.append((i, (
+                    f"loop.run_in_executor(processes(), detached, C[{i}], key, run_id, "
+                    f"{spec.id!r}, i{i}, dict(P[{i}]))"
+                )))
+            elif inspect.iscoroutinefunction(spec.cls.run):
+                calls.append((i, call))
+            elif spec.cls.EXECUTOR == "inline":
+                body.append(f"o{i}, r{i} = await _adrain({call}, pool{emit})")
+            else:
+                calls.append((i, (
+                    f"loop.run_in_executor(pool, {node}.run, {ctx}, i{i}, P[{i}])"
+                )))
+        if len(calls) == 1:
+            body.append(f"o{calls[0][0]} = await {calls[0][1]}")
+        elif calls:
+            body.append(f"{', '.join(f'o{i}' for i, _ in calls)}, = await _gather(")
+            body += [f"    {expr}," for _, expr in calls]
+            body.append(")")
+        for i, _ in calls:
+            emit = f", chunk, run_id, {nodes[i].id!r}" if hooks else ""
+            body.append(f"o{i}, r{i} = await _adrain(o{i}, pool{emit})")
+        if parallel and hooks:
+            body += [f"finished(run_id, S[{i}], o{i}, False)" for i in wave]
+        done.update(wave)
+    body.append(
+        "return [" + ", ".join(f"o{i}" if i in done else "None" for i in range(len(nodes))) + "]"
+    )
+
+    # closure cells make CPython's compiler quadratic in their number, so node
+    # instances, params and defaults are indexed out of tuples instead
+    fn = ["", f"    {'async ' if parallel or awaiting else ''}def run(run_id, bb):"]
+    indent = "        "
+    if parallel:
+        fn += [indent + "loop = rt.loop()", indent + "pool = threads()"]
+    if per_run:
+        fn += [indent + "leased = []", indent + "ok = False", indent + "try:"]
+        fn += [indent + "    " + line for line in body[:-1]]
+        fn += [indent + "    ok = True", indent + "    " + body[-1]]
+        fn += [indent + "finally:", indent + "    release(leased, not ok)"]
+    else:
+        fn += [indent + line for line in body]
+    return "\n".join(head + fn + ["", "    return run", ""])
+
+
+class _Binder:
+    """The ``rt`` object a generated module's ``bind`` draws on; it records the
+    instances the bound function holds."""
+
+    def __init__(self, graph: AotGraph) -> None:
+        engine = graph.engine
+        plan = self.plan = graph.plan
+        self.services = engine._services
+        self.pool = engine.instances
+        self.params = tuple(n.params for n in plan.nodes)
+        self.defaults = tuple(n.defaults for n in plan.nodes)
+        self.classes = tuple(n.cls for n in plan.nodes)
+        self.owned: List[Tuple[int, Node]] = []
+        self.started = engine._node_started
+        self.finished = engine._node_finished
+        self.chunk = engine._chunk_emitter
+        self.threads = engine._thread_pool
+        self.processes = engine._process_pool
+        self.detached = _run_detached
+        self.loop = asyncio.get_running_loop
+
+    def instances(self, indices: Iterable[int]) -> List[Node | None]:
+        """Process- and graph-scope instances, held for as long as the bound function."""
+        held: List[Node | None] = [None] * len(self.plan.nodes)
+        for i in indices:
+            held[i] = self.acquire(i, self.owned)
+        return held
+
+    def acquire(self, i: int, leased: List[Tuple[int, Node]]) -> Node:
+        spec = self.plan.nodes[i]
+        node = self.pool.acquire(spec.cls, self.plan.key, spec.id)
+        leased.append((i, node))
+        return node
+
+    def release(self, leased: List[Tuple[int, Node]], discard: bool = False) -> None:
+        nodes = self.plan.nodes
+        for i, node in leased:
+            self.pool.release(nodes[i].cls, self.plan.key, nodes[i].id, node, discard=discard)
+        leased.clear()
+
+
+class AotGraph:
+    """A plan compiled to a Python module by AotCompiler.
+
+    ``run`` returns what Engine.run returns and uses the engine's services, node
+    instances and blackboards. It skips the result cache, sessions, profiling
+    and cancellation; node events and the run journal are only served by graphs
+    compiled with ``hooks``. Each concurrent run gets its own bound function (and
+    node instances); up to ``max_idle`` are kept warm.
+
+    ``run_async`` of a sequential graph runs its awaiting variant (compiled on
+    first use), so async nodes are awaited on the calling loop.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        plan: ExecutionPlan,
+        module: types.ModuleType,
+        *,
+        options: Dict[str, Any],
+        parallel: bool,
+        hooks: bool,
+        awaiting: bool = False,
+        compiler: AotCompiler | None = None,
+        source: str | None = None,
+        path: Path | None = None,
+        max_idle: int = 8,
+    ) -> None:
+        self.engine = engine
+        self.plan = plan
+        self.module = module
+        self.options = options
+        self.parallel = parallel
+        self.hooks = hooks
+        self.awaiting = awaiting
+        self._compiler = compiler
+        self._source = source
+        self.path = path
+        self._max_idle = max_idle
+        self._idle: List[Tuple[Callable[..., Any], _Binder]] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def source(self) -> str:
+        """The generated module's source."""
+        if self._source is None:
+            assert self.path is not None
+            self._source = self.path.read_text("utf-8")
+        return self._source
+
+    def run(
+        self, inputs: Dict[str, Any] | None = None, *, run_id: str | None = None
+    ) -> Dict[str, Any]:
+        if self.parallel or self.awaiting:
+            return asyncio.run(self.run_async(inputs, run_id=run_id))
+        run_id, bb = self._begin(inputs, run_id)
+        fn, binder = self._take()
+        ok = False
+        try:
+            outputs = fn(run_id, bb)
+            ok = True
+        finally:
+            self._give(fn, binder, ok)
+        return self._finish(run_id, bb, outputs)
+
+    async def run_async(
+        self, inputs: Dict[str, Any] | None = None, *, run_id: str | None = None
+    ) -> Dict[str, Any]:
+        """Like run(); a sequential graph runs on the calling loop, yielding only
+        while it awaits an async node."""
+        if not (self.parallel or self.awaiting):
+            return await self._awaiting().run_async(inputs, run_id=run_id)
+        run_id, bb = self._begin(inputs, run_id)
+        fn, binder = self._take()
+        ok = False
+        try:
+            outputs = await fn(run_id, bb)
+            ok = True
+        finally:
+            self._give(fn, binder, ok)
+        return self._finish(run_id, bb, outputs)
+
+    def _awaiting(self) -> AotGraph:
+        compiler = self._compiler or AotCompiler(self.engine)
+        targets = self.options["targets"]
+        return compiler.compile(
+            self.plan, mode=self.options["mode"], targets=targets, hooks=self.hooks,
+            awaiting=True,
+        )
+
+    def close(self) -> None:
+        """Return the node instances of idle bound functions to the engine's pool."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for _, binder in idle:
+            binder.release(binder.owned)
+
+    def _begin(self, inputs: Dict[str, Any] | None, run_id: str | None) -> Tuple[str, Blackboard]:
+        if self.hooks:
+            _, run_id, bb = self.engine._begin(self.plan, inputs, run_id, self.options)
+            return run_id, bb
+        run_id = run_id or str(uuid.uuid4())
+        return run_id, self.engine._run_board(self.plan, run_id, inputs)
+
+    def _finish(
+        self, run_id: str, bb: Blackboard, outputs: List[Dict[str, Any] | None]
+    ) -> Dict[str, Any]:
+        result = self.engine._finish(self.plan, run_id, bb, outputs)
+        if self.hooks and self.engine.journal is not None:
+            self.engine.journal.finish(run_id)
+        return result
+
+    def _take(self) -> Tuple[Callable[..., Any], _Binder]:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        binder = _Binder(self)
+        try:
+            return self.module.bind(binder), binder
+        except BaseException:
+            binder.release(binder.owned, discard=True)
+            raise
+
+    def _give(self, fn: Callable[..., Any], binder: _Binder, ok: bool) -> None:
+        if ok:
+            with self._lock:
+                if not self._closed and len(self._idle) < self._max_idle:
+                    self._idle.append((fn, binder))
+                    return
+        binder.release(binder.owned, discard=not ok)
+
+
+def _digest(
+    plan: ExecutionPlan,
+    mode: str,
+    targets: Tuple[str, ...] | None,
+    parallel: bool,
+    hooks: bool,
+    awaiting: bool = False,
+) -> str:
+    """Key of the generated module: the graph hash, the variant, and the node class
+    traits the generated code depends on."""
+    classes = sorted({
+        (
+            f"{n.cls.__module__}.{n.cls.__qualname__}",
+            inspect.iscoroutinefunction(n.cls.run),
+            n.cls.EXECUTOR,
+            n.cls.SCOPE,
+            tuple(sorted(n.cls.STREAM_INPUTS)),
+        )
+        for n in plan.nodes
+    }, key=repr)
+    blob = json.dumps([FORMAT, plan.key, mode, targets, parallel, hooks, awaiting, classes])
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class AotCompiler:
+    """Compiles graphs ahead of time into Python modules run by AotGraph.
+
+    Modules are kept per graph hash and variant (mode, targets, parallel, hooks):
+    the ``maxsize`` most recently used in memory and, with ``cache_dir``, as
+    ``<digest>.py`` files that later processes import instead of generating
+    (their bytecode is cached by the import system as usual).
+    """
+
+    def __init__(
+        self, engine: Engine, cache_dir: str | os.PathLike[str] | None = None, *, maxsize: int = 64
+    ) -> None:
+        self.engine = engine
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self._maxsize = maxsize
+        self._graphs: "OrderedDict[str, AotGraph]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compile(
+        self,
+        graph: GraphModel | ExecutionPlan | GraphPath,
+        *,
+        mode: ScheduleMode = "exec",
+        targets: Iterable[str] | None = None,
+        parallel: bool = False,
+        hooks: bool | None = None,
+        awaiting: bool = False,
+    ) -> AotGraph:
+        """The compiled form of ``graph``. ``hooks`` defaults to whether the engine's
+        bus has subscribers or the engine keeps a journal; ``awaiting`` selects the
+        async form of a sequential graph (see generate())."""
+        plan = self.engine.compile(graph)
+        if hooks is None:
+            hooks = self.engine._bus.active or self.engine.journal is not None
+        awaiting = awaiting and not parallel
+        key = tuple(sorted(set(targets))) if targets is not None else None
+        digest = _digest(plan, mode, key, parallel, hooks, awaiting)
+        with self._lock:
+            compiled = self._graphs.get(digest)
+            if compiled is not None:
+                self._graphs.move_to_end(digest)
+                return compiled
+
+        module, source, path = self._module(plan, digest, mode, key, parallel, hooks, awaiting)
+        options = {"mode": mode, "targets": list(key) if key is not None else None}
+        compiled = AotGraph(
+            self.engine, plan, module, options=options, parallel=parallel, hooks=hooks,
+            awaiting=awaiting, compiler=self, source=source, path=path,
+        )
+        evicted: List[AotGraph] = []
+        with self._lock:
+            old = self._graphs.get(digest)
+            self._graphs[digest] = compiled
+            self._graphs.move_to_end(digest)
+            while len(self._graphs) > self._maxsize:
+                evicted.append(self._graphs.popitem(last=False)[1])
+        for g in evicted + ([old] if old is not None else []):
+            g.close()
+        return compiled
+
+    def run(
+        self,
+        graph: GraphModel | ExecutionPlan | GraphPath,
+        *,
+        inputs: Dict[str, Any] | None = None,
+        run_id: str | None = None,
+        mode: ScheduleMode = "exec",
+        targets: Iterable[str] | None = None,
+        parallel: bool = False,
+    ) -> Dict[str, Any]:
+        return self.compile(graph, mode=mode, targets=targets, parallel=parallel).run(
+            inputs, run_id=run_id
+        )
+
+    async def run_async(
+        self,
+        graph: GraphModel | ExecutionPlan | GraphPath,
+        *,
+        inputs: Dict[str, Any] | None = None,
+        run_id: str | None = None,
+        mode: ScheduleMode = "exec",
+        targets: Iterable[str] | None = None,
+    ) -> Dict[str, Any]:
+        compiled = self.compile(graph, mode=mode, targets=targets, parallel=True)
+        return await compiled.run_async(inputs, run_id=run_id)
+
+    def close(self) -> None:
+        with self._lock:
+            graphs, self._graphs = list(self._graphs.values()), OrderedDict()
+        for g in graphs:
+            g.close()
+
+    def __len__(self) -> int:
+        return len(self._graphs)
+
+    def _module(
+        self,
+        plan: ExecutionPlan,
+        digest: str,
+        mode: ScheduleMode,
+        targets: Tuple[str, ...] | None,
+        parallel: bool,
+        hooks: bool,
+        awaiting: bool,
+    ) -> Tuple[types.ModuleType, str | None, Path | None]:
+        name = f"agentflow_aot_{digest[:16]}"
+        path = self.cache_dir / f"{digest}.py" if self.cache_dir is not None else None
+        if path is not None and path.exists():
+            try:
+                return _import(name, path), None, path
+            except Exception:
+                logger.warning("Compiled graph %s is unreadable; regenerating", path, exc_info=True)
+        source = generate(
+            plan, mode=mode, targets=targets, parallel=parallel, hooks=hooks, awaiting=awaiting
+        )
+        if path is not None:
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp.write_text(source, encoding="utf-8")
+                os.replace(tmp, path)
+                return _import(name, path), source, path
+            except OSError as exc:
+                logger.warning("Compiled graph not cached at %s: %s", path, exc)
+        module = types.ModuleType(name)
+        exec(compile(source, f"<agentflow-aot {digest[:16]}>", "exec"), module.__dict__)
+        return module, source, None
+
+
+def _import(name: str, path: Path) -> types.ModuleType:
+    spec = importlib.util.spec_from_file_location(name, path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Cannot import {path}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
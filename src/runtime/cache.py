@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    if isinstance(value, Mapping):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    raise TypeError(f"Value of type {type(value).__name__} has no stable hash")
+
+
+def cache_key(
+    type_name: str, params: Mapping[str, Any], inputs: Mapping[str, Any]
+) -> Optional[str]:
+    """Hash of (node type, params, resolved inputs), or None if a value is not hashable."""
+    try:
+        blob = json.dumps(
+            [type_name, _canonical(params), _canonical(inputs)],
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Node-result cache backend."""
+
+    def __init__(self) -> None:
+        self._stats = CacheStats()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def set(self, key: str, outputs: Mapping[str, Any]) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__, "size": len(self), **self._stats.as_dict()}
+
+
+class MemoryCache(ResultCache):
+    """In-process LRU with optional TTL."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None) -> None:
+        super().__init__()
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._data: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and self._ttl is not None and time.time() - entry[0] > self._ttl:
+                del self._data[key]
+                self._stats.evictions += 1
+                entry = None
+            if entry is None:
+                self._stats.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._stats.hits += 1
+            return dict(entry[1])
+
+    def set(self, key: str, outputs: Mapping[str, Any]) -> None:
+        with self._lock:
+            self._data[key] = (time.time(), dict(outputs))
+            self._data.move_to_end(key)
+            self._stats.stores += 1
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+                self._stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache(ResultCache):
+    """On-disk LRU that survives restarts. Outputs must be picklable."""
+
+    def __init__(self, path: str | Path, maxsize: int = 100_000, ttl: float | None = None) -> None:
+        super().__init__()
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results(accessed)")
+        self._rows = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, created FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self._ttl is not None and now - row[1] > self._ttl:
+                self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._rows -= 1
+                self._stats.evictions += 1
+                row = None
+            if row is None:
+                self._stats.misses += 1
+                return None
+            self._db.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+            self._stats.hits += 1
+        return pickle.loads(row[0])
+
+    def set(self, key: str, outputs: Mapping[str, Any]) -> None:
+        try:
+            blob = pickle.dumps(dict(outputs), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return
+        now = time.time()
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT OR IGNORE INTO results(key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, blob, now, now),
+            )
+            if cur.rowcount:
+                self._rows += 1
+            else:
+                self._db.execute(
+                    "UPDATE results SET value = ?, created = ?, accessed = ? WHERE key = ?",
+                    (blob, now, now, key),
+                )
+            self._stats.stores += 1
+            over = self._rows - self._maxsize
+            if over > 0:
+                self._db.execute(
+                    "DELETE FROM results WHERE key IN "
+                    "(SELECT key FROM results ORDER BY accessed LIMIT ?)",
+                    (over,),
+                )
+                self._rows -= over
+                self._stats.evictions += over
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM results")
+            self._rows = 0
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __len__(self) -> int:
+        return self._rows
+
+
+def cache_from_spec(spec: str) -> Optional[ResultCache]:
+    """Build a backend from "memory[:maxsize]", "sqlite:<path>" or "off"."""
+    kind, _, arg = spec.partition(":")
+    if kind == "off":
+        return None
+    if kind == "memory":
+        return MemoryCache(maxsize=int(arg)) if arg else MemoryCache()
+    if kind == "sqlite":
+        return SQLiteCache(arg or "agentflow-cache.sqlite3")
+    raise ValueError(f"Unknown cache backend: {spec}")
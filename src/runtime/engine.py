@@ -1,73 +1,851 @@
 from __future__ import annotations
 
+import asyncio
+import inspect
+import itertools
+import logging
+import os
+import threading
+import time
 import uuid
-from typing import Any, Dict, List, Mapping
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from typing import (
+    Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Type,
+)
 
 from core.blackboard import Blackboard
+from core.node import Node, NodeContext
+from runtime.cache import ResultCache, cache_key
 from runtime.events import Event, EventBus
+from runtime.incremental import IncrementalStore, RecordingBlackboard, replay
+from runtime.instances import InstancePool
+from runtime.journal import RunJournal
+from runtime.loader import GraphLoader, GraphPath
+from runtime.plan import ExecutionPlan, NodeSpec, PlanCache, ScheduleMode
+from runtime.profiling import Profiler, RunProfile
 from runtime.services import ServiceContainer
-from core.registry import REGISTRY
-from server.schemas import GraphModel, DataEdge, ExecEdge
+from runtime.streams import OutputStream, StreamReader, is_stream, materialize, settled
+from server.schemas import GraphModel
+
+logger = logging.getLogger(__name__)
+
+
+class RunCancelledError(RuntimeError):
+    """Raised by Engine.run when its cancel event is set between nodes."""
+
+
+async def _await(aw: Any) -> Any:
+    return await aw
+
+
+_detached_pool: InstancePool | None = None  # per worker process
+
+
+def _timed(box: List[Any], fn: Callable[..., Any], *args: Any) -> Any:
+    """Call ``fn`` and append (CPU seconds, thread id) to ``box``."""
+    cpu0 = time.thread_time()
+    try:
+        return fn(*args)
+    finally:
+        box.extend((time.thread_time() - cpu0, threading.get_ident()))
+
+
+def _detached(cls: Type[Node]) -> bool:
+    return cls.EXECUTOR == "process" and not inspect.iscoroutinefunction(cls.run)
+
+
+def _run_detached(
+    cls: Type[Node],
+    plan_key: str,
+    run_id: str,
+    node_id: str,
+    inputs: Dict[str, Any],
+    params: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Process-pool entry point. Nodes get the worker's own services and instance pool,
+    and a private blackboard."""
+    global _detached_pool
+    if _detached_pool is None:
+        _detached_pool = InstancePool(ServiceContainer())
+    pool = _detached_pool
+    ctx = NodeContext(
+        run_id=run_id, node_id=node_id, services=pool.services, blackboard=Blackboard()
+    )
+    with pool.lease(cls, plan_key, node_id) as node:
+        out = node.run(ctx, inputs, params)
+        if inspect.isawaitable(out):
+            out = asyncio.run(_await(out))
+        return materialize(out)
 
 
 class Engine:
-    def __init__(self, services: ServiceContainer, bus: EventBus) -> None:
+    def __init__(
+        self,
+        services: ServiceContainer,
+        bus: EventBus,
+        *,
+        max_workers: int | None = None,
+        max_concurrency: int | None = None,
+        type_limits: Mapping[str, int] | None = None,
+        cache: ResultCache | None = None,
+        profiler: Profiler | None = None,
+        journal: RunJournal | None = None,
+    ) -> None:
         self._services = services
         self._bus = bus
+        self.plans = PlanCache()
+        self.loader = GraphLoader()
+        self.cache = cache
+        self.incremental = IncrementalStore()
+        self.instances = InstancePool(services)
+        self.profiler = profiler
+        self.journal = journal
+        self.blackboard = Blackboard(scope="global")
+        self._graph_boards: "OrderedDict[str, Blackboard]" = OrderedDict()
+        self._boards_lock = threading.Lock()
+        self._max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self._max_concurrency = max_concurrency
+        self._type_limits = dict(type_limits or {})
+        self._threads: ThreadPoolExecutor | None = None
+        self._processes: ProcessPoolExecutor | None = None
+
+    def compile(self, graph: GraphModel | ExecutionPlan | GraphPath) -> ExecutionPlan:
+        """Compile (or fetch the cached plan for) a graph, or a graph file of any
+        supported format version."""
+        if isinstance(graph, ExecutionPlan):
+            return graph
+        if isinstance(graph, GraphModel):
+            return self.plans.get(graph)
+        return self.loader.plan(graph)
+
+    def graph_blackboard(self, graph: str | ExecutionPlan) -> Blackboard:
+        """The graph-scope board shared by every run of a graph (keyed by its meta id,
+        or by plan key for graphs without one). The most recent 256 are kept."""
+        if isinstance(graph, ExecutionPlan):
+            graph = str(graph.meta.get("id") or graph.key)
+        with self._boards_lock:
+            board = self._graph_boards.get(graph)
+            if board is None:
+                board = self._graph_boards[graph] = Blackboard("graph", self.blackboard)
+                while len(self._graph_boards) > 256:
+                    self._graph_boards.popitem(last=False)
+            else:
+                self._graph_boards.move_to_end(graph)
+            return board
+
+    def resume(self, run_id: str, *, cancel: threading.Event | None = None) -> Dict[str, Any]:
+        """Continue a journaled run that did not finish (crash, restart or error).
+
+        The run's blackboard is rebuilt from the journal and nodes whose completion was
+        journaled are not run again; the rest run as in run(), with the original
+        inputs and options. Graph- and global-scope blackboard writes are not
+        journaled, so they are not restored. Raises KeyError if the run is not in
+        the journal.
+        """
+        if self.journal is None:
+            raise RuntimeError("Engine has no run journal")
+        state = self.journal.resume(run_id)
+        return self.run(
+            state.plan,
+            inputs=state.blackboard,
+            run_id=run_id,
+            cancel=cancel,
+            restore=state.outputs,
+            **state.options,
+        )
+
+    def close(self) -> None:
+        """Shut down the worker pools used by run_async and tear down idle node instances."""
+        if self._threads is not None:
+            self._threads.shutdown(wait=False)
+            self._threads = None
+        if self._processes is not None:
+            self._processes.shutdown(wait=False)
+            self._processes = None
+        self.instances.close()
+
+    def run(
+        self,
+        graph: GraphModel | ExecutionPlan | GraphPath,
+        *,
+        inputs: Dict[str, Any] | None = None,
+        run_id: str | None = None,
+        cancel: threading.Event | None = None,
+        mode: ScheduleMode = "exec",
+        targets: Iterable[str] | None = None,
+        session: str | None = None,
+        restore: Mapping[str, Dict[str, Any]] | None = None,
+    ) -> Dict[str, Any]:
+        """Execute one node at a time. Async nodes are driven to completion.
+
+        ``graph`` may also be the path of a graph file in any supported format
+        version; it is loaded, upgraded and compiled once (see GraphLoader).
+
+        ``mode="exec"`` orders nodes by exec edges only; ``"dataflow"`` also waits for
+        data producers. ``targets`` runs just the dependencies of those node ids.
+        If ``cancel`` is set, the run stops before the next node with RunCancelledError.
+        With a ``session`` key, nodes unchanged since that session's previous run are
+        replayed (outputs and blackboard writes) instead of re-executed.
+        Nodes in ``restore`` (node id -> outputs) already completed and are not run
+        again; see resume().
+        """
+        if targets is not None:
+            targets = list(targets)
+        options = {"mode": mode, "targets": targets, "session": session}
+        plan, run_id, bb = self._begin(graph, inputs, run_id, options, journal=restore is None)
+        schedule = plan.schedule(mode, targets)
+        inc = self.incremental.begin(session, plan, inputs or {}) if session else None
+        prof = self.profiler.begin(run_id) if self.profiler is not None else None
+
+        nodes = plan.nodes
+        pending = list(schedule.prev_count)
+        ready_exec = deque(schedule.roots)
+        ready_at = [0.0] * len(nodes) if prof is not None else []
+        outputs: List[Dict[str, Any] | None] = [None] * len(nodes)
+
+        try:
+            while ready_exec:
+                if cancel is not None and cancel.is_set():
+                    self._emit("GraphCancelled", {"run_id": run_id})
+                    raise RunCancelledError(run_id)
+                idx = ready_exec.popleft()
+                spec = nodes[idx]
+                data_inputs = self._gather_inputs(spec, outputs)
+                prior = inc.lookup(spec, data_inputs, bb) if inc is not None else None
+                restored = restore.get(spec.id) if restore is not None else None
+                if prior is not None:
+                    key, out = None, prior.outputs
+                    replay(bb, prior.writes)
+                elif restored is not None:
+                    key, out = None, restored
+                else:
+                    key, out = self._cache_lookup(spec, data_inputs)
+
+                self._node_started(run_id, spec, prof)
+                if prof is not None:
+                    start, cpu0 = prof.now(), time.thread_time()
+                cached = out is not None
+                if out is None:
+                    recorder = RecordingBlackboard(bb) if inc is not None else None
+                    ctx = NodeContext(
+                        run_id=run_id,
+                        node_id=spec.id,
+                        services=self._services,
+                        blackboard=recorder if recorder is not None else bb,
+                    )
+                    with self.instances.lease(spec.cls, plan.key, spec.id, run_id) as node:
+                        out = node.run(ctx, data_inputs, spec.params)
+                        if inspect.isawaitable(out):
+                            out = asyncio.run(_await(out))
+                        out = dict(out)
+                        for stream, source in self._open_streams(run_id, spec, out):
+                            stream.pump(source)
+                    outputs[idx] = out
+                    out = settled(out)
+                    self._cache_store(key, out)
+                    if inc is not None and recorder is not None:
+                        inc.record(spec, out, recorder)
+                else:
+                    if inc is not None and prior is None:
+                        inc.record(spec, out)
+                    outputs[idx] = dict(out)
+                if prof is not None:
+                    cpu = time.thread_time() - cpu0
+                    prof.node(
+                        spec.id, spec.type, ready_at[idx], start, prof.now(), cpu, out, cached
+                    )
+                self._node_finished(run_id, spec, out, cached, prof, journal=restored is None)
+
+                for nxt in schedule.next[idx]:
+                    pending[nxt] -= 1
+                    if pending[nxt] == 0:
+                        ready_exec.append(nxt)
+                        if prof is not None:
+                            ready_at[nxt] = prof.now()
+        finally:
+            self.instances.end_run(run_id)
+
+        if inc is not None and session is not None:
+            self.incremental.commit(session, inc)
+        if prof is not None:
+            prof.scheduler = max(0.0, prof.now() - prof.busy - prof.events)
+        result = self._finish(plan, run_id, bb, outputs, prof)
+        if self.journal is not None:
+            self.journal.finish(run_id)
+        return result
+
+    async def run_async(
+        self,
+        graph: GraphModel | ExecutionPlan | GraphPath,
+        *,
+        inputs: Dict[str, Any] | None = None,
+        run_id: str | None = None,
+        mode: ScheduleMode = "exec",
+        targets: Iterable[str] | None = None,
+    ) -> Dict[str, Any]:
+        """Dispatch every ready node at once.
 
-    def run(self, graph: GraphModel, *, inputs: Dict[str, Any] | None = None) -> Dict[str, Any]:
-        run_id = str(uuid.uuid4())
-        bb = Blackboard()
+        ``async def run`` nodes are awaited on the loop; blocking nodes go to a thread
+        pool, or to a process pool when the class sets ``EXECUTOR = "process"``. The
+        ``max_concurrency`` and ``type_limits`` / ``Node.MAX_CONCURRENCY`` caps apply
+        per run. ``mode`` and ``targets`` behave as in run().
+        """
+        if targets is not None:
+            targets = list(targets)
+        options = {"mode": mode, "targets": targets}
+        plan, run_id, bb = self._begin(graph, inputs, run_id, options)
+        schedule = plan.schedule(mode, targets)
+        prof = self.profiler.begin(run_id) if self.profiler is not None else None
+
+        nodes = plan.nodes
+        pending = list(schedule.prev_count)
+        outputs: List[Dict[str, Any] | None] = [None] * len(nodes)
+        limit = asyncio.Semaphore(self._max_concurrency) if self._max_concurrency else None
+        type_limits: Dict[str, asyncio.Semaphore | None] = {}
+        running: Dict[asyncio.Task[Dict[str, Any]], int] = {}
+
+        piped: set[Tuple[int, int]] = set()  # (producer, consumer) started while streaming
+
+        def launch(idx: int) -> None:
+            spec = nodes[idx]
+            if spec.type not in type_limits:
+                n = self._type_limits.get(spec.type, spec.cls.MAX_CONCURRENCY)
+                type_limits[spec.type] = asyncio.Semaphore(n) if n else None
+            coro = self._run_node_async(
+                spec, plan.key, run_id, bb, self._gather_inputs(spec, outputs),
+                limit, type_limits[spec.type], lambda out: streaming(idx, out),
+                prof, prof.now() if prof is not None else 0.0,
+            )
+            running[asyncio.create_task(coro)] = idx
+
+        def streaming(idx: int, out: Dict[str, Any]) -> None:
+            """Start consumers that take idx's streams as they flow."""
+            outputs[idx] = out
+            for nxt in schedule.next[idx]:
+                if self._pipelines(nodes[nxt], idx, out):
+                    piped.add((idx, nxt))
+                    pending[nxt] -= 1
+                    if pending[nxt] == 0:
+                        launch(nxt)
+
+        t0 = time.perf_counter()
+        for idx in schedule.roots:
+            launch(idx)
+        busy = time.perf_counter() - t0
+
+        try:
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                t0 = time.perf_counter()
+                for task in done:
+                    idx = running.pop(task)
+                    outputs[idx] = task.result()
+                    for nxt in schedule.next[idx]:
+                        if (idx, nxt) in piped:
+                            continue
+                        pending[nxt] -= 1
+                        if pending[nxt] == 0:
+                            launch(nxt)
+                busy += time.perf_counter() - t0
+        except BaseException:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            raise
+        finally:
+            self.instances.end_run(run_id)
+
+        if prof is not None:
+            prof.scheduler = busy
+        result = self._finish(plan, run_id, bb, outputs, prof)
+        if self.journal is not None:
+            self.journal.finish(run_id)
+        return result
+
+    def run_many(
+        self,
+        graph: GraphModel | ExecutionPlan | GraphPath,
+        inputs: Iterable[Dict[str, Any] | None],
+        *,
+        concurrency: int = 1,
+        batch_size: int = 32,
+        mode: ScheduleMode = "exec",
+        targets: Iterable[str] | None = None,
+        cancel: threading.Event | None = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Run one graph over many input sets, yielding each result as it completes.
+
+        ``inputs`` is consumed lazily in chunks of ``batch_size`` items. A chunk moves
+        through the plan in lockstep, so a node class that overrides ``run_batch`` is
+        called once per chunk; other nodes run item by item. Up to ``concurrency``
+        chunks run at once on worker threads, each leasing its own node instances.
+        Results carry the item ``index``; a failing item comes back with ``ok: False``
+        and ``error`` without affecting the rest. Per-node events are not published,
+        only BatchStarted/BatchFinished and one GraphFinished per item.
+        """
+        plan = self.compile(graph)
+        order = plan.schedule(mode, targets).order()
+        return self._stream_batches(
+            plan, order, inputs, max(1, concurrency), max(1, batch_size), cancel
+        )
+
+    def _stream_batches(
+        self,
+        plan: ExecutionPlan,
+        order: List[int],
+        inputs: Iterable[Dict[str, Any] | None],
+        concurrency: int,
+        batch_size: int,
+        cancel: threading.Event | None,
+    ) -> Iterator[Dict[str, Any]]:
+        batch_id = str(uuid.uuid4())
+        items = enumerate(inputs)
+        chunks = iter(lambda: list(itertools.islice(items, batch_size)), [])
+        count = 0
+        self._emit("BatchStarted", {"batch_id": batch_id})
+
+        def run_chunk(chunk: List[Tuple[int, Any]]) -> List[Dict[str, Any]]:
+            return self._run_chunk(plan, order, batch_id, chunk, cancel)
+
+        if concurrency == 1:
+            for chunk in chunks:
+                for result in run_chunk(chunk):
+                    count += 1
+                    yield result
+        else:
+            with ThreadPoolExecutor(concurrency, thread_name_prefix="agentflow-batch") as pool:
+                running: set[Future[List[Dict[str, Any]]]] = set()
+                for chunk in chunks:
+                    running.add(pool.submit(run_chunk, chunk))
+                    if len(running) < concurrency:
+                        continue
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        for result in fut.result():
+                            count += 1
+                            yield result
+                for fut in as_completed(running):
+                    for result in fut.result():
+                        count += 1
+                        yield result
+        self._emit("BatchFinished", {"batch_id": batch_id, "items": count})
+
+    def _run_chunk(
+        self,
+        plan: ExecutionPlan,
+        order: List[int],
+        batch_id: str,
+        chunk: List[Tuple[int, Any]],
+        cancel: threading.Event | None,
+    ) -> List[Dict[str, Any]]:
+        """Run every item of ``chunk`` through the plan, one node at a time."""
+        n = len(chunk)
+        run_ids = [f"{batch_id}:{index}" for index, _ in chunk]
+        boards: List[Blackboard] = []
+        errors: List[str | None] = [None] * n
+        for j, (_, item) in enumerate(chunk):
+            valid = item is None or isinstance(item, Mapping)
+            boards.append(self._run_board(plan, run_ids[j], item if valid else None))
+            if not valid:
+                errors[j] = f"inputs must be an object, not {type(item).__name__}"
+        outputs: List[List[Dict[str, Any] | None]] = [[None] * len(plan.nodes) for _ in chunk]
+
+        for idx in order:
+            if cancel is not None and cancel.is_set():
+                raise RunCancelledError(batch_id)
+            spec = plan.nodes[idx]
+            todo: List[int] = []
+            keys: Dict[int, Optional[str]] = {}
+            data: Dict[int, Dict[str, Any]] = {}
+            for j in range(n):
+                if errors[j] is not None:
+                    continue
+                data[j] = self._gather_inputs(spec, outputs[j])
+                keys[j], out = self._cache_lookup(spec, data[j])
+                if out is None:
+                    todo.append(j)
+                else:
+                    outputs[j][idx] = out
+            if not todo:
+                continue
+
+            ctxs = [
+                NodeContext(
+                    run_id=run_ids[j], node_id=spec.id, services=self._services,
+                    blackboard=boards[j],
+                )
+                for j in todo
+            ]
+            results: List[Tuple[int, Any]] = []
+            with self.instances.lease(spec.cls, plan.key, spec.id) as node:
+                if type(node).run_batch is not Node.run_batch:
+                    try:
+                        outs = node.run_batch(ctxs, [data[j] for j in todo], spec.params)
+                        if inspect.isawaitable(outs):
+                            outs = asyncio.run(_await(outs))
+                        outs = list(outs)
+                        if len(outs) != len(todo):
+                            raise ValueError(
+                                f"run_batch returned {len(outs)} results for {len(todo)} items"
+                            )
+                        results = [(j, materialize(out)) for j, out in zip(todo, outs, strict=True)]
+                    except Exception as exc:
+                        for j in todo:
+                            errors[j] = f"{spec.id}: {type(exc).__name__}: {exc}"
+                else:
+                    for j, ctx in zip(todo, ctxs, strict=True):
+                        try:
+                            out = node.run(ctx, data[j], spec.params)
+                            if inspect.isawaitable(out):
+                                out = asyncio.run(_await(out))
+                            results.append((j, materialize(out)))
+                        except Exception as exc:
+                            errors[j] = f"{spec.id}: {type(exc).__name__}: {exc}"
+            for j, out in results:
+                outputs[j][idx] = out
+                self._cache_store(keys[j], out)
+
+        completed: List[Dict[str, Any]] = []
+        for j, (index, _) in enumerate(chunk):
+            if errors[j] is None:
+                result = self._finish(plan, run_ids[j], boards[j], outputs[j])
+                completed.append({"index": index, "ok": True, **result})
+            else:
+                completed.append(
+                    {"index": index, "ok": False, "run_id": run_ids[j], "error": errors[j]}
+                )
+        return completed
+
+    def _begin(
+        self,
+        graph: GraphModel | ExecutionPlan | GraphPath,
+        inputs: Dict[str, Any] | None,
+        run_id: str | None,
+        options: Dict[str, Any] | None = None,
+        *,
+        journal: bool = True,
+    ) -> tuple[ExecutionPlan, str, Blackboard]:
+        """Compile, create the run board and, with a journal, record the run start
+        (``journal=False``: already journaled, as when resuming)."""
+        plan = self.compile(graph)
+        run_id = run_id or str(uuid.uuid4())
+        bb = self._run_board(plan, run_id, inputs)
+        if self.journal is not None:
+            rid, jn = run_id, self.journal
+            if journal:
+                jn.begin(run_id, plan, inputs, options)
+            bb.subscribe(
+                lambda scope, key, value, version: jn.write(rid, key, value)
+                if version else jn.delete(rid, key)
+            )
+        self._emit("GraphStarted", {"run_id": run_id}, lambda: {"meta": dict(plan.meta)})
+        return plan, run_id, bb
+
+    def _run_board(
+        self, plan: ExecutionPlan, run_id: str, inputs: Mapping[str, Any] | None
+    ) -> Blackboard:
+        """A run-scope board seeded with ``inputs``, under the graph's board. Later
+        writes to it are published as BlackboardChanged events."""
+        bb = Blackboard("run", self.graph_blackboard(plan))
         if inputs:
             for k, v in inputs.items():
                 bb.set(k, v)
 
-        self._bus.publish(Event("GraphStarted", {"run_id": run_id, "meta": graph.meta}))
+        def changed(scope: str, key: str, value: Any, version: int) -> None:
+            self._emit(
+                "BlackboardChanged",
+                {"run_id": run_id, "key": key, "version": version},
+                lambda: {"value": value},
+            )
+
+        bb.subscribe(changed)
+        return bb
+
+    def _finish(
+        self,
+        plan: ExecutionPlan,
+        run_id: str,
+        bb: Blackboard,
+        outputs: List[Dict[str, Any] | None],
+        prof: RunProfile | None = None,
+    ) -> Dict[str, Any]:
+        if prof is not None and self.profiler is not None:
+            self.profiler.finish(prof)
+        nodes = plan.nodes
+        last_outputs = {
+            nodes[i].id: settled(out) for i, out in enumerate(outputs) if out is not None
+        }
+        snapshot = bb.as_dict()
+        self._emit("GraphFinished", {"run_id": run_id}, lambda: {"blackboard": snapshot})
+        return {"run_id": run_id, "blackboard": snapshot, "last_outputs": last_outputs}
+
+    def _emit(
+        self,
+        type_name: str,
+        fields: Dict[str, Any],
+        detail: Callable[[], Dict[str, Any]] | None = None,
+    ) -> None:
+        """Publish only when someone listens; ``detail`` is built on demand."""
+        if self._bus.active:
+            self._bus.publish(Event(type_name, fields, detail))
+
+    def _node_started(self, run_id: str, spec: NodeSpec, prof: RunProfile | None = None) -> None:
+        if self._bus.active:
+            t0 = time.perf_counter()
+            self._bus.publish(
+                Event("NodeStarted", {"run_id": run_id, "node_id": spec.id, "type": spec.type})
+            )
+            if prof is not None:
+                prof.events += time.perf_counter() - t0
+
+    def _node_finished(
+        self,
+        run_id: str,
+        spec: NodeSpec,
+        out: Mapping[str, Any],
+        cached: bool,
+        prof: RunProfile | None = None,
+        *,
+        journal: bool = True,
+    ) -> None:
+        if journal and self.journal is not None:
+            self.journal.node(run_id, spec.id, dict(out))
+        if self._bus.active:
+            t0 = time.perf_counter()
+            self._bus.publish(
+                Event(
+                    "NodeFinished",
+                    {"run_id": run_id, "node_id": spec.id, "cached": cached},
+                    lambda: {"outputs": dict(out)},
+                )
+            )
+            if prof is not None:
+                prof.events += time.perf_counter() - t0
+
+    @staticmethod
+    def _gather_inputs(spec: NodeSpec, outputs: List[Dict[str, Any] | None]) -> Dict[str, Any]:
+        data_inputs: Dict[str, Any] = dict(spec.defaults)
+        for dst_port, src_idx, src_port in spec.bindings:
+            src_out = outputs[src_idx]
+            if src_out is None:
+                logger.warning(
+                    "Node %s: producer of input %r has not run yet; using its default",
+                    spec.id, dst_port,
+                )
+            elif src_port in src_out:
+                value = src_out[src_port]
+                if isinstance(value, OutputStream):
+                    if dst_port in spec.cls.STREAM_INPUTS:
+                        value = value.reader()
+                    elif not value.done:
+                        logger.warning(
+                            "Node %s: input %r is still streaming; using its default",
+                            spec.id, dst_port,
+                        )
+                        continue
+                    else:
+                        value = value.value()
+                data_inputs[dst_port] = value
+        for port in spec.cls.STREAM_INPUTS:
+            if port in data_inputs and not isinstance(data_inputs[port], StreamReader):
+                data_inputs[port] = OutputStream.of(data_inputs[port]).reader()
+        return data_inputs
+
+    @staticmethod
+    def _pipelines(consumer: NodeSpec, producer: int, out: Mapping[str, Any]) -> bool:
+        """True when ``consumer`` takes every stream it reads from ``producer`` as a stream."""
+        piped = False
+        for dst_port, src_idx, src_port in consumer.bindings:
+            if src_idx == producer and isinstance(out.get(src_port), OutputStream):
+                if dst_port not in consumer.cls.STREAM_INPUTS:
+                    return False
+                piped = True
+        return piped
+
+    def _open_streams(
+        self, run_id: str, spec: NodeSpec, out: Dict[str, Any]
+    ) -> List[Tuple[OutputStream, Any]]:
+        """Swap generator ports of ``out`` for OutputStreams; return (stream, source) pairs."""
+        opened: List[Tuple[OutputStream, Any]] = []
+        for port, value in out.items():
+            if is_stream(value):
+                stream = OutputStream(self._chunk_emitter(run_id, spec.id, port))
+                out[port] = stream
+                opened.append((stream, value))
+        return opened
 
-        # Compile adjacency once
-        fanin: Dict[str, List[DataEdge]] = {}
-        exec_next: Dict[str, List[str]] = {}
-        exec_prev_count: Dict[str, int] = {}
+    def _chunk_emitter(self, run_id: str, node_id: str, port: str) -> Callable[[int, Any], None]:
+        def emit(seq: int, chunk: Any) -> None:
+            if self._bus.active:
+                self._bus.publish(
+                    Event(
+                        "NodeOutputChunk",
+                        {"run_id": run_id, "node_id": node_id, "port": port, "seq": seq},
+                        lambda: {"chunk": chunk},
+                    )
+                )
 
-        for e in graph.edges.data:
-            fanin.setdefault(e.dst[0], []).append(e)
+        return emit
 
-        for e in graph.edges.exec:
-            exec_next.setdefault(e.src, []).append(e.dst)
-            exec_prev_count[e.dst] = exec_prev_count.get(e.dst, 0) + 1
-            exec_prev_count.setdefault(e.src, exec_prev_count.get(e.src, 0))
+    def _cache_lookup(
+        self, spec: NodeSpec, data_inputs: Mapping[str, Any]
+    ) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Return (cache key, cached outputs); the key is None when caching does not apply."""
+        if self.cache is None or not spec.cacheable:
+            return None, None
+        key = cache_key(spec.type, spec.params, data_inputs)
+        if key is None:
+            return None, None
+        return key, self.cache.get(key)
 
-        node_map = {n.id: n for n in graph.nodes}
-        ready_exec = [n.id for n in graph.nodes if exec_prev_count.get(n.id, 0) == 0]
-        visited: set[str] = set()
-        last_outputs: Dict[str, Dict[str, Any]] = {}
+    def _cache_store(self, key: Optional[str], out: Mapping[str, Any]) -> None:
+        if key is not None and self.cache is not None:
+            self.cache.set(key, out)
 
-        def prev_exec_nodes(node_id: str) -> List[str]:
-            return [src for src, ns in exec_next.items() if node_id in ns]
+    async def _run_node_async(
+        self,
+        spec: NodeSpec,
+        plan_key: str,
+        run_id: str,
+        bb: Blackboard,
+        data_inputs: Dict[str, Any],
+        limit: asyncio.Semaphore | None,
+        type_limit: asyncio.Semaphore | None,
+        on_stream: Callable[[Dict[str, Any]], None] | None = None,
+        prof: RunProfile | None = None,
+        ready: float = 0.0,
+    ) -> Dict[str, Any]:
+        """Run one node; if it streams, ``on_stream`` sees its outputs before they end."""
+        key, out = self._cache_lookup(spec, data_inputs)
+        if out is not None:
+            self._node_started(run_id, spec, prof)
+            if prof is not None:
+                now = prof.now()
+                prof.node(spec.id, spec.type, ready, now, now, None, out, True)
+            self._node_finished(run_id, spec, out, True, prof)
+            return out
+        if limit is not None:
+            await limit.acquire()
+        try:
+            if type_limit is not None:
+                await type_limit.acquire()
+            try:
+                self._node_started(run_id, spec, prof)
+                start = prof.now() if prof is not None else 0.0
+                box: List[Any] | None = [] if prof is not None else None
+                async with self._lease(spec, plan_key, run_id) as node:
+                    out = dict(
+                        await self._call_node(spec, node, plan_key, run_id, bb, data_inputs, box)
+                    )
+                    opened = self._open_streams(run_id, spec, out)
+                    if opened:
+                        if on_stream is not None:
+                            on_stream(out)
+                        await asyncio.gather(*(self._pump(s, source) for s, source in opened))
+                value = settled(out)
+                self._cache_store(key, value)
+                if prof is not None and box is not None:
+                    cpu, thread = (box[0], box[1]) if box else (None, None)
+                    prof.node(
+                        spec.id, spec.type, ready, start, prof.now(), cpu, value, False, thread
+                    )
+                self._node_finished(run_id, spec, value, False, prof)
+                return out
+            finally:
+                if type_limit is not None:
+                    type_limit.release()
+        finally:
+            if limit is not None:
+                limit.release()
 
-        while ready_exec:
-            nid = ready_exec.pop(0)
-            node = node_map[nid]
+    @asynccontextmanager
+    async def _lease(
+        self, spec: NodeSpec, plan_key: str, run_id: str
+    ) -> AsyncIterator[Node | None]:
+        """Pooled instance for run_async; None for process nodes, which pool in the worker.
+        A cold instance is set up on the thread pool so ``setup`` never blocks the loop."""
+        if _detached(spec.cls):
+            yield None
+            return
+        pool = self.instances
+        node = pool.acquire_idle(spec.cls, plan_key, spec.id, run_id)
+        if node is None:
+            loop = asyncio.get_running_loop()
+            node = await loop.run_in_executor(
+                self._thread_pool(), pool.acquire, spec.cls, plan_key, spec.id, run_id
+            )
+        try:
+            yield node
+        except BaseException:
+            pool.release(spec.cls, plan_key, spec.id, node, run_id=run_id, discard=True)
+            raise
+        pool.release(spec.cls, plan_key, spec.id, node, run_id=run_id)
 
-            data_inputs: Dict[str, Any] = dict(node.inputs)
-            for e in fanin.get(nid, []):
-                src_id, src_port = e.src
-                if src_id in last_outputs and src_port in last_outputs[src_id]:
-                    data_inputs[e.dst[1]] = last_outputs[src_id][src_port]
+    async def _call_node(
+        self,
+        spec: NodeSpec,
+        node: Node | None,
+        plan_key: str,
+        run_id: str,
+        bb: Blackboard,
+        data_inputs: Dict[str, Any],
+        box: List[Any] | None = None,
+    ) -> Mapping[str, Any]:
+        """Execute ``node`` (or ship it to a worker process when None). Blocking calls
+        append their (CPU seconds, thread id) to ``box`` when one is given."""
+        cls = spec.cls
+        loop = asyncio.get_running_loop()
+        if node is None:
+            return await loop.run_in_executor(
+                self._process_pool(),
+                _run_detached, cls, plan_key, run_id, spec.id, data_inputs, dict(spec.params),
+            )
 
-            from core.node import NodeContext  # local import to avoid cycles
-            ctx = NodeContext(run_id=run_id, node_id=nid, services=self._services, blackboard=bb)
+        ctx = NodeContext(run_id=run_id, node_id=spec.id, services=self._services, blackboard=bb)
+        if inspect.iscoroutinefunction(cls.run):
+            return await node.run(ctx, data_inputs, spec.params)
+        if cls.EXECUTOR == "inline":
+            if box is None:
+                out = node.run(ctx, data_inputs, spec.params)
+            else:
+                out = _timed(box, node.run, ctx, data_inputs, spec.params)
+        elif box is None:
+            out = await loop.run_in_executor(
+                self._thread_pool(), node.run, ctx, data_inputs, spec.params
+            )
+        else:
+            out = await loop.run_in_executor(
+                self._thread_pool(), _timed, box, node.run, ctx, data_inputs, spec.params
+            )
+        if inspect.isawaitable(out):
+            out = await out
+        return out
 
-            self._bus.publish(Event("NodeStarted", {"run_id": run_id, "node_id": nid, "type": node.type}))
-            node_cls = REGISTRY.get(node.type)
-            out = node_cls().run(ctx, data_inputs, node.params)
-            last_outputs[nid] = dict(out)
-            self._bus.publish(Event("NodeFinished", {"run_id": run_id, "node_id": nid, "outputs": out}))
+    async def _pump(self, stream: OutputStream, source: Any) -> None:
+        if inspect.isasyncgen(source):
+            await stream.apump(source)
+        else:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._thread_pool(), stream.pump, source)
 
-            visited.add(nid)
-            for nxt in exec_next.get(nid, []):
-                if all(prev in visited for prev in prev_exec_nodes(nxt)):
-                    ready_exec.append(nxt)
+    def _thread_pool(self) -> Executor:
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(
+                max_workers=self._max_workers, thread_name_prefix="agentflow-node"
+            )
+        return self._threads
 
-        self._bus.publish(Event("GraphFinished", {"run_id": run_id, "blackboard": bb.as_dict()}))
-        return {"run_id": run_id, "blackboard": bb.as_dict(), "last_outputs": last_outputs}
+    def _process_pool(self) -> Executor:
+        if self._processes is None:
+            self._processes = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+        return self._processes
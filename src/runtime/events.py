@@ -1,28 +1,312 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Dict
+import asyncio
+import itertools
+import logging
+import reprlib
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Literal, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+OverflowPolicy = Literal["drop_oldest", "drop_newest", "coalesce"]
+Verbosity = Literal["ids", "summary", "full"]
+_MAX_ITEMS = 100  # sequence items kept by truncate()
+
+
+def truncate(value: Any, max_chars: int) -> Any:
+    """Shorten long strings/bytes and sequences anywhere inside ``value``."""
+    if isinstance(value, str):
+        if len(value) <= max_chars:
+            return value
+        return f"{value[:max_chars]}... (+{len(value) - max_chars} chars)"
+    if isinstance(value, (bytes, bytearray)):
+        return truncate(value.decode("utf-8", "replace"), max_chars)
+    if isinstance(value, dict):
+        return {k: truncate(v, max_chars) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        items = [truncate(v, max_chars) for v in value[:_MAX_ITEMS]]
+        if len(value) > _MAX_ITEMS:
+            items.append(f"... (+{len(value) - _MAX_ITEMS} items)")
+        return items
+    return value
+
+
+def _preview_repr(max_chars: int) -> reprlib.Repr:
+    r = reprlib.Repr()
+    r.maxlevel = 2
+    r.maxstring = r.maxother = r.maxlong = max_chars
+    r.maxdict = r.maxlist = r.maxtuple = r.maxset = r.maxfrozenset = r.maxdeque = 10
+    return r
+
+
+def summarize(value: Any, max_chars: int = 80) -> Any:
+    """Type/size description of a value, with a short preview.
+
+    The preview never renders more than a few items of a container, so it stays
+    cheap for large values (objects without a known container type still pay
+    for their own ``repr``).
+    """
+    if isinstance(value, dict):
+        out = {k: summarize(v, max_chars) for k, v in itertools.islice(value.items(), _MAX_ITEMS)}
+        if len(value) > _MAX_ITEMS:
+            out["..."] = f"+{len(value) - _MAX_ITEMS} keys"
+        return out
+    info: Dict[str, Any] = {"type": type(value).__name__}
+    if isinstance(value, (str, bytes, bytearray, list, tuple, set, frozenset)):
+        info["len"] = len(value)
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        preview = value
+    else:
+        preview = _preview_repr(max_chars).repr(value)
+    info["preview"] = truncate(preview, max_chars)
+    return info
 
 
-@dataclass(frozen=True)
 class Event:
-    type: str
-    payload: Dict[str, Any]
+    """Bus event.
+
+    ``fields`` are the cheap identifying fields (run/node ids, type). Heavy data such
+    as node outputs comes from ``detail``, a callable evaluated at most once and only
+    when a subscriber renders the event above "ids" verbosity.
+    """
+
+    __slots__ = ("type", "fields", "_detail", "_detail_value")
+
+    def __init__(
+        self,
+        type: str,  # noqa: A002
+        fields: Dict[str, Any],
+        detail: Optional[Callable[[], Dict[str, Any]]] = None,
+    ) -> None:
+        self.type = type
+        self.fields = fields
+        self._detail = detail
+        self._detail_value: Optional[Dict[str, Any]] = None
+
+    def __repr__(self) -> str:
+        return f"Event(type={self.type!r}, fields={self.fields!r})"
+
+    @property
+    def detail(self) -> Dict[str, Any]:
+        if self._detail is None:
+            return {}
+        if self._detail_value is None:
+            self._detail_value = self._detail()
+        return self._detail_value
+
+    @property
+    def payload(self) -> Dict[str, Any]:
+        """Full payload (identifying fields plus detail)."""
+        return {**self.fields, **self.detail} if self._detail is not None else self.fields
+
+    def render(self, verbosity: Verbosity = "full", max_chars: int | None = None) -> Dict[str, Any]:
+        if verbosity == "ids" or self._detail is None:
+            payload = self.fields
+        elif verbosity == "summary":
+            payload = {**self.fields, **summarize(self.detail, min(max_chars or 80, 80))}
+        elif max_chars is not None:
+            payload = {**self.fields, **truncate(self.detail, max_chars)}
+        else:
+            payload = self.payload
+        return {"type": self.type, "payload": payload}
+
+
+def _coalesce_key(evt: Event) -> Tuple[str, Any, Any]:
+    return evt.type, evt.fields.get("run_id"), evt.fields.get("node_id")
+
+
+class Subscription:
+    """Bounded per-subscriber queue. Filling it never blocks the publisher.
+
+    When full, ``drop_oldest`` discards the oldest queued event, ``drop_newest`` the
+    incoming one, and ``coalesce`` replaces a queued event of the same type/run/node
+    (falling back to drop_oldest). Dropped events are counted, not silently lost.
+    ``verbosity``/``max_chars`` control what ``render`` produces for this subscriber.
+    """
+
+    def __init__(
+        self,
+        bus: "EventBus",
+        *,
+        maxsize: int = 1024,
+        policy: OverflowPolicy = "drop_oldest",
+        callback: Optional[Callable[[Event], None]] = None,
+        verbosity: Verbosity = "full",
+        max_chars: int | None = None,
+    ) -> None:
+        self._bus = bus
+        self._maxsize = maxsize
+        self._policy = policy
+        self.callback = callback
+        self.verbosity = verbosity
+        self.max_chars = max_chars
+        self._queue: Deque[Event] = deque()
+        self._lock = threading.Lock()
+        self._dropped = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._waiter: asyncio.Event | None = None
+        self.closed = False
+
+    def offer(self, evt: Event) -> None:
+        with self._lock:
+            if self.closed:
+                return
+            q = self._queue
+            if len(q) >= self._maxsize:
+                self._dropped += 1
+                if self._policy == "drop_newest":
+                    return
+                if self._policy == "coalesce":
+                    key = _coalesce_key(evt)
+                    for i in range(len(q) - 1, -1, -1):
+                        if _coalesce_key(q[i]) == key:
+                            del q[i]
+                            break
+                    else:
+                        q.popleft()
+                else:
+                    q.popleft()
+            was_empty = not q
+            q.append(evt)
+            waiter, loop = self._waiter, self._loop
+        if was_empty and waiter is not None and loop is not None:
+            try:
+                loop.call_soon_threadsafe(waiter.set)
+            except RuntimeError:
+                pass  # loop already closed
+
+    def render(self, evt: Event) -> Dict[str, Any]:
+        return evt.render(self.verbosity, self.max_chars)
+
+    def drain(self, max_items: int | None = None) -> List[Event]:
+        """Take up to ``max_items`` queued events without waiting."""
+        with self._lock:
+            n = len(self._queue) if max_items is None else min(max_items, len(self._queue))
+            return [self._queue.popleft() for _ in range(n)]
+
+    def take_dropped(self) -> int:
+        """Number of events dropped since the last call."""
+        with self._lock:
+            n, self._dropped = self._dropped, 0
+            return n
+
+    async def next_batch(self, max_items: int = 256) -> List[Event]:
+        """Wait until at least one event is queued, then take up to ``max_items``."""
+        if self._waiter is None:
+            self._loop = asyncio.get_running_loop()
+            self._waiter = asyncio.Event()
+        while True:
+            batch = self.drain(max_items)
+            if batch or self.closed:
+                return batch
+            self._waiter.clear()
+            if self._queue:
+                continue
+            await self._waiter.wait()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def close(self) -> None:
+        self._bus.unsubscribe(self)
+        with self._lock:
+            self.closed = True
+            self._queue.clear()
+            waiter, loop = self._waiter, self._loop
+        if waiter is not None and loop is not None:
+            try:
+                loop.call_soon_threadsafe(waiter.set)
+            except RuntimeError:
+                pass
 
 
 class EventBus:
-    """Simple in-process pub/sub used by the engine and WS bridge."""
+    """In-process pub/sub used by the engine and WS bridge.
+
+    ``publish`` only appends to each subscriber's bounded queue. Pull subscribers
+    (``open``) consume batches at their own pace; callback subscribers
+    (``subscribe``) are invoked from a dispatcher thread, never on the publisher's.
+    """
 
     def __init__(self) -> None:
-        self._subs: list[callable[[Event], None]] = []
+        self._subs: Tuple[Subscription, ...] = ()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._dispatcher: threading.Thread | None = None
+
+    @property
+    def active(self) -> bool:
+        """True when anyone is listening; publishers skip building events otherwise."""
+        return bool(self._subs)
+
+    @property
+    def wants_detail(self) -> bool:
+        """True when a subscriber may read event details: a callback, or a pull
+        subscriber rendering above "ids"."""
+        return any(s.callback is not None or s.verbosity != "ids" for s in self._subs)
+
+    def open(
+        self,
+        *,
+        maxsize: int = 1024,
+        policy: OverflowPolicy = "drop_oldest",
+        verbosity: Verbosity = "full",
+        max_chars: int | None = None,
+    ) -> Subscription:
+        sub = Subscription(
+            self, maxsize=maxsize, policy=policy, verbosity=verbosity, max_chars=max_chars
+        )
+        self._add(sub)
+        return sub
+
+    def subscribe(
+        self,
+        fn: Callable[[Event], None],
+        *,
+        maxsize: int = 1024,
+        policy: OverflowPolicy = "drop_oldest",
+    ) -> Subscription:
+        sub = Subscription(self, maxsize=maxsize, policy=policy, callback=fn)
+        self._add(sub)
+        self._ensure_dispatcher()
+        return sub
 
-    def subscribe(self, fn: callable[[Event], None]) -> None:
-        self._subs.append(fn)
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            self._subs = tuple(s for s in self._subs if s is not sub)
 
     def publish(self, evt: Event) -> None:
-        for fn in list(self._subs):
-            try:
-                fn(evt)
-            except Exception:
-                # Keep bus resilient
-                pass
+        notify = False
+        for sub in self._subs:
+            sub.offer(evt)
+            notify = notify or sub.callback is not None
+        if notify:
+            self._wakeup.set()
+
+    def _add(self, sub: Subscription) -> None:
+        with self._lock:
+            self._subs = self._subs + (sub,)
+
+    def _ensure_dispatcher(self) -> None:
+        with self._lock:
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(
+                    target=self._dispatch, name="agentflow-events", daemon=True
+                )
+                self._dispatcher.start()
+
+    def _dispatch(self) -> None:
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            for sub in self._subs:
+                if sub.callback is None:
+                    continue
+                for evt in sub.drain():
+                    try:
+                        sub.callback(evt)
+                    except Exception:
+                        # Keep bus resilient
+                        logger.exception("Event subscriber failed on %s", evt.type)
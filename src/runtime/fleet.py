@@ -0,0 +1,430 @@
+from __future__ import annotations
+
+import asyncio
+import atexit
+import logging
+import multiprocessing as mp
+import os
+import pickle
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, Tuple
+
+from runtime.engine import RunCancelledError
+from runtime.events import Event, EventBus, truncate
+from runtime.plan import ExecutionPlan
+from runtime.profiling import Profiler
+
+logger = logging.getLogger(__name__)
+
+SHM_THRESHOLD = 256 * 1024  # messages at least this large go through shared memory
+_SHM = "shm"
+_CANCEL_POLL = 0.05
+
+
+class WorkerCrashedError(RuntimeError):
+    """Raised by WorkerFleet.run when the worker process died during the run."""
+
+
+def _send(conn: Connection, msg: Tuple[Any, ...], lock: threading.Lock) -> None:
+    """Pickle ``msg`` onto ``conn``; large messages are written to a shared memory
+    segment and only its name is sent (the receiver unlinks it)."""
+    data = pickle.dumps(msg, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(data) >= SHM_THRESHOLD:
+        shm = SharedMemory(create=True, size=len(data))
+        shm.buf[: len(data)] = data
+        data = pickle.dumps((_SHM, shm.name, len(data)))
+        shm.close()
+    with lock:
+        conn.send_bytes(data)
+
+
+def _recv(conn: Connection) -> Tuple[Any, ...]:
+    msg = pickle.loads(conn.recv_bytes())
+    if msg[0] != _SHM:
+        return msg
+    shm = SharedMemory(name=msg[1])
+    try:
+        with shm.buf[: msg[2]] as view:
+            return pickle.loads(view)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _picklable(exc: BaseException) -> BaseException:
+    try:
+        pickle.dumps(exc)
+    except Exception:
+        return RuntimeError(f"{type(exc).__name__}: {exc}")
+    return exc
+
+
+def _worker_main(
+    conn: Connection, cache: str | None, journal: str | None, max_plans: int
+) -> None:
+    """Worker process: load the registry once, keep compiled plans by key, and run
+    one graph at a time while the main thread listens for plans and cancellations."""
+    import nodes  # noqa: F401  (registers node types lazily, see core.plugins)
+    from runtime.cache import cache_from_spec
+    from runtime.engine import Engine
+    from runtime.journal import RunJournal
+    from runtime.services import ServiceContainer
+
+    bus = EventBus()
+    engine = Engine(
+        ServiceContainer(), bus, cache=cache_from_spec(cache) if cache else None,
+        profiler=Profiler(keep=1), journal=RunJournal(journal) if journal else None,
+    )
+    plans: "OrderedDict[str, ExecutionPlan]" = OrderedDict()
+    runs: "queue.Queue[Tuple[Any, ...] | None]" = queue.Queue()
+    cancels: Dict[str, threading.Event] = {}
+    muted: set[str] = set()  # runs whose events the coordinator no longer wants
+    send_lock = threading.Lock()
+
+    def forwarder(run_id: str, detail: bool, max_chars: int | None) -> Callable[[Event], None]:
+        def forward(evt: Event) -> None:
+            if run_id in muted:
+                return
+            data = None
+            if detail:  # only now is the event's lazy detail built
+                data = evt.detail if max_chars is None else truncate(evt.detail, max_chars)
+            _send(conn, ("event", evt.type, evt.fields, data), send_lock)
+
+        return forward
+
+    def runner() -> None:
+        while True:
+            msg = runs.get()
+            if msg is None:
+                return
+            _, run_id, key, inputs, options, events = msg
+            forward = forwarder(run_id, *events) if events is not None else None
+            sub = bus.subscribe(forward, maxsize=65536) if forward is not None else None
+            parallel = options.pop("parallel", False)
+            try:
+                plan = plans[key]
+                if parallel:
+                    result = asyncio.run(
+                        engine.run_async(plan, inputs=inputs, run_id=run_id, **options)
+                    )
+                else:
+                    result = engine.run(
+                        plan, inputs=inputs, run_id=run_id, cancel=cancels[run_id], **options
+                    )
+            except Exception as exc:
+                reply: Tuple[Any, ...] = ("failed", run_id, _picklable(exc))
+            else:
+                try:
+                    profile = engine.profiler.get(run_id) if engine.profiler else None
+                except KeyError:
+                    profile = None
+                reply = ("done", run_id, result, profile)
+            finally:
+                if sub is not None and forward is not None:
+                    bus.unsubscribe(sub)
+                    for evt in sub.drain():  # not yet picked up by the dispatcher
+                        forward(evt)
+                cancels.pop(run_id, None)
+                muted.discard(run_id)
+            try:
+                _send(conn, reply, send_lock)
+            except Exception as exc:  # unpicklable result
+                _send(conn, ("failed", run_id, _picklable(exc)), send_lock)
+
+    thread = threading.Thread(target=runner, name="agentflow-fleet-run", daemon=True)
+    thread.start()
+    while True:
+        try:
+            msg = _recv(conn)
+        except (EOFError, OSError):
+            break
+        kind = msg[0]
+        if kind == "plan":
+            plans[msg[1]] = msg[2]
+            while len(plans) > max_plans:
+                plans.popitem(last=False)
+        elif kind == "run":
+            if msg[2] not in plans:  # e.g. this process replaced one that had it
+                _send(conn, ("missing", msg[1]), send_lock)
+                continue
+            plans.move_to_end(msg[2])  # same LRU order as the coordinator's _Worker.plans
+            cancels[msg[1]] = threading.Event()
+            runs.put(msg)
+        elif kind == "cancel":
+            event = cancels.get(msg[1])
+            if event is not None:
+                event.set()
+        elif kind == "mute":
+            if msg[1] in cancels:  # still running
+                muted.add(msg[1])
+        elif kind == "stop":
+            break
+    runs.put(None)
+    thread.join()
+    if engine.journal is not None:
+        engine.journal.close()
+
+
+class _Pending:
+    __slots__ = ("run_id", "done", "reply", "muted")
+
+    def __init__(self, run_id: str) -> None:
+        self.run_id = run_id
+        self.done = threading.Event()
+        self.reply: Tuple[Any, ...] | None = None
+        self.muted = False
+
+
+class _Worker:
+    """One worker process slot. A crashed process is replaced in the same slot."""
+
+    def __init__(self, fleet: WorkerFleet, slot: int) -> None:
+        self.fleet = fleet
+        self.slot = slot
+        self.plans: "OrderedDict[str, None]" = OrderedDict()  # plan keys the process holds
+        self.pending: _Pending | None = None
+        self.process: Any = None
+        self.started = 0.0
+        self.conn: Connection | None = None
+        self.send_lock = threading.Lock()
+        self._start()
+
+    def _start(self) -> None:
+        fleet = self.fleet
+        parent, child = fleet._ctx.Pipe()
+        self.process = fleet._ctx.Process(
+            target=_worker_main,
+            args=(child, fleet._cache, fleet._journal, fleet._max_plans),
+            name=f"agentflow-worker-{self.slot}",
+            daemon=True,
+        )
+        self.process.start()
+        self.started = time.monotonic()
+        child.close()
+        self.conn = parent
+        self.plans.clear()
+        threading.Thread(
+            target=self._read, args=(parent,), name=f"agentflow-fleet-{self.slot}", daemon=True
+        ).start()
+
+    def send(self, msg: Tuple[Any, ...]) -> None:
+        assert self.conn is not None
+        _send(self.conn, msg, self.send_lock)
+
+    def _read(self, conn: Connection) -> None:
+        while True:
+            try:
+                msg = _recv(conn)
+            except (EOFError, OSError):
+                break
+            except Exception:
+                logger.exception("Bad message from fleet worker %d", self.slot)
+                continue
+            if msg[0] == "event":
+                bus = self.fleet._bus
+                if bus is not None and bus.active:
+                    detail = msg[3]
+                    lazy = None if detail is None else (lambda d=detail: d)
+                    bus.publish(Event(msg[1], msg[2], lazy))
+                else:
+                    self._mute()
+                continue
+            pending = self.pending
+            if pending is not None and pending.run_id == msg[1]:
+                pending.reply = msg
+                pending.done.set()
+        self._crashed(conn)
+
+    def _mute(self) -> None:
+        """Tell the worker to stop forwarding the current run's events."""
+        pending = self.pending
+        if pending is None or pending.muted:
+            return
+        pending.muted = True
+        try:
+            self.send(("mute", pending.run_id))
+        except (OSError, ValueError):
+            pass
+
+    def _crashed(self, conn: Connection) -> None:
+        conn.close()
+        if self.fleet._closed:
+            return
+        self.process.join(timeout=1)
+        code = self.process.exitcode
+        logger.warning("Fleet worker %d exited (code %s); restarting", self.slot, code)
+        with self.fleet._lock:
+            self.fleet._restarts += 1
+        if time.monotonic() - self.started < 1.0:
+            time.sleep(1.0)  # don't spin on a worker that dies at startup
+        # restart before failing the run, so the slot is usable when it goes back idle
+        pending = self.pending
+        self._start()
+        if pending is not None:
+            pending.reply = ("failed", pending.run_id, WorkerCrashedError(
+                f"Worker process {self.slot} exited (code {code}) during run {pending.run_id}"
+            ))
+            pending.done.set()
+
+    def stop(self) -> None:
+        try:
+            self.send(("stop",))
+        except (OSError, ValueError):
+            pass
+        if self.process is not None:
+            self.process.join(timeout=1)
+            if self.process.is_alive():
+                self.process.terminate()
+
+
+class WorkerFleet:
+    """Runs graphs in a pool of worker processes, one run per process at a time.
+
+    Each worker imports the node registry once and keeps the last ``max_plans``
+    compiled plans it was sent; a plan is pickled to a worker only the first time
+    that worker runs it (and again if a replacement process reports it missing). Messages (plans, inputs, results) at least
+    ``SHM_THRESHOLD`` bytes travel through shared memory instead of the pipe. A
+    worker that dies is restarted; the run it was executing fails with
+    WorkerCrashedError.
+
+    ``run`` mirrors Engine.run, so a RunQueue can be served by a fleet. Result
+    caching, incremental sessions and graph-scope blackboards are per worker.
+    Events are forwarded to ``bus`` while it has subscribers (a run stops forwarding
+    once it has none); their details only when a subscriber may read them (see
+    EventBus.wants_detail), truncated to ``max_detail_chars``. Run profiles are
+    added to ``profiler``. With ``journal`` (a RunJournal path) workers journal
+    their runs there, so any Engine on that journal can resume them.
+    """
+
+    def __init__(
+        self,
+        processes: int | None = None,
+        *,
+        bus: EventBus | None = None,
+        profiler: Profiler | None = None,
+        cache: str | None = "memory",
+        journal: str | None = None,
+        max_plans: int = 32,
+        max_detail_chars: int | None = 10_000,
+    ) -> None:
+        self._n = processes or os.cpu_count() or 1
+        self._bus = bus
+        self._max_detail_chars = max_detail_chars
+        self.profiler = profiler
+        self._cache = cache
+        self._journal = journal
+        self._max_plans = max_plans
+        self._ctx = mp.get_context("spawn")
+        self._workers: list[_Worker] = []
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._restarts = 0
+        self._closed = False
+        atexit.register(self.close)  # before multiprocessing kills the workers
+
+    def run(
+        self,
+        plan: ExecutionPlan,
+        *,
+        inputs: Dict[str, Any] | None = None,
+        run_id: str | None = None,
+        cancel: threading.Event | None = None,
+        **options: Any,
+    ) -> Dict[str, Any]:
+        """Run ``plan`` on the next free worker and wait for its result. Options are
+        Engine.run keyword arguments; ``parallel=True`` uses Engine.run_async, which
+        takes no incremental ``session``."""
+        if options.get("parallel") and options.get("session"):
+            raise ValueError("Incremental runs cannot be parallel")
+        self._ensure_workers()
+        run_id = run_id or str(uuid.uuid4())
+        worker = self._idle.get()
+        try:
+            if cancel is not None and cancel.is_set():
+                raise RunCancelledError(run_id)
+            return self._run_on(worker, plan, inputs or {}, run_id, cancel, options)
+        finally:
+            worker.pending = None
+            self._idle.put(worker)
+
+    def _run_on(
+        self,
+        worker: _Worker,
+        plan: ExecutionPlan,
+        inputs: Dict[str, Any],
+        run_id: str,
+        cancel: threading.Event | None,
+        options: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        bus = self._bus
+        events = None  # or (forward details, truncated to max_chars)
+        if bus is not None and bus.active:
+            events = (bus.wants_detail, self._max_detail_chars)
+        resend = False
+        while True:
+            pending = worker.pending = _Pending(run_id)
+            try:
+                if resend or plan.key not in worker.plans:
+                    worker.send(("plan", plan.key, plan))
+                    worker.plans[plan.key] = None
+                    while len(worker.plans) > self._max_plans:
+                        worker.plans.popitem(last=False)
+                worker.plans.move_to_end(plan.key)
+                worker.send(("run", run_id, plan.key, inputs, options, events))
+            except (OSError, ValueError, KeyError) as exc:
+                raise WorkerCrashedError(
+                    f"Worker process {worker.slot} is unavailable: {exc}"
+                ) from exc
+
+            cancelled = False
+            while not pending.done.wait(_CANCEL_POLL if cancel is not None else None):
+                if cancel is not None and cancel.is_set() and not cancelled:
+                    cancelled = True
+                    try:
+                        worker.send(("cancel", run_id))
+                    except (OSError, ValueError):
+                        pass
+            reply = pending.reply
+            assert reply is not None
+            if reply[0] != "missing" or resend:
+                break
+            resend = True  # the process was replaced after the plan check: send it again
+        if reply[0] == "missing":
+            raise WorkerCrashedError(f"Worker process {worker.slot} lost plan {plan.key}")
+        if reply[0] == "failed":
+            raise reply[2]
+        _, _, result, profile = reply
+        if profile is not None and self.profiler is not None:
+            self.profiler.record(profile)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "workers": len(self._workers),
+                "idle": self._idle.qsize(),
+                "restarts": self._restarts,
+            }
+
+    def close(self) -> None:
+        """Stop every worker process."""
+        with self._lock:
+            self._closed = True
+            workers, self._workers = self._workers, []
+        for w in workers:
+            w.stop()
+
+    def _ensure_workers(self) -> None:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("WorkerFleet is closed")
+            while len(self._workers) < self._n:
+                w = _Worker(self, len(self._workers))
+                self._workers.append(w)
+                self._idle.put(w)
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from core.blackboard import Blackboard
+from runtime.cache import cache_key
+from runtime.plan import ExecutionPlan, NodeSpec
+
+_MISSING = object()
+DELETED = object()  # value of a write that deleted its key
+
+Write = Tuple[str, Any, Optional[str]]  # (key, value or DELETED, scope)
+Read = Tuple[str, Optional[str], Any]  # (key, scope or None for a chained get, value seen)
+
+
+@dataclass(frozen=True)
+class NodeRecord:
+    """What one node did in a previous run."""
+    definition: str                      # ExecutionPlan.fingerprints entry
+    inputs: str                          # hash of the resolved data inputs
+    outputs: Dict[str, Any]
+    writes: Tuple[Write, ...]            # blackboard writes and deletes, in order
+    reads: Optional[Tuple[Read, ...]] = ()  # None: read in ways that cannot be checked
+
+
+@dataclass(frozen=True)
+class RunSnapshot:
+    inputs: Optional[str]  # hash of the run inputs
+    records: Mapping[str, NodeRecord]
+
+
+def _peek(bb: Blackboard, key: str, scope: Optional[str]) -> Any:
+    """Value a read of ``key`` sees: through the scope chain, or in one scope only."""
+    if scope is None:
+        return bb.get(key, _MISSING)
+    return bb.board(scope).snapshot().get(key, _MISSING)
+
+
+def replay(bb: Blackboard, writes: Iterable[Write]) -> None:
+    """Apply a node's recorded writes and deletes to ``bb``."""
+    for key, value, scope in writes:
+        if value is DELETED:
+            bb.delete(key, scope=scope)
+        else:
+            bb.set(key, value, scope=scope)
+
+
+class RecordingBlackboard:
+    """Blackboard view that remembers every read and write made through it.
+
+    Reads are recorded with the value seen, so a replay can check that the node
+    would read the same thing again. Any other access (snapshots, versions,
+    subscriptions...) makes the node's reads unverifiable (``opaque``).
+    """
+
+    def __init__(self, inner: Blackboard) -> None:
+        self._inner = inner
+        self.writes: List[Write] = []
+        self.reads: List[Read] = []
+        self.opaque = False
+
+    def __getattr__(self, name: str) -> Any:
+        self.opaque = True
+        return getattr(self._inner, name)
+
+    def __len__(self) -> int:
+        self.opaque = True
+        return len(self._inner)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._inner.get(key, _MISSING)
+        self.reads.append((key, None, value))
+        return default if value is _MISSING else value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def set(self, key: str, value: Any, *, scope: str | None = None) -> int:
+        self.writes.append((key, value, scope))
+        return self._inner.set(key, value, scope=scope)
+
+    def update(
+        self, key: str, fn: Callable[[Any], Any], default: Any = None, *, scope: str | None = None
+    ) -> Any:
+        seen: List[Any] = []
+
+        def apply(current: Any) -> Any:
+            seen.append(_peek(self._inner, key, self._scope(scope)))
+            return fn(current)
+
+        value = self._inner.update(key, apply, default, scope=scope)
+        self.reads.append((key, self._scope(scope), seen[-1]))
+        self.writes.append((key, value, scope))
+        return value
+
+    def compare_and_set(
+        self, key: str, version: int, value: Any, *, scope: str | None = None
+    ) -> bool:
+        before = _peek(self._inner, key, self._scope(scope))
+        done = self._inner.compare_and_set(key, version, value, scope=scope)
+        self.reads.append((key, self._scope(scope), before))
+        if done:
+            self.writes.append((key, value, scope))
+        return done
+
+    def delete(self, key: str, *, scope: str | None = None) -> bool:
+        self.reads.append((key, self._scope(scope), _peek(self._inner, key, self._scope(scope))))
+        done = self._inner.delete(key, scope=scope)
+        if done:
+            self.writes.append((key, DELETED, scope))
+        return done
+
+    def _scope(self, scope: str | None) -> str:
+        return self._inner.board(scope).scope
+
+
+class IncrementalRun:
+    """Decides, node by node, whether the previous run's result can be replayed.
+
+    A node is reused when its definition fingerprint and resolved inputs match the
+    previous run, the run inputs are unchanged, every blackboard key it read still
+    holds the value it saw, and none of its exec predecessors produced different
+    outputs or blackboard writes this time.
+    """
+
+    def __init__(
+        self, plan: ExecutionPlan, previous: RunSnapshot | None, inputs: Mapping[str, Any]
+    ) -> None:
+        self._plan = plan
+        self._inputs = cache_key("", {}, inputs)
+        usable = previous is not None and self._inputs is not None
+        self._previous = previous.records if usable and previous.inputs == self._inputs else {}
+        self._records: Dict[str, NodeRecord] = {}
+        self._changed = [False] * len(plan.nodes)
+        self._input_keys: Dict[int, Optional[str]] = {}
+        self.reused = 0
+
+    def lookup(
+        self, spec: NodeSpec, data_inputs: Mapping[str, Any], bb: Blackboard
+    ) -> Optional[NodeRecord]:
+        key = cache_key(spec.type, {}, data_inputs)
+        self._input_keys[spec.index] = key
+        prior = self._previous.get(spec.id)
+        if (
+            prior is None
+            or key is None
+            or prior.definition != self._plan.fingerprints[spec.index]
+            or prior.inputs != key
+            or any(self._changed[p] for p in spec.exec_prev)
+            or not _reads_hold(prior, bb)
+        ):
+            return None
+        self._records[spec.id] = prior
+        self.reused += 1
+        return prior
+
+    def record(
+        self,
+        spec: NodeSpec,
+        outputs: Mapping[str, Any],
+        recorder: RecordingBlackboard | None = None,
+    ) -> None:
+        """Remember what ``spec`` did; ``recorder`` is the board view it ran with
+        (None: it did not touch the blackboard, e.g. served from the result cache)."""
+        key = self._input_keys.get(spec.index)
+        prior = self._previous.get(spec.id)
+        rec = NodeRecord(
+            definition=self._plan.fingerprints[spec.index],
+            inputs=key or "",
+            outputs=dict(outputs),
+            writes=tuple(recorder.writes) if recorder is not None else (),
+            reads=(
+                None if recorder is not None and recorder.opaque
+                else tuple(recorder.reads) if recorder is not None else ()
+            ),
+        )
+        self._changed[spec.index] = prior is None or not _same(prior, rec)
+        if key is not None:
+            self._records[spec.id] = rec
+
+    def snapshot(self) -> RunSnapshot:
+        return RunSnapshot(inputs=self._inputs, records=dict(self._records))
+
+
+def _reads_hold(record: NodeRecord, bb: Blackboard) -> bool:
+    if record.reads is None:
+        return False
+    try:
+        return all(_peek(bb, key, scope) == seen for key, scope, seen in record.reads)
+    except Exception:
+        return False
+
+
+def _same(a: NodeRecord, b: NodeRecord) -> bool:
+    try:
+        return bool(a.outputs == b.outputs and a.writes == b.writes)
+    except Exception:
+        return False
+
+
+class IncrementalStore:
+    """Keeps the last run snapshot per session key (e.g. one per edited graph)."""
+
+    def __init__(self, maxsize: int = 64) -> None:
+        self._maxsize = maxsize
+        self._snapshots: "OrderedDict[str, RunSnapshot]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def begin(
+        self, session: str, plan: ExecutionPlan, inputs: Mapping[str, Any]
+    ) -> IncrementalRun:
+        with self._lock:
+            previous = self._snapshots.get(session)
+        return IncrementalRun(plan, previous, inputs)
+
+    def commit(self, session: str, run: IncrementalRun) -> None:
+        with self._lock:
+            self._snapshots[session] = run.snapshot()
+            self._snapshots.move_to_end(session)
+            while len(self._snapshots) > self._maxsize:
+                self._snapshots.popitem(last=False)
+
+    def discard(self, session: str) -> None:
+        with self._lock:
+            self._snapshots.pop(session, None)
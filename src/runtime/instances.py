@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+from core.node import Node
+from runtime.services import ServiceContainer
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ("process", "graph", "run")
+
+_Key = Tuple[Type[Node], str, str]  # (class, plan key or run id, node id); unused parts are ""
+
+
+@dataclass
+class PoolStats:
+    created: int = 0
+    reused: int = 0
+    torn_down: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class InstancePool:
+    """Warm node instances, reused across executions according to ``Node.SCOPE``.
+
+    ``process`` instances are shared by every graph, ``graph`` instances by the runs
+    of one compiled plan (per node id), and ``run`` instances by the leases of one run
+    (per node id) until end_run(run_id) tears them down; leased without a run id, a
+    ``run`` instance is set up for that lease only. A leased instance is never handed
+    to two callers at once; concurrent executions get separate instances, each set up
+    once.
+    At most ``max_idle`` idle instances are kept per key and graph-scoped instances
+    are kept for the ``max_graphs`` most recently used plans.
+    """
+
+    def __init__(
+        self, services: ServiceContainer, *, max_idle: int = 8, max_graphs: int = 64
+    ) -> None:
+        self.services = services
+        self._max_idle = max_idle
+        self._max_graphs = max_graphs
+        self._idle: Dict[_Key, List[Node]] = {}
+        self._graphs: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = PoolStats()
+
+    @staticmethod
+    def _key(cls: Type[Node], plan_key: str, node_id: str, run_id: str) -> Optional[_Key]:
+        scope = cls.SCOPE
+        if scope == "process":
+            return cls, "", ""
+        if scope == "graph":
+            return cls, plan_key, node_id
+        if scope == "run":
+            return (cls, run_id, node_id) if run_id else None
+        raise ValueError(f"{cls.TYPE_NAME}: unknown SCOPE {scope!r} (expected one of {SCOPES})")
+
+    def acquire_idle(
+        self, cls: Type[Node], plan_key: str, node_id: str, run_id: str = ""
+    ) -> Optional[Node]:
+        """A warm instance if one is idle, else None (never runs ``setup``)."""
+        key = self._key(cls, plan_key, node_id, run_id)
+        if key is None:
+            return None
+        with self._lock:
+            idle = self._idle.get(key)
+            if not idle:
+                return None
+            self._stats.reused += 1
+            if cls.SCOPE == "graph":
+                self._graphs.move_to_end(key[1])
+            return idle.pop()
+
+    def acquire(self, cls: Type[Node], plan_key: str, node_id: str, run_id: str = "") -> Node:
+        """A warm instance, or a new one after ``setup`` has run."""
+        node = self.acquire_idle(cls, plan_key, node_id, run_id)
+        if node is not None:
+            return node
+        node = cls()
+        node.setup(self.services)
+        with self._lock:
+            self._stats.created += 1
+        return node
+
+    def release(
+        self,
+        cls: Type[Node],
+        plan_key: str,
+        node_id: str,
+        node: Node,
+        *,
+        run_id: str = "",
+        discard: bool = False,
+    ) -> None:
+        """Return a leased instance; ``discard`` tears it down instead (e.g. after an error)."""
+        key = self._key(cls, plan_key, node_id, run_id)
+        gone = [node]
+        if key is not None and not discard:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self._max_idle:
+                    idle.append(node)
+                    gone = self._touch_graph(key[1]) if cls.SCOPE == "graph" else []
+        self._teardown(gone)
+
+    @contextmanager
+    def lease(
+        self, cls: Type[Node], plan_key: str, node_id: str, run_id: str = ""
+    ) -> Iterator[Node]:
+        node = self.acquire(cls, plan_key, node_id, run_id)
+        try:
+            yield node
+        except BaseException:
+            self.release(cls, plan_key, node_id, node, run_id=run_id, discard=True)
+            raise
+        self.release(cls, plan_key, node_id, node, run_id=run_id)
+
+    def end_run(self, run_id: str) -> None:
+        """Tear down the idle run-scoped instances of a finished run."""
+        with self._lock:
+            keys = [k for k in self._idle if k[1] == run_id and k[0].SCOPE == "run"]
+            nodes = [n for k in keys for n in self._idle.pop(k)]
+        self._teardown(nodes)
+
+    def evict_graph(self, plan_key: str) -> None:
+        """Tear down the idle graph-scoped instances of one plan."""
+        with self._lock:
+            self._graphs.pop(plan_key, None)
+            nodes = self._pop_graph(plan_key)
+        self._teardown(nodes)
+
+    def close(self) -> None:
+        """Tear down every idle instance."""
+        with self._lock:
+            nodes = [n for idle in self._idle.values() for n in idle]
+            self._idle.clear()
+            self._graphs.clear()
+        self._teardown(nodes)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            idle = sum(len(v) for v in self._idle.values())
+            return {"idle": idle, **self._stats.as_dict()}
+
+    def _touch_graph(self, plan_key: str) -> List[Node]:
+        # caller holds self._lock
+        self._graphs[plan_key] = None
+        self._graphs.move_to_end(plan_key)
+        evicted: List[Node] = []
+        while len(self._graphs) > self._max_graphs:
+            old, _ = self._graphs.popitem(last=False)
+            evicted.extend(self._pop_graph(old))
+        return evicted
+
+    def _pop_graph(self, plan_key: str) -> List[Node]:
+        # caller holds self._lock
+        nodes: List[Node] = []
+        for key in [k for k in self._idle if k[1] == plan_key and k[0].SCOPE == "graph"]:
+            nodes.extend(self._idle.pop(key))
+        return nodes
+
+    def _teardown(self, nodes: List[Node]) -> None:
+        for node in nodes:
+            try:
+                node.teardown()
+            except Exception:
+                logger.exception("Teardown of %s failed", type(node).TYPE_NAME)
+        if nodes:
+            with self._lock:
+                self._stats.torn_down += len(nodes)
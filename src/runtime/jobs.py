@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Deque, Dict, List
+
+from runtime.engine import Engine, RunCancelledError
+from runtime.plan import ExecutionPlan
+
+if TYPE_CHECKING:
+    from runtime.fleet import WorkerFleet
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+DONE = frozenset({SUCCEEDED, FAILED, CANCELLED})
+
+
+class QueueFullError(RuntimeError):
+    """Raised by RunQueue.submit when no queue slot is free."""
+
+
+@dataclass
+class RunJob:
+    """Handle for a run submitted to a RunQueue."""
+    run_id: str
+    plan: ExecutionPlan
+    inputs: Dict[str, Any]
+    options: Dict[str, Any] = field(default_factory=dict)  # extra Engine.run kwargs
+    status: str = QUEUED
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    result: Dict[str, Any] | None = None
+    error: str | None = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    done_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in DONE
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self.done_event.wait(timeout)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class RunQueue:
+    """Bounded in-process job queue served by a pool of worker threads.
+
+    Each thread runs its job on ``engine``, either an Engine or a WorkerFleet.
+    At most ``maxsize`` jobs wait at a time (0 for no limit); a cancelled job
+    leaves the queue at once and frees its slot.
+    """
+
+    def __init__(
+        self, engine: Engine | WorkerFleet, *, workers: int = 4, maxsize: int = 64, keep: int = 1000
+    ) -> None:
+        self._engine = engine
+        self._maxsize = maxsize
+        self._queue: Deque[RunJob | None] = deque()  # None tells a worker to exit
+        self._jobs: "OrderedDict[str, RunJob]" = OrderedDict()
+        self._keep = keep
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._n_workers = workers
+        self._workers: List[threading.Thread] = []
+
+    def submit(
+        self, plan: ExecutionPlan, inputs: Dict[str, Any] | None = None, **options: Any
+    ) -> RunJob:
+        self._ensure_workers()
+        job = RunJob(
+            run_id=str(uuid.uuid4()), plan=plan, inputs=dict(inputs or {}), options=options
+        )
+        with self._lock:
+            if 0 < self._maxsize <= len(self._queue):
+                raise QueueFullError(f"Run queue is full ({self._maxsize} pending)")
+            self._jobs[job.run_id] = job
+            self._trim()
+            self._queue.append(job)
+            self._ready.notify()
+        return job
+
+    def get(self, run_id: str) -> RunJob:
+        with self._lock:
+            if run_id not in self._jobs:
+                raise KeyError(f"Unknown run: {run_id}")
+            return self._jobs[run_id]
+
+    def cancel(self, run_id: str) -> RunJob:
+        """Cancel a queued run at once; a running one stops before its next node."""
+        job = self.get(run_id)
+        with self._lock:
+            if job.status == QUEUED:
+                self._queue.remove(job)
+                self._settle(job, CANCELLED)
+            elif job.status == RUNNING:
+                job.cancel_event.set()
+        return job
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+    def shutdown(self, wait: bool = True) -> None:
+        workers, self._workers = self._workers, []
+        with self._lock:
+            self._queue.extend([None] * len(workers))
+            self._ready.notify_all()
+        if wait:
+            for t in workers:
+                t.join()
+
+    def _ensure_workers(self) -> None:
+        with self._lock:
+            while len(self._workers) < self._n_workers:
+                t = threading.Thread(
+                    target=self._work, name=f"agentflow-run-{len(self._workers)}", daemon=True
+                )
+                t.start()
+                self._workers.append(t)
+
+    def _work(self) -> None:
+        while True:
+            with self._lock:
+                while not self._queue:
+                    self._ready.wait()
+                job = self._queue.popleft()
+                if job is None:
+                    return
+                job.status = RUNNING
+                job.started_at = time.time()
+            try:
+                result = self._engine.run(
+                    job.plan,
+                    inputs=job.inputs,
+                    run_id=job.run_id,
+                    cancel=job.cancel_event,
+                    **job.options,
+                )
+            except RunCancelledError:
+                self._finish(job, CANCELLED)
+            except Exception as exc:
+                self._finish(job, FAILED, error=f"{type(exc).__name__}: {exc}")
+            else:
+                self._finish(job, SUCCEEDED, result=result)
+
+    def _finish(self, job: RunJob, status: str, **fields: Any) -> None:
+        with self._lock:
+            self._settle(job, status, **fields)
+
+    @staticmethod
+    def _settle(job: RunJob, status: str, **fields: Any) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        for k, v in fields.items():
+            setattr(job, k, v)
+        job.done_event.set()
+
+    def _trim(self) -> None:
+        if len(self._jobs) <= self._keep:
+            return
+        for run_id in [rid for rid, j in self._jobs.items() if j.done]:
+            del self._jobs[run_id]
+            if len(self._jobs) <= self._keep:
+                break
@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import pickle
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from runtime.plan import ExecutionPlan
+
+logger = logging.getLogger(__name__)
+
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+
+_NODE = "node"
+_WRITE = "write"
+_DELETE = "delete"
+_FLUSH = object()
+_PLAN = object()  # statement placeholder: store this plan unless already stored
+
+
+@dataclass
+class JournaledRun:
+    """What a run's journal holds: enough to resume it with Engine.resume()."""
+    run_id: str
+    plan: ExecutionPlan
+    inputs: Dict[str, Any]
+    options: Dict[str, Any]
+    status: str
+    outputs: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # completed node outputs
+    blackboard: Dict[str, Any] = field(default_factory=dict)  # inputs plus run-scope writes
+    next_seq: int = 0
+
+
+class RunJournal:
+    """Append-only SQLite journal of node completions and blackboard writes.
+
+    Only the run's own (run-scope) board is journaled. Graph- and global-scope
+    writes are shared with other runs, so they are neither recorded nor restored
+    by a resume; nodes that must survive a crash should write to the run scope.
+
+    Records are pickled on the calling thread and appended by a writer thread that
+    commits everything queued within ``commit_interval`` seconds as one
+    transaction (group commit), in WAL mode. A crash can therefore lose at most the
+    last interval's records; those nodes simply run again on resume. Plans are
+    immutable, so the writer thread pickles and stores each one only the first
+    time it sees its key.
+
+    Every ``compact_every`` commits, superseded blackboard writes of unfinished
+    runs are dropped, runs that finished more than ``retain`` seconds ago are
+    deleted with their records, and the WAL is checkpointed.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        commit_interval: float = 0.05,
+        compact_every: int = 1000,
+        retain: float = 24 * 3600.0,
+    ) -> None:
+        self._interval = commit_interval
+        self._compact_every = compact_every
+        self._retain = retain
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS plans (key TEXT PRIMARY KEY, plan BLOB NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " run_id TEXT PRIMARY KEY, plan_key TEXT NOT NULL, inputs BLOB NOT NULL,"
+            " options BLOB NOT NULL, status TEXT NOT NULL, started REAL NOT NULL,"
+            " finished REAL);"
+            "CREATE TABLE IF NOT EXISTS records ("
+            " run_id TEXT NOT NULL, seq INTEGER NOT NULL, kind TEXT NOT NULL,"
+            " name TEXT NOT NULL, value BLOB NOT NULL, PRIMARY KEY (run_id, seq)"
+            ") WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS runs_status ON runs(status, finished);"
+        )
+        self._lock = threading.Lock()  # guards the connection
+        self._stored = {k for (k,) in self._db.execute("SELECT key FROM plans")}
+        self._seq: Dict[str, int] = {}
+        self._seq_lock = threading.Lock()
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._commits = 0
+        self._closed = False
+        self._writer = threading.Thread(
+            target=self._write_loop, name="agentflow-journal", daemon=True
+        )
+        self._writer.start()
+        atexit.register(self.close)  # commit what the last interval queued
+
+    def begin(
+        self,
+        run_id: str,
+        plan: ExecutionPlan,
+        inputs: Dict[str, Any] | None,
+        options: Dict[str, Any] | None = None,
+    ) -> None:
+        args = pickle.dumps(dict(inputs or {}), protocol=pickle.HIGHEST_PROTOCOL)
+        opts = pickle.dumps(dict(options or {}), protocol=pickle.HIGHEST_PROTOCOL)
+        with self._seq_lock:
+            self._seq[run_id] = 0
+        self._queue.put((
+            (_PLAN, plan),
+            (
+                "INSERT OR REPLACE INTO runs(run_id, plan_key, inputs, options, status, started)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, plan.key, args, opts, RUNNING, time.time()),
+            ),
+        ))
+
+    def node(self, run_id: str, node_id: str, outputs: Dict[str, Any]) -> None:
+        """Record that ``node_id`` completed with ``outputs``."""
+        self._append(run_id, _NODE, node_id, outputs)
+
+    def write(self, run_id: str, key: str, value: Any) -> None:
+        """Record a write to the run's blackboard."""
+        self._append(run_id, _WRITE, key, value)
+
+    def delete(self, run_id: str, key: str) -> None:
+        self._append(run_id, _DELETE, key, None)
+
+    def finish(self, run_id: str) -> None:
+        """Mark the run succeeded; its records are dropped at the next compaction
+        after ``retain`` seconds."""
+        with self._seq_lock:
+            self._seq.pop(run_id, None)
+        self._queue.put((
+            ("UPDATE runs SET status = ?, finished = ? WHERE run_id = ?",
+             (SUCCEEDED, time.time(), run_id)),
+        ))
+
+    def flush(self) -> None:
+        """Wait until everything recorded so far is committed."""
+        if self._closed:
+            return
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        done.wait()
+
+    def _append(self, run_id: str, kind: str, name: str, value: Any) -> None:
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as exc:
+            logger.warning("Not journaling %s %r of run %s: %s", kind, name, run_id, exc)
+            return
+        with self._seq_lock:
+            seq = self._seq.get(run_id)
+            if seq is None:
+                return  # finished, or not begun in this process
+            self._seq[run_id] = seq + 1
+        self._queue.put((
+            ("INSERT OR REPLACE INTO records(run_id, seq, kind, name, value)"
+             " VALUES (?, ?, ?, ?, ?)", (run_id, seq, kind, name, blob)),
+        ))
+
+    def load(self, run_id: str) -> JournaledRun:
+        """The journaled state of a run (after flushing pending records)."""
+        self.flush()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT p.plan, r.inputs, r.options, r.status FROM runs r"
+                " JOIN plans p ON p.key = r.plan_key WHERE r.run_id = ?",
+                (run_id,),
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"No journal for run: {run_id}")
+            records = self._db.execute(
+                "SELECT seq, kind, name, value FROM records WHERE run_id = ? ORDER BY seq",
+                (run_id,),
+            ).fetchall()
+        run = JournaledRun(
+            run_id=run_id,
+            plan=pickle.loads(row[0]),
+            inputs=pickle.loads(row[1]),
+            options=pickle.loads(row[2]),
+            status=row[3],
+        )
+        run.blackboard = dict(run.inputs)
+        for seq, kind, name, value in records:
+            run.next_seq = seq + 1
+            if kind == _NODE:
+                run.outputs[name] = pickle.loads(value)
+            elif kind == _WRITE:
+                run.blackboard[name] = pickle.loads(value)
+            else:
+                run.blackboard.pop(name, None)
+        return run
+
+    def resume(self, run_id: str) -> JournaledRun:
+        """Load a run and keep journaling it (marked running again) after its last record."""
+        run = self.load(run_id)
+        with self._seq_lock:
+            self._seq[run_id] = run.next_seq
+        self._queue.put((
+            ("UPDATE runs SET status = ?, finished = NULL WHERE run_id = ?", (RUNNING, run_id)),
+        ))
+        return run
+
+    def runs(self, status: str | None = None) -> List[Dict[str, Any]]:
+        """Journaled runs, newest first; ``status="running"`` lists resumable ones."""
+        self.flush()
+        sql = (
+            "SELECT r.run_id, r.plan_key, r.status, r.started, r.finished,"
+            " (SELECT COUNT(*) FROM records x WHERE x.run_id = r.run_id AND x.kind = ?)"
+            " FROM runs r"
+        )
+        args: Tuple[Any, ...] = (_NODE,)
+        if status is not None:
+            sql += " WHERE r.status = ?"
+            args += (status,)
+        with self._lock:
+            rows = self._db.execute(sql + " ORDER BY r.started DESC", args).fetchall()
+        return [
+            {
+                "run_id": r[0], "plan_key": r[1], "status": r[2], "started_at": r[3],
+                "finished_at": r[4], "nodes_completed": r[5],
+            }
+            for r in rows
+        ]
+
+    def compact(self) -> None:
+        """Drop superseded blackboard writes and expired runs; checkpoint the WAL."""
+        with self._lock:
+            self._compact()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+        with self._lock:
+            self._db.close()
+
+    def _compact(self) -> None:
+        db = self._db
+        db.execute("BEGIN")
+        try:
+            # only the last write or delete of each key matters when resuming
+            db.execute(
+                "DELETE FROM records WHERE kind IN (?, ?) AND (run_id, seq) NOT IN ("
+                " SELECT run_id, MAX(seq) FROM records WHERE kind IN (?, ?)"
+                " GROUP BY run_id, name)",
+                (_WRITE, _DELETE, _WRITE, _DELETE),
+            )
+            expired = time.time() - self._retain
+            db.execute(
+                "DELETE FROM records WHERE run_id IN"
+                " (SELECT run_id FROM runs WHERE status = ? AND finished < ?)",
+                (SUCCEEDED, expired),
+            )
+            db.execute("DELETE FROM runs WHERE status = ? AND finished < ?", (SUCCEEDED, expired))
+            db.execute("DELETE FROM plans WHERE key NOT IN (SELECT plan_key FROM runs)")
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        self._stored = {k for (k,) in db.execute("SELECT key FROM plans")}
+        db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def _store_plan(self, plan: ExecutionPlan, plans: set[str]) -> None:
+        # caller holds self._lock, inside the commit's transaction
+        if plan.key in self._stored or plan.key in plans:
+            return
+        blob = pickle.dumps(plan, protocol=pickle.HIGHEST_PROTOCOL)
+        self._db.execute("INSERT OR IGNORE INTO plans(key, plan) VALUES (?, ?)", (plan.key, blob))
+        plans.add(plan.key)
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self._interval
+            while True:  # gather everything that arrives within the commit interval
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+                if item[0] is _FLUSH:
+                    break
+            self._commit(batch)
+
+    def _commit(self, batch: List[Any]) -> None:
+        flushes = [item[1] for item in batch if item[0] is _FLUSH]
+        statements = [stmt for item in batch if item[0] is not _FLUSH for stmt in item]
+        try:
+            with self._lock:
+                db = self._db
+                plans: set[str] = set()  # stored by this transaction
+                db.execute("BEGIN")
+                try:
+                    for sql, args in statements:
+                        if sql is _PLAN:
+                            self._store_plan(args, plans)
+                        else:
+                            db.execute(sql, args)
+                    db.execute("COMMIT")
+                except BaseException:
+                    db.execute("ROLLBACK")
+                    raise
+                self._stored.update(plans)
+                self._commits += 1
+                if self._compact_every and self._commits % self._compact_every == 0:
+                    self._compact()
+        except Exception:
+            logger.exception("Run journal commit failed (%d statements lost)", len(statements))
+        finally:
+            for done in flushes:
+                done.set()
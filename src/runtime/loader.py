@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Tuple
+
+from ir import BINARY_MAGIC, canonicalize, ir_version, open_ir
+from runtime.plan import ExecutionPlan, compile_plan
+from server.schemas import GraphModel
+
+GraphPath = str | os.PathLike[str]
+
+
+def parse_graph(data: bytes) -> GraphModel:
+    """Validate a JSON graph document of any supported version.
+
+    The format is decided on the parsed document (``ir_version``), and 0.1 IR is
+    upgraded before validation. Malformed JSON raises pydantic's ValidationError.
+    """
+    try:
+        doc = json.loads(data)
+    except ValueError:
+        return GraphModel.model_validate_json(data)
+    if isinstance(doc, dict) and ir_version(doc) == "0.1":
+        doc = canonicalize(doc)
+    return GraphModel.model_validate(doc)
+
+
+class _Entry:
+    __slots__ = ("stat", "digest", "graph", "_plan", "_lock")
+
+    def __init__(self, stat: Tuple[int, int], digest: str, graph: GraphModel) -> None:
+        self.stat = stat
+        self.digest = digest
+        self.graph = graph
+        self._plan: ExecutionPlan | None = None
+        self._lock = threading.Lock()
+
+    def plan(self) -> ExecutionPlan:
+        if self._plan is None:
+            with self._lock:
+                if self._plan is None:
+                    self._plan = compile_plan(self.graph, key=self.digest)
+        return self._plan
+
+
+class GraphLoader:
+    """Canonical GraphModels and compiled plans of graph files, cached by path.
+
+    Files in any supported format (0.1 IR as JSON or binary, 0.2 graph JSON) are
+    upgraded once. An entry is reused while the file's mtime and size are
+    unchanged; when they change the file is re-read, and the entry is still reused
+    if its content hash matches. At most ``maxsize`` files are kept (LRU).
+    """
+
+    def __init__(self, maxsize: int = 64) -> None:
+        self._maxsize = maxsize
+        self._entries: "OrderedDict[Path, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, path: GraphPath) -> GraphModel:
+        return self._entry(path).graph
+
+    def plan(self, path: GraphPath) -> ExecutionPlan:
+        return self._entry(path).plan()
+
+    def invalidate(self, path: GraphPath | None = None) -> None:
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(Path(path).resolve(), None)
+
+    def _entry(self, path: GraphPath) -> _Entry:
+        p = Path(path).resolve()
+        st = p.stat()
+        stat = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._entries.get(p)
+            if entry is not None and entry.stat == stat:
+                self._entries.move_to_end(p)
+                return entry
+        data = p.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        if entry is not None and entry.digest == digest:
+            entry.stat = stat
+            return entry
+        if data[:4] == BINARY_MAGIC:
+            with open_ir(p) as doc:
+                graph = GraphModel.model_validate(canonicalize(doc))
+        else:
+            graph = parse_graph(data)
+        entry = _Entry(stat, digest, graph)
+        with self._lock:
+            self._entries[p] = entry
+            self._entries.move_to_end(p)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+        return entry
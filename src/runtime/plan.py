@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import threading
+import weakref
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass, field, fields
+from functools import cached_property
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Literal, Mapping, Sequence, Tuple, Type
+
+from core.node import Node
+from core.registry import REGISTRY
+from server.schemas import GraphModel
+
+ScheduleMode = Literal["exec", "dataflow"]
+
+
+class GraphError(ValueError):
+    """Raised when a graph cannot be turned into a runnable plan."""
+
+
+@dataclass(frozen=True)
+class NodeSpec:
+    """Resolved, index-addressed view of a single graph node."""
+    index: int
+    id: str
+    type: str
+    cls: Type[Node]
+    params: Mapping[str, Any]
+    defaults: Mapping[str, Any]
+    bindings: Tuple[Tuple[str, int, str], ...]  # (dst_port, src_index, src_port)
+    exec_next: Tuple[int, ...]
+    exec_prev: Tuple[int, ...]
+    cacheable: bool = False
+
+    @property
+    def data_prev(self) -> Tuple[int, ...]:
+        return tuple(dict.fromkeys(src for _, src, _ in self.bindings))
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return _reduce_frozen(self)
+
+
+@dataclass(frozen=True)
+class Schedule:
+    """Dependency counts and successor lists walked by the engine's scheduler."""
+    prev_count: Tuple[int, ...]
+    next: Tuple[Tuple[int, ...], ...]
+    roots: Tuple[int, ...]
+    size: int  # number of nodes the schedule will run
+
+    def order(self) -> List[int]:
+        """Node indices in the order Engine.run visits them."""
+        pending = list(self.prev_count)
+        ready = deque(self.roots)
+        order: List[int] = []
+        while ready:
+            i = ready.popleft()
+            order.append(i)
+            for j in self.next[i]:
+                pending[j] -= 1
+                if pending[j] == 0:
+                    ready.append(j)
+        return order
+
+
+@dataclass(frozen=True)
+class ExecutionPlan:
+    """Immutable, run-ready form of a GraphModel."""
+    key: str
+    meta: Mapping[str, Any]
+    nodes: Tuple[NodeSpec, ...]
+    index: Mapping[str, int]
+    exec_prev_count: Tuple[int, ...]
+    roots: Tuple[int, ...]
+    order: Tuple[int, ...]  # one valid topological order of the exec graph
+    _targets: Dict[Tuple[str, ...], Schedule] = field(
+        default_factory=dict, compare=False, repr=False
+    )
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return _reduce_frozen(self)
+
+    @cached_property
+    def exec_schedule(self) -> Schedule:
+        return Schedule(
+            prev_count=self.exec_prev_count,
+            next=tuple(n.exec_next for n in self.nodes),
+            roots=self.roots,
+            size=len(self.nodes),
+        )
+
+    @cached_property
+    def fingerprints(self) -> Tuple[str, ...]:
+        """Per-node hash of everything in the graph that defines the node's behaviour."""
+        out = []
+        for n in self.nodes:
+            blob = json.dumps(
+                [
+                    n.type,
+                    dict(n.params),
+                    dict(n.defaults),
+                    sorted((p, self.nodes[s].id, sp) for p, s, sp in n.bindings),
+                    sorted(self.nodes[p].id for p in n.exec_prev),
+                ],
+                sort_keys=True,
+                default=repr,
+            )
+            out.append(hashlib.sha256(blob.encode("utf-8")).hexdigest())
+        return tuple(out)
+
+    @cached_property
+    def dep_prev(self) -> Tuple[Tuple[int, ...], ...]:
+        """Exec predecessors plus data producers of every node."""
+        return tuple(tuple(dict.fromkeys(n.exec_prev + n.data_prev)) for n in self.nodes)
+
+    @cached_property
+    def dataflow_schedule(self) -> Schedule:
+        """Schedule ordered by exec edges and data edges together."""
+        next_: List[List[int]] = [[] for _ in self.nodes]
+        for i, prev in enumerate(self.dep_prev):
+            for j in prev:
+                next_[j].append(i)
+        prev_count = [len(p) for p in self.dep_prev]
+        _, stuck = topological_order(next_, prev_count)
+        if stuck:
+            ids = [self.nodes[i].id for i in _find_cycle(self.dep_prev, stuck)]
+            raise GraphError(f"Data flow has a cycle ({' -> '.join(ids)})")
+        return Schedule(
+            prev_count=tuple(prev_count),
+            next=tuple(tuple(n) for n in next_),
+            roots=tuple(i for i, c in enumerate(prev_count) if c == 0),
+            size=len(self.nodes),
+        )
+
+    def schedule(
+        self, mode: ScheduleMode = "exec", targets: Iterable[str] | None = None
+    ) -> Schedule:
+        """Pick the schedule for a run.
+
+        With ``targets``, only the transitive exec/data dependencies of those nodes are
+        scheduled (pull evaluation); ``mode`` is then implied to be "dataflow".
+        """
+        if targets is None:
+            return self.dataflow_schedule if mode == "dataflow" else self.exec_schedule
+        key = tuple(sorted(set(targets)))
+        cached = self._targets.get(key)
+        if cached is None:
+            cached = self._targets[key] = self._pull_schedule(key)
+        return cached
+
+    def _pull_schedule(self, targets: Tuple[str, ...]) -> Schedule:
+        base = self.dataflow_schedule
+        active = [False] * len(self.nodes)
+        stack = [_resolve(self.index, t, "Target") for t in targets]
+        while stack:
+            i = stack.pop()
+            if not active[i]:
+                active[i] = True
+                stack.extend(self.dep_prev[i])
+        prev_count = tuple(c if active[i] else 0 for i, c in enumerate(base.prev_count))
+        return Schedule(
+            prev_count=prev_count,
+            next=tuple(
+                tuple(j for j in nxt if active[j]) if active[i] else ()
+                for i, nxt in enumerate(base.next)
+            ),
+            roots=tuple(i for i in base.roots if active[i]),
+            size=sum(active),
+        )
+
+
+def graph_key(graph: GraphModel) -> str:
+    """Stable content hash of a graph."""
+    blob = json.dumps(graph.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def topological_order(
+    next_: Sequence[Sequence[int]], prev_count: Sequence[int]
+) -> Tuple[List[int], List[int]]:
+    """Kahn's algorithm. Returns (order, indices that never became ready)."""
+    remaining = list(prev_count)
+    ready = deque(i for i, c in enumerate(remaining) if c == 0)
+    order: List[int] = []
+    while ready:
+        i = ready.popleft()
+        order.append(i)
+        for j in next_[i]:
+            remaining[j] -= 1
+            if remaining[j] == 0:
+                ready.append(j)
+    stuck = [i for i, c in enumerate(remaining) if c > 0]
+    return order, stuck
+
+
+def _find_cycle(prev: Sequence[Sequence[int]], stuck: Sequence[int]) -> List[int]:
+    """Every stuck node has a stuck predecessor, so walking backwards must loop."""
+    stuck_set = set(stuck)
+    seen: dict[int, int] = {}
+    path: List[int] = []
+    i = stuck[0]
+    while i not in seen:
+        seen[i] = len(path)
+        path.append(i)
+        i = next(j for j in prev[i] if j in stuck_set)
+    cycle = path[seen[i]:]
+    cycle.reverse()
+    return cycle + [cycle[0]]
+
+
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+
+def _reduce_frozen(obj: Any) -> Tuple[Any, ...]:
+    """Pickle a plan dataclass: mappingproxy fields travel as dicts, and derived
+    (compare=False) fields are rebuilt on the other side."""
+    values = {f.name: getattr(obj, f.name) for f in fields(obj) if f.compare}
+    values = {k: dict(v) if isinstance(v, MappingProxyType) else v for k, v in values.items()}
+    return _unreduce_frozen, (type(obj), values)
+
+
+def _unreduce_frozen(cls: type, values: Dict[str, Any]) -> Any:
+    return cls(**{k: MappingProxyType(v) if isinstance(v, dict) else v for k, v in values.items()})
+
+
+def _frozen(d: Mapping[str, Any]) -> Mapping[str, Any]:
+    return MappingProxyType(copy.deepcopy(dict(d))) if d else _EMPTY
+
+
+def _resolve(index: Mapping[str, int], node_id: str, what: str) -> int:
+    try:
+        return index[node_id]
+    except KeyError:
+        raise GraphError(f"{what} references unknown node: {node_id}") from None
+
+
+def compile_plan(graph: GraphModel, *, key: str | None = None) -> ExecutionPlan:
+    index = {n.id: i for i, n in enumerate(graph.nodes)}
+    if len(index) != len(graph.nodes):
+        dupes = sorted(k for k, c in Counter(n.id for n in graph.nodes).items() if c > 1)
+        raise GraphError(f"Duplicate node ids: {dupes}")
+
+    bindings: List[List[Tuple[str, int, str]]] = [[] for _ in graph.nodes]
+    for e in graph.edges.data:
+        src_id, src_port = e.src
+        dst_id, dst_port = e.dst
+        src = _resolve(index, src_id, "Data edge")
+        dst = _resolve(index, dst_id, "Data edge")
+        bindings[dst].append((dst_port, src, src_port))
+
+    exec_next: List[List[int]] = [[] for _ in graph.nodes]
+    exec_prev: List[List[int]] = [[] for _ in graph.nodes]
+    for e in graph.edges.exec:
+        src = _resolve(index, e.src, "Exec edge")
+        dst = _resolve(index, e.dst, "Exec edge")
+        exec_next[src].append(dst)
+        exec_prev[dst].append(src)
+
+    prev_count = [len(p) for p in exec_prev]
+    order, stuck = topological_order(exec_next, prev_count)
+    if stuck:
+        ids = [graph.nodes[i].id for i in _find_cycle(exec_prev, stuck)]
+        unreachable = sorted(graph.nodes[i].id for i in stuck)
+        raise GraphError(
+            f"Exec graph has a cycle ({' -> '.join(ids)}); "
+            f"unreachable nodes: {unreachable}"
+        )
+
+    nodes = tuple(
+        NodeSpec(
+            index=i,
+            id=n.id,
+            type=n.type,
+            cls=REGISTRY.get(n.type),
+            params=_frozen(n.params),
+            defaults=_frozen(n.inputs),
+            bindings=tuple(bindings[i]),
+            exec_next=tuple(exec_next[i]),
+            exec_prev=tuple(exec_prev[i]),
+            cacheable=n.cache if n.cache is not None else REGISTRY.get(n.type).CACHEABLE,
+        )
+        for i, n in enumerate(graph.nodes)
+    )
+    return ExecutionPlan(
+        key=key or graph_key(graph),
+        meta=_frozen(graph.meta),
+        nodes=nodes,
+        index=MappingProxyType(index),
+        exec_prev_count=tuple(prev_count),
+        roots=tuple(i for i, c in enumerate(prev_count) if c == 0),
+        order=tuple(order),
+    )
+
+
+class PlanCache:
+    """LRU cache of compiled plans keyed by graph content hash.
+
+    The hash is computed once per GraphModel instance, so running the same model
+    again costs a dict lookup. Models are treated as immutable once compiled: after
+    editing one in place, call forget(graph) (or pass a copy).
+    """
+
+    def __init__(self, maxsize: int = 128) -> None:
+        self._maxsize = maxsize
+        self._plans: "OrderedDict[str, ExecutionPlan]" = OrderedDict()
+        # id(graph) -> (weak ref to the graph, its key)
+        self._keys: Dict[int, Tuple["weakref.ref[GraphModel]", str]] = {}
+        self._lock = threading.Lock()
+
+    def key(self, graph: GraphModel) -> str:
+        """graph_key(graph), memoized per model instance."""
+        memo = self._keys.get(id(graph))
+        if memo is not None and memo[0]() is graph:
+            return memo[1]
+        key, gid = graph_key(graph), id(graph)
+        # the callback runs before the id can be reused by another object
+        ref = weakref.ref(graph, lambda _: self._keys.pop(gid, None))
+        self._keys[gid] = (ref, key)
+        return key
+
+    def forget(self, graph: GraphModel) -> None:
+        """Drop the memoized key of a model that was edited in place."""
+        self._keys.pop(id(graph), None)
+
+    def get(self, graph: GraphModel) -> ExecutionPlan:
+        key = self.key(graph)
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                return plan
+        plan = compile_plan(graph, key=key)
+        with self._lock:
+            self._plans[key] = plan
+            while len(self._plans) > self._maxsize:
+                self._plans.popitem(last=False)
+        return plan
+
+    def invalidate(self, key: str | None = None) -> None:
+        with self._lock:
+            if key is None:
+                self._plans.clear()
+            else:
+                self._plans.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._plans
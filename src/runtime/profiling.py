@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+TIME_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+SIZE_BUCKETS = tuple(float(64 * 4 ** i) for i in range(10))  # 64 B .. 16 MiB
+
+
+class Histogram:
+    """Prometheus-style histogram with fixed upper bounds."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        out: List[Tuple[str, int]] = []
+        total = 0
+        for bound, n in zip(self.bounds + (float("inf"),), self.counts, strict=True):
+            total += n
+            out.append(("+Inf" if bound == float("inf") else repr(bound), total))
+        return out
+
+
+def output_size(out: Mapping[str, Any]) -> int:
+    """Approximate size of a node's outputs in bytes (strings/bytes by length, others shallow)."""
+    size = 0
+    for value in out.values():
+        if isinstance(value, (str, bytes, bytearray)):
+            size += len(value)
+        else:
+            size += sys.getsizeof(value)
+    return size
+
+
+@dataclass
+class NodeTiming:
+    node_id: str
+    type: str
+    start: float       # seconds since the run started
+    wall: float
+    cpu: Optional[float]  # None when not measurable (async or process nodes)
+    queue_wait: float  # ready -> started
+    output_bytes: int
+    cached: bool
+    thread: int
+
+
+class RunProfile:
+    """Timings of one run. Times are seconds relative to the run's start."""
+
+    def __init__(self, run_id: str) -> None:
+        self.run_id = run_id
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.nodes: List[NodeTiming] = []
+        self.wall = 0.0
+        self.busy = 0.0       # sum of node wall times
+        self.scheduler = 0.0  # time spent choosing/launching nodes
+        self.events = 0.0     # time spent publishing node events
+
+    def now(self) -> float:
+        return time.perf_counter() - self._t0
+
+    def node(
+        self,
+        node_id: str,
+        type_name: str,
+        ready: float,
+        start: float,
+        end: float,
+        cpu: Optional[float],
+        out: Mapping[str, Any],
+        cached: bool,
+        thread: Optional[int] = None,
+    ) -> None:
+        self.nodes.append(
+            NodeTiming(
+                node_id=node_id,
+                type=type_name,
+                start=start,
+                wall=end - start,
+                cpu=cpu,
+                queue_wait=max(0.0, start - ready),
+                output_bytes=output_size(out),
+                cached=cached,
+                thread=thread if thread is not None else threading.get_ident(),
+            )
+        )
+        self.busy += end - start
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "started_at": self.started_at,
+            "wall": self.wall,
+            "scheduler": self.scheduler,
+            "events": self.events,
+            "nodes": [asdict(n) for n in self.nodes],
+        }
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Trace Event Format, loadable in chrome://tracing, Perfetto or speedscope."""
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = [
+            {
+                "name": f"run {self.run_id}", "cat": "run", "ph": "X", "pid": pid, "tid": 0,
+                "ts": 0, "dur": self.wall * 1e6,
+                "args": {"scheduler_s": self.scheduler, "events_s": self.events},
+            }
+        ]
+        for n in self.nodes:
+            if n.queue_wait > 0:
+                events.append({
+                    "name": f"{n.node_id} (queued)", "cat": "queue", "ph": "X", "pid": pid,
+                    "tid": n.thread, "ts": (n.start - n.queue_wait) * 1e6,
+                    "dur": n.queue_wait * 1e6,
+                })
+            events.append({
+                "name": n.node_id, "cat": n.type, "ph": "X", "pid": pid, "tid": n.thread,
+                "ts": n.start * 1e6, "dur": n.wall * 1e6,
+                "args": {
+                    "type": n.type, "cpu_s": n.cpu, "output_bytes": n.output_bytes,
+                    "cached": n.cached,
+                },
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def _labels(labels: Mapping[str, str]) -> str:
+    if not labels:
+        return ""
+    esc = (
+        (k, str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for k, v in labels.items()
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in esc) + "}"
+
+
+def metric(
+    name: str, kind: str, doc: str, samples: Iterable[Tuple[Mapping[str, str], float]]
+) -> List[str]:
+    """Prometheus text-format lines for a counter or gauge."""
+    lines = [f"# HELP {name} {doc}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{_labels(labels)} {value}" for labels, value in samples)
+    return lines
+
+
+def histogram_metric(
+    name: str, doc: str, series: Iterable[Tuple[Mapping[str, str], Histogram]]
+) -> List[str]:
+    lines = [f"# HELP {name} {doc}", f"# TYPE {name} histogram"]
+    for labels, h in series:
+        for le, n in h.cumulative():
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': le})} {n}")
+        lines.append(f"{name}_sum{_labels(labels)} {h.sum}")
+        lines.append(f"{name}_count{_labels(labels)} {h.count}")
+    return lines
+
+
+class Profiler:
+    """Aggregates run profiles into per-node-type histograms; keeps the last ``keep`` runs."""
+
+    def __init__(self, keep: int = 100) -> None:
+        self._keep = keep
+        self._runs: "OrderedDict[str, RunProfile]" = OrderedDict()
+        self._wall: Dict[str, Histogram] = {}
+        self._cpu: Dict[str, Histogram] = {}
+        self._queue: Dict[str, Histogram] = {}
+        self._size: Dict[str, Histogram] = {}
+        self._cached: Dict[str, int] = {}
+        self._run_wall = Histogram(TIME_BUCKETS)
+        self._scheduler = 0.0
+        self._events = 0.0
+        self._lock = threading.Lock()
+
+    def begin(self, run_id: str) -> RunProfile:
+        return RunProfile(run_id)
+
+    def finish(self, profile: RunProfile) -> None:
+        profile.wall = profile.now()
+        self.record(profile)
+
+    def record(self, profile: RunProfile) -> None:
+        """Add a finished profile (e.g. one measured in a worker process)."""
+        with self._lock:
+            for n in profile.nodes:
+                t = n.type
+                if n.cached:
+                    self._cached[t] = self._cached.get(t, 0) + 1
+                    continue
+                _hist(self._wall, t, TIME_BUCKETS).observe(n.wall)
+                if n.cpu is not None:
+                    _hist(self._cpu, t, TIME_BUCKETS).observe(n.cpu)
+                _hist(self._queue, t, TIME_BUCKETS).observe(n.queue_wait)
+                _hist(self._size, t, SIZE_BUCKETS).observe(n.output_bytes)
+            self._run_wall.observe(profile.wall)
+            self._scheduler += profile.scheduler
+            self._events += profile.events
+            self._runs[profile.run_id] = profile
+            while len(self._runs) > self._keep:
+                self._runs.popitem(last=False)
+
+    def get(self, run_id: str) -> RunProfile:
+        with self._lock:
+            if run_id not in self._runs:
+                raise KeyError(f"No profile for run: {run_id}")
+            return self._runs[run_id]
+
+    def prometheus(self) -> List[str]:
+        """Metric lines in the Prometheus text exposition format."""
+        with self._lock:
+            return [
+                *histogram_metric(
+                    "agentflow_node_wall_seconds", "Node wall time.", _by_type(self._wall)
+                ),
+                *histogram_metric(
+                    "agentflow_node_cpu_seconds", "Node CPU time (thread/inline nodes).",
+                    _by_type(self._cpu),
+                ),
+                *histogram_metric(
+                    "agentflow_node_queue_wait_seconds", "Time from ready to started.",
+                    _by_type(self._queue),
+                ),
+                *histogram_metric(
+                    "agentflow_node_output_bytes", "Approximate node output size.",
+                    _by_type(self._size),
+                ),
+                *metric(
+                    "agentflow_node_cached_total", "counter", "Node results served from cache.",
+                    [({"type": t}, n) for t, n in sorted(self._cached.items())],
+                ),
+                *histogram_metric(
+                    "agentflow_run_seconds", "Run wall time.", [({}, self._run_wall)]
+                ),
+                *metric(
+                    "agentflow_scheduler_seconds_total", "counter",
+                    "Time spent scheduling nodes.", [({}, self._scheduler)],
+                ),
+                *metric(
+                    "agentflow_event_publish_seconds_total", "counter",
+                    "Time spent publishing node events.", [({}, self._events)],
+                ),
+            ]
+
+
+def _by_type(table: Dict[str, Histogram]) -> List[Tuple[Mapping[str, str], Histogram]]:
+    return [({"type": t}, h) for t, h in sorted(table.items())]
+
+
+def _hist(table: Dict[str, Histogram], key: str, bounds: Sequence[float]) -> Histogram:
+    h = table.get(key)
+    if h is None:
+        h = table[key] = Histogram(bounds)
+    return h
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import threading
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+
+def is_stream(value: Any) -> bool:
+    return inspect.isgenerator(value) or inspect.isasyncgen(value)
+
+
+def join_chunks(chunks: List[Any]) -> Any:
+    """Joined value of a finished stream: str/bytes are concatenated, else a list."""
+    if chunks and all(isinstance(c, str) for c in chunks):
+        return "".join(chunks)
+    if chunks and all(isinstance(c, (bytes, bytearray)) for c in chunks):
+        return b"".join(chunks)
+    return list(chunks)
+
+
+def _wake(fut: "asyncio.Future[None]") -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+class OutputStream:
+    """Chunks of one streamed port, buffered so every reader sees all of them.
+
+    A node streams a port by returning a generator or async generator as its value
+    (``{"out": tokens()}``). Consumers that list the port in ``Node.STREAM_INPUTS``
+    get a StreamReader to iterate (``for`` or ``async for``) while chunks arrive;
+    the others get the joined value once the stream ends. The producer may run on
+    a worker thread or on the event loop.
+    """
+
+    def __init__(self, on_chunk: Optional[Callable[[int, Any], None]] = None) -> None:
+        self._chunks: List[Any] = []
+        self._done = False
+        self._error: BaseException | None = None
+        self._cond = threading.Condition()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, "asyncio.Future[None]"]] = []
+        self._on_chunk = on_chunk
+
+    @classmethod
+    def of(cls, value: Any) -> "OutputStream":
+        """A finished stream holding ``value`` as its only chunk."""
+        stream = cls()
+        stream._chunks.append(value)
+        stream._done = True
+        return stream
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def append(self, chunk: Any) -> None:
+        with self._cond:
+            self._chunks.append(chunk)
+            seq = len(self._chunks) - 1
+            self._notify()
+        if self._on_chunk is not None:
+            self._on_chunk(seq, chunk)
+
+    def close(self, error: BaseException | None = None) -> None:
+        with self._cond:
+            self._done = True
+            self._error = error
+            self._notify()
+
+    def value(self) -> Any:
+        if not self._done:
+            raise RuntimeError("Stream has not finished")
+        if self._error is not None:
+            raise self._error
+        return join_chunks(self._chunks)
+
+    def reader(self) -> "StreamReader":
+        return StreamReader(self)
+
+    def pump(self, source: Any) -> None:
+        """Drain a (sync) generator into the stream."""
+        if inspect.isasyncgen(source):
+            asyncio.run(self.apump(source))
+            return
+        try:
+            for chunk in source:
+                self.append(chunk)
+        except BaseException as exc:
+            self.close(exc)
+            raise
+        self.close()
+
+    async def apump(self, source: Any) -> None:
+        """Drain an async generator into the stream."""
+        try:
+            async for chunk in source:
+                self.append(chunk)
+        except BaseException as exc:
+            self.close(exc)
+            raise
+        self.close()
+
+    def _notify(self) -> None:
+        # caller holds self._cond
+        self._cond.notify_all()
+        waiters, self._waiters = self._waiters, []
+        for loop, fut in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, fut)
+            except RuntimeError:
+                pass  # loop already closed
+
+
+class StreamReader:
+    """One consumer's cursor over an OutputStream."""
+
+    def __init__(self, stream: OutputStream) -> None:
+        self._stream = stream
+        self._pos = 0
+
+    def __iter__(self) -> "StreamReader":
+        return self
+
+    def __next__(self) -> Any:
+        s = self._stream
+        with s._cond:
+            while self._pos >= len(s._chunks) and not s._done:
+                s._cond.wait()
+            return self._take()
+
+    def __aiter__(self) -> "StreamReader":
+        return self
+
+    async def __anext__(self) -> Any:
+        s = self._stream
+        while True:
+            with s._cond:
+                if self._pos < len(s._chunks) or s._done:
+                    try:
+                        return self._take()
+                    except StopIteration:
+                        raise StopAsyncIteration from None
+                loop = asyncio.get_running_loop()
+                fut: "asyncio.Future[None]" = loop.create_future()
+                s._waiters.append((loop, fut))
+            await fut
+
+    def _take(self) -> Any:
+        # caller holds the stream's lock
+        s = self._stream
+        if self._pos < len(s._chunks):
+            self._pos += 1
+            return s._chunks[self._pos - 1]
+        if s._error is not None:
+            raise s._error
+        raise StopIteration
+
+
+def settled(out: Dict[str, Any]) -> Dict[str, Any]:
+    """``out`` with finished streams replaced by their joined values."""
+    if not any(isinstance(v, OutputStream) for v in out.values()):
+        return out
+    return {k: v.value() if isinstance(v, OutputStream) else v for k, v in out.items()}
+
+
+def materialize(out: Mapping[str, Any]) -> Dict[str, Any]:
+    """Drain every generator port of ``out`` in place of streaming it."""
+    result = dict(out)
+    for port, value in result.items():
+        if is_stream(value):
+            stream = OutputStream()
+            stream.pump(value)
+            result[port] = stream.value()
+    return result
@@ -1,23 +1,237 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import os
+import threading
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Coroutine, Dict, Iterable, Iterator, TypeVar
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse, FileResponse
+import anyio
+from fastapi import (
+    FastAPI, Header, HTTPException, Request, Response, WebSocket, WebSocketDisconnect, status
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import (
+    FileResponse, HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
+)
 from fastapi.staticfiles import StaticFiles
+from pydantic import ValidationError
 
-from core.blackboard import Blackboard
+import nodes  # noqa: F401  (registers node types lazily, see core.plugins)
 from core.registry import REGISTRY
-from runtime.events import Event, EventBus
+from runtime.aot import AotCompiler
+from runtime.cache import cache_from_spec
+from runtime.engine import Engine
+from runtime.events import EventBus
+from runtime.fleet import WorkerFleet
+from runtime.jobs import SUCCEEDED, QueueFullError, RunQueue
+from runtime.journal import RunJournal
+from runtime.loader import parse_graph
+from runtime.plan import ExecutionPlan, GraphError
+from runtime.profiling import Profiler, metric
 from runtime.services import ServiceContainer
-from server.schemas import GraphModel
+from server.schemas import GraphModel, GraphPatch
+from server.store import GraphStore, GraphVersion, PatchError, VersionConflictError
 
-# single in-memory graph for MVP
-_GRAPH = GraphModel()
+DEFAULT_GRAPH = "default"  # graph served by the single-graph /api/graph and /api/run
+_STORE = GraphStore(
+    os.environ.get("AGENTFLOW_GRAPH_DIR"),
+    max_resident=int(os.environ.get("AGENTFLOW_GRAPHS_RESIDENT", "256")),
+    max_history=int(os.environ.get("AGENTFLOW_GRAPH_HISTORY", "64")),  # without a graph dir
+)
+if DEFAULT_GRAPH not in _STORE.ids():
+    _STORE.put(DEFAULT_GRAPH, GraphModel())
 _SERVICES = ServiceContainer()
 _BUS = EventBus()
-_ENGINE = Engine(_SERVICES, _BUS)
+_JOURNAL_PATH = os.environ.get("AGENTFLOW_JOURNAL")  # SQLite file; unset: no run journal
+_ENGINE = Engine(
+    _SERVICES,
+    _BUS,
+    cache=cache_from_spec(os.environ.get("AGENTFLOW_CACHE", "memory")),
+    profiler=Profiler() if os.environ.get("AGENTFLOW_PROFILE", "1") != "0" else None,
+    journal=RunJournal(_JOURNAL_PATH) if _JOURNAL_PATH else None,
+)
+_AOT = AotCompiler(_ENGINE, os.environ.get("AGENTFLOW_AOT_DIR"))  # unset: compile in memory
+_PROCESSES = int(os.environ.get("AGENTFLOW_WORKER_PROCESSES", "0"))  # 0: run in this process
+_FLEET = (
+    WorkerFleet(
+        _PROCESSES,
+        bus=_BUS,
+        profiler=_ENGINE.profiler,
+        cache=os.environ.get("AGENTFLOW_CACHE", "memory"),
+        journal=_JOURNAL_PATH,
+    )
+    if _PROCESSES > 0
+    else None
+)
+_RUNS = RunQueue(
+    _FLEET or _ENGINE,
+    workers=int(os.environ.get("AGENTFLOW_RUN_WORKERS", str(_PROCESSES or 4))),
+    maxsize=int(os.environ.get("AGENTFLOW_RUN_QUEUE", "64")),
+)
+_WS_QUEUE = 1024  # events buffered per websocket before coalescing/dropping
+_WS_FRAME_EVENTS = 256
+_WS_FRAME_INTERVAL = 0.05
+_WS_MAX_CHARS = 2000
+_BATCH_MAX_CONCURRENCY = 32
+_BATCH_MAX_SIZE = 1024  # input sets held per chunk; NDJSON bodies are buffered that far
+
+
+def _version(graph_id: str, version: int | None = None) -> GraphVersion:
+    try:
+        return _STORE.get(graph_id, version)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
+def _plan(graph_id: str, version: int | None = None) -> ExecutionPlan:
+    gv = _version(graph_id, version)
+    try:
+        return gv.plan()
+    except (GraphError, KeyError) as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+def _put(graph_id: str, body: bytes, if_match: str | None) -> Dict[str, Any]:
+    """Validate a raw graph document (0.2, or 0.1 IR upgraded to 0.2) and store it."""
+    try:
+        graph = parse_graph(body)
+    except ValidationError as exc:
+        errors = [{**e, "loc": ("body", *e["loc"])} for e in exc.errors(include_url=False)]
+        raise RequestValidationError(errors) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    try:
+        gv = _STORE.put(graph_id, graph, if_match=if_match)
+    except VersionConflictError as exc:
+        raise HTTPException(status_code=412, detail=str(exc)) from exc
+    return {"ok": True, "version": graph.version, "revision": gv.version, "etag": gv.etag}
+
+
+def _patch(graph_id: str, patch: GraphPatch, if_match: str | None) -> Dict[str, Any]:
+    try:
+        gv = _STORE.patch(graph_id, patch, if_match=if_match)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except VersionConflictError as exc:
+        raise HTTPException(status_code=412, detail=str(exc)) from exc
+    except PatchError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    return {"ok": True, "revision": gv.version, "etag": gv.etag, "nodes": gv.nodes}
+
+
+def _run_options(graph_id: str, payload: Dict[str, Any] | None) -> Dict[str, Any]:
+    """Scheduling options accepted by the run endpoints."""
+    payload = payload or {}
+    mode = payload.get("mode", "exec")
+    if mode not in ("exec", "dataflow"):
+        raise HTTPException(status_code=400, detail=f"Unknown run mode: {mode}")
+    options: Dict[str, Any] = {"mode": mode}
+    if payload.get("targets") is not None:
+        options["targets"] = list(payload["targets"])
+    if payload.get("incremental"):
+        options["session"] = f"graph:{graph_id}"
+    return options
+
+
+async def _batch_request(request: Request) -> tuple[Dict[str, Any], Iterable[Any]]:
+    """Options and input sets of a batch run.
+
+    Either a JSON object with an ``inputs`` list, or an NDJSON body with one input
+    object per line and the options as query params. NDJSON input sets are read
+    from the body as the batch consumes them (a line that is not JSON fails as
+    that item only).
+    """
+    ndjson = request.headers.get("content-type", "").startswith("application/x-ndjson")
+    try:
+        if ndjson:
+            q = request.query_params
+            payload: Dict[str, Any] = {
+                k: q[k] for k in ("mode", "version", "concurrency", "batch_size") if k in q
+            }
+            if "targets" in q:
+                payload["targets"] = q["targets"].split(",")
+            items: Any = _blocking(_ndjson_items(request))
+        else:
+            body = await request.body()
+            payload = json.loads(body) if body else {}
+            items = payload.get("inputs", [])
+        for k in ("version", "concurrency", "batch_size"):
+            if k in payload:
+                payload[k] = int(payload[k])
+    except (ValueError, AttributeError) as exc:
+        raise HTTPException(status_code=400, detail=f"Bad batch request: {exc}") from exc
+    if not ndjson and not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Batch inputs must be a list")
+    return payload, items
+
+
+async def _ndjson_items(request: Request) -> AsyncIterator[Any]:
+    """Parsed lines of an NDJSON request body, as they arrive."""
+    buf = b""
+    async for data in request.stream():
+        buf += data
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_line(line)
+    if buf.strip():
+        yield _parse_line(buf)
+
+
+def _parse_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError:
+        return line.decode("utf-8", "replace")  # run_many reports it as a bad item
+
+
+class _DuplexResponse(StreamingResponse):
+    """StreamingResponse sent while the request body is still being read.
+
+    Starlette otherwise watches ``receive`` for a disconnect during the response
+    on ASGI < 2.4 servers, which would swallow body chunks.
+    """
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        await self.stream_response(send)
+
+
+_T = TypeVar("_T")
+_RUN_LOOP: asyncio.AbstractEventLoop | None = None
+_RUN_LOOP_LOCK = threading.Lock()
+
+
+def _run_loop() -> asyncio.AbstractEventLoop:
+    """Event loop of the thread that runs parallel graphs, started on first use."""
+    global _RUN_LOOP
+    with _RUN_LOOP_LOCK:
+        if _RUN_LOOP is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name="agentflow-run-loop", daemon=True
+            ).start()
+            _RUN_LOOP = loop
+        return _RUN_LOOP
+
+
+async def _on_run_loop(coro: Coroutine[Any, Any, _T]) -> _T:
+    """Await ``coro`` on the run loop, so its scheduler never blocks the server's loop.
+
+    Cancelling the caller (e.g. the client went away) cancels the run.
+    """
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, _run_loop()))
+
+
+def _blocking(items: AsyncIterator[Any]) -> Iterator[Any]:
+    """Iterate ``items`` from a worker thread (as StreamingResponse runs run_many)."""
+    while True:
+        try:
+            yield anyio.from_thread.run(items.__anext__)
+        except StopAsyncIteration:
+            return
 
 
 def create_app() -> FastAPI:
@@ -32,51 +246,323 @@ def create_app() -> FastAPI:
 
     @app.get("/api/nodes")
     async def list_nodes() -> Dict[str, Any]:
-        items = []
-        for t in REGISTRY.list_types():
-            cls = REGISTRY.get(t)
-            items.append(
-                {
-                    "type": t,
-                    "inputs": getattr(cls, "INPUTS", {}),
-                    "outputs": getattr(cls, "OUTPUTS", {}),
-                    "params": getattr(cls, "PARAMS", {}),
-                }
-            )
-        return {"nodes": items}
+        """Node types from the registry manifest; no node module is imported."""
+        return {"nodes": REGISTRY.describe()}
 
     @app.get("/api/graph", response_model=GraphModel)
-    async def get_graph() -> GraphModel:
-        return _GRAPH
+    async def get_graph(if_none_match: str | None = Header(default=None)) -> Response:
+        return await get_graph_by_id(DEFAULT_GRAPH, if_none_match=if_none_match)
 
     @app.put("/api/graph", response_model=dict)
-    async def put_graph(graph: GraphModel) -> Dict[str, Any]:
-        global _GRAPH
-        _GRAPH = graph
-        return {"ok": True, "version": graph.version}
+    async def put_graph(
+        request: Request, if_match: str | None = Header(default=None)
+    ) -> Dict[str, Any]:
+        return await put_graph_by_id(DEFAULT_GRAPH, request, if_match)
+
+    @app.patch("/api/graph", response_model=dict)
+    async def patch_graph(
+        patch: GraphPatch, if_match: str | None = Header(default=None)
+    ) -> Dict[str, Any]:
+        return await patch_graph_by_id(DEFAULT_GRAPH, patch, if_match)
 
     @app.post("/api/run", response_model=dict)
     async def run_graph(payload: Dict[str, Any] | None = None) -> Dict[str, Any]:
+        return await run_graph_by_id(DEFAULT_GRAPH, payload)
+
+    @app.post("/api/runs", response_model=dict, status_code=202)
+    async def submit_run(payload: Dict[str, Any] | None = None) -> Dict[str, Any]:
+        return await submit_run_by_id(DEFAULT_GRAPH, payload)
+
+    @app.post("/api/run/batch")
+    async def run_batch(request: Request) -> StreamingResponse:
+        return await run_batch_by_id(DEFAULT_GRAPH, request)
+
+    @app.get("/api/graphs", response_model=dict)
+    async def list_graphs() -> Dict[str, Any]:
+        return {"graphs": _STORE.heads()}
+
+    @app.get("/api/graphs/{graph_id}", response_model=GraphModel)
+    async def get_graph_by_id(
+        graph_id: str,
+        version: int | None = None,
+        if_none_match: str | None = Header(default=None),
+    ) -> Response:
+        """The stored document, served from its serialized bytes."""
+        gv = _version(graph_id, version)
+        if if_none_match == gv.etag:
+            return Response(status_code=304, headers={"ETag": gv.etag})
+        return Response(gv.body, media_type="application/json", headers={"ETag": gv.etag})
+
+    @app.put("/api/graphs/{graph_id}", response_model=dict)
+    async def put_graph_by_id(
+        graph_id: str, request: Request, if_match: str | None = Header(default=None)
+    ) -> Dict[str, Any]:
+        body = await request.body()
+        return await run_in_threadpool(_put, graph_id, body, if_match)
+
+    @app.patch("/api/graphs/{graph_id}", response_model=dict)
+    async def patch_graph_by_id(
+        graph_id: str, patch: GraphPatch, if_match: str | None = Header(default=None)
+    ) -> Dict[str, Any]:
+        """Apply a structural edit (GraphPatch) to the head version."""
+        return await run_in_threadpool(_patch, graph_id, patch, if_match)
+
+    @app.delete("/api/graphs/{graph_id}", response_model=dict)
+    async def delete_graph(
+        graph_id: str, if_match: str | None = Header(default=None)
+    ) -> Dict[str, Any]:
+        try:
+            _STORE.delete(graph_id, if_match=if_match)
+        except KeyError as exc:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
+        except VersionConflictError as exc:
+            raise HTTPException(status_code=412, detail=str(exc)) from exc
+        _ENGINE.incremental.discard(f"graph:{graph_id}")
+        return {"ok": True}
+
+    @app.get("/api/graphs/{graph_id}/versions", response_model=dict)
+    async def list_versions(graph_id: str) -> Dict[str, Any]:
+        try:
+            versions = _STORE.versions(graph_id)
+        except KeyError as exc:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
+        return {"id": graph_id, "versions": versions, "etag": _STORE.head_etag(graph_id)}
+
+    @app.post("/api/graphs/{graph_id}/run", response_model=dict)
+    async def run_graph_by_id(
+        graph_id: str, payload: Dict[str, Any] | None = None
+    ) -> Dict[str, Any]:
         inputs = (payload or {}).get("inputs", {})
-        result = _ENGINE.run(_GRAPH, inputs=inputs)
+        plan = _plan(graph_id, (payload or {}).get("version"))
+        options = _run_options(graph_id, payload)
+        compiled = bool((payload or {}).get("compiled"))
+        if compiled and (_FLEET is not None or "session" in options):
+            raise HTTPException(
+                status_code=400,
+                detail="Compiled runs are not available for incremental or worker-process runs",
+            )
+        if (payload or {}).get("parallel") and "session" in options:
+            raise HTTPException(status_code=400, detail="Incremental runs cannot be parallel")
+        try:
+            if compiled:
+                if (payload or {}).get("parallel"):
+                    # compiling generates and imports a module: keep it off the loop
+                    graph = await run_in_threadpool(_AOT.compile, plan, parallel=True, **options)
+                    result = await _on_run_loop(graph.run_async(inputs))
+                else:
+                    result = await run_in_threadpool(_AOT.run, plan, inputs=inputs, **options)
+            elif _FLEET is not None:
+                parallel = bool((payload or {}).get("parallel"))
+                result = await run_in_threadpool(
+                    _FLEET.run, plan, inputs=inputs, parallel=parallel, **options
+                )
+            elif (payload or {}).get("parallel"):
+                result = await _on_run_loop(_ENGINE.run_async(plan, inputs=inputs, **options))
+            else:
+                result = await run_in_threadpool(_ENGINE.run, plan, inputs=inputs, **options)
+        except GraphError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
         return {"ok": True, **result}
 
+    @app.post("/api/graphs/{graph_id}/run/batch")
+    async def run_batch_by_id(graph_id: str, request: Request) -> StreamingResponse:
+        """Run the graph once per input set; results stream back as NDJSON lines."""
+        payload, items = await _batch_request(request)
+        plan = _plan(graph_id, payload.get("version"))
+        options = _run_options(graph_id, payload)
+        try:
+            results = _ENGINE.run_many(
+                plan,
+                items,
+                concurrency=min(payload.get("concurrency", 4), _BATCH_MAX_CONCURRENCY),
+                batch_size=min(payload.get("batch_size", 32), _BATCH_MAX_SIZE),
+                mode=options["mode"],
+                targets=options.get("targets"),
+            )
+        except GraphError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        lines = (json.dumps(r, default=str) + "\n" for r in results)
+        response = StreamingResponse if isinstance(items, list) else _DuplexResponse
+        return response(lines, media_type="application/x-ndjson")
+
+    @app.post("/api/graphs/{graph_id}/runs", response_model=dict, status_code=202)
+    async def submit_run_by_id(
+        graph_id: str, payload: Dict[str, Any] | None = None
+    ) -> Dict[str, Any]:
+        inputs = (payload or {}).get("inputs", {})
+        plan = _plan(graph_id, (payload or {}).get("version"))
+        try:
+            job = _RUNS.submit(plan, inputs, **_run_options(graph_id, payload))
+        except QueueFullError as exc:
+            raise HTTPException(status_code=429, detail=str(exc)) from exc
+        return {"ok": True, **job.describe()}
+
+    @app.get("/api/runs/{run_id}", response_model=dict)
+    async def run_status(run_id: str) -> Dict[str, Any]:
+        try:
+            job = _RUNS.get(run_id)
+        except KeyError as exc:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
+        return {"ok": True, **job.describe()}
+
+    @app.get("/api/runs/{run_id}/result", response_model=dict)
+    async def run_result(run_id: str) -> Dict[str, Any]:
+        try:
+            job = _RUNS.get(run_id)
+        except KeyError as exc:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
+        if not job.done:
+            raise HTTPException(status_code=409, detail=f"Run is {job.status}")
+        if job.status != SUCCEEDED:
+            return {"ok": False, **job.describe()}
+        return {"ok": True, **job.describe(), **(job.result or {})}
+
+    @app.delete("/api/runs/{run_id}", response_model=dict)
+    async def cancel_run(run_id: str) -> Dict[str, Any]:
+        try:
+            job = _RUNS.cancel(run_id)
+        except KeyError as exc:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
+        return {"ok": True, **job.describe()}
+
+    @app.post("/api/runs/{run_id}/resume", response_model=dict)
+    async def resume_run(run_id: str) -> Dict[str, Any]:
+        """Finish a journaled run, skipping the nodes that already completed."""
+        if _ENGINE.journal is None:
+            raise HTTPException(status_code=404, detail="Run journal is disabled")
+        try:
+            result = await run_in_threadpool(_ENGINE.resume, run_id)
+        except KeyError as exc:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
+        except GraphError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return {"ok": True, **result}
+
+    @app.get("/api/journal", response_model=dict)
+    async def journal_runs(status: str | None = None) -> Dict[str, Any]:
+        """Journaled runs; ``status=running`` lists the ones that can be resumed."""
+        if _ENGINE.journal is None:
+            raise HTTPException(status_code=404, detail="Run journal is disabled")
+        return {"ok": True, "runs": await run_in_threadpool(_ENGINE.journal.runs, status)}
+
+    @app.get("/api/runs/{run_id}/profile")
+    async def run_profile(run_id: str, format: str = "json") -> Response:  # noqa: A002
+        """Per-node timings of a finished run; ``format=chrome`` downloads a trace file."""
+        if _ENGINE.profiler is None:
+            raise HTTPException(status_code=404, detail="Profiling is disabled")
+        try:
+            profile = _ENGINE.profiler.get(run_id)
+        except KeyError as exc:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
+        if format == "chrome":
+            return JSONResponse(
+                profile.chrome_trace(),
+                headers={"Content-Disposition": f'attachment; filename="{run_id}.trace.json"'},
+            )
+        return JSONResponse(profile.as_dict())
+
+    @app.get("/api/metrics", response_class=PlainTextResponse)
+    async def metrics() -> PlainTextResponse:
+        """Prometheus text exposition."""
+        lines = _ENGINE.profiler.prometheus() if _ENGINE.profiler is not None else []
+        if _ENGINE.cache is not None:
+            stats = _ENGINE.cache.stats()
+            lines += metric(
+                "agentflow_cache_events_total", "counter", "Result cache lookups and writes.",
+                [({"event": k}, stats[k]) for k in ("hits", "misses", "stores", "evictions")],
+            )
+            lines += metric(
+                "agentflow_cache_entries", "gauge", "Result cache size.", [({}, stats["size"])]
+            )
+        pool = _ENGINE.instances.stats()
+        lines += metric(
+            "agentflow_node_instances_total", "counter", "Node instance lifecycle events.",
+            [({"event": k}, pool[k]) for k in ("created", "reused", "torn_down")],
+        )
+        lines += metric(
+            "agentflow_node_instances_idle", "gauge", "Warm idle node instances.",
+            [({}, pool["idle"])],
+        )
+        lines += metric(
+            "agentflow_run_queue_pending", "gauge", "Runs waiting in the queue.",
+            [({}, _RUNS.pending())],
+        )
+        lines += metric(
+            "agentflow_compiled_graphs", "gauge", "Graphs compiled to Python modules.",
+            [({}, len(_AOT))],
+        )
+        if _FLEET is not None:
+            fleet = _FLEET.stats()
+            lines += metric(
+                "agentflow_fleet_workers", "gauge", "Worker processes by state.",
+                [({"state": "idle"}, fleet["idle"]),
+                 ({"state": "busy"}, fleet["workers"] - fleet["idle"])],
+            )
+            lines += metric(
+                "agentflow_fleet_restarts_total", "counter", "Crashed worker processes replaced.",
+                [({}, fleet["restarts"])],
+            )
+        return PlainTextResponse(
+            "\n".join(lines) + "\n", media_type="text/plain; version=0.0.4"
+        )
+
+    @app.get("/api/cache", response_model=dict)
+    async def cache_stats() -> Dict[str, Any]:
+        if _ENGINE.cache is None:
+            return {"ok": True, "enabled": False}
+        return {"ok": True, "enabled": True, **_ENGINE.cache.stats()}
+
+    @app.delete("/api/cache", response_model=dict)
+    async def clear_cache() -> Dict[str, Any]:
+        if _ENGINE.cache is not None:
+            _ENGINE.cache.clear()
+        return {"ok": True}
+
     @app.websocket("/ws/events")
     async def ws_events(ws: WebSocket) -> None:
+        """Stream events as JSON arrays, at most one frame per ``_WS_FRAME_INTERVAL``.
+
+        Query params: ``verbosity`` (ids | summary | full, default summary) and
+        ``max_chars`` (truncate long values, default 2000). A ``max_chars`` that is
+        not a positive integer closes the socket with 1008 before it is accepted.
+        """
+        verbosity = ws.query_params.get("verbosity", "summary")
+        if verbosity not in ("ids", "summary", "full"):
+            verbosity = "summary"
+        try:
+            max_chars = int(ws.query_params.get("max_chars", _WS_MAX_CHARS))
+        except ValueError:
+            max_chars = 0
+        if max_chars < 1:
+            await ws.close(
+                code=status.WS_1008_POLICY_VIOLATION,
+                reason="max_chars must be a positive integer",
+            )
+            return
         await ws.accept()
+        sub = _BUS.open(
+            maxsize=_WS_QUEUE, policy="coalesce", verbosity=verbosity, max_chars=max_chars
+        )
 
-        def forward(evt):
-            try:
-                import json
-                ws._loop.create_task(ws.send_text(json.dumps({"type": evt.type, "payload": evt.payload})))  # type: ignore[attr-defined]
-            except Exception:
-                pass
+        async def pump() -> None:
+            while not sub.closed:
+                batch = await sub.next_batch(_WS_FRAME_EVENTS)
+                frame = [sub.render(e) for e in batch]
+                dropped = sub.take_dropped()
+                if dropped:
+                    frame.append({"type": "EventsDropped", "payload": {"count": dropped}})
+                if frame:
+                    await ws.send_text(json.dumps(frame, default=str))
+                await asyncio.sleep(_WS_FRAME_INTERVAL)
 
-        _BUS.subscribe(forward)
+        sender = asyncio.create_task(pump())
         try:
             while True:
                 await ws.receive_text()
         except WebSocketDisconnect:
             pass
+        finally:
+            sub.close()
+            sender.cancel()
 
     return app
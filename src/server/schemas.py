@@ -1,8 +1,20 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Tuple
+import re
+from typing import Annotated, Any, Dict, List, Tuple
 
-from pydantic import BaseModel, Field
+from pydantic import AfterValidator, BaseModel, Field, field_validator
+
+_CONTROL = re.compile(r"[\x00-\x1f\x7f]")
+
+
+def _node_id(value: str) -> str:
+    if _CONTROL.search(value):
+        raise ValueError("node id must not contain control characters")
+    return value
+
+
+NodeId = Annotated[str, AfterValidator(_node_id)]
 
 
 class DataEdge(BaseModel):
@@ -16,11 +28,12 @@ class ExecEdge(BaseModel):
 
 
 class NodeInstance(BaseModel):
-    id: str
+    id: NodeId
     type: str
     params: Dict[str, Any] = Field(default_factory=dict)
     inputs: Dict[str, Any] = Field(default_factory=dict)
     position: Tuple[float, float] | None = None
+    cache: bool | None = None  # overrides the node class's CACHEABLE flag
 
 
 class GraphEdges(BaseModel):
@@ -33,3 +46,43 @@ class GraphModel(BaseModel):
     meta: Dict[str, Any] = Field(default_factory=dict)
     nodes: List[NodeInstance] = Field(default_factory=list)
     edges: GraphEdges = Field(default_factory=GraphEdges)
+
+
+class NodeUpdate(BaseModel):
+    """Fields of an existing node to replace; fields left out are kept."""
+
+    id: str
+    type: str | None = None
+    params: Dict[str, Any] | None = None
+    inputs: Dict[str, Any] | None = None
+    position: Tuple[float, float] | None = None
+    cache: bool | None = None
+
+    @field_validator("type", "params", "inputs")
+    @classmethod
+    def _not_null(cls, value: Any) -> Any:
+        # only runs for fields that were sent; null would corrupt the stored node
+        if value is None:
+            raise ValueError("may be left out but not null")
+        return value
+
+
+class NodesPatch(BaseModel):
+    add: List[NodeInstance] = Field(default_factory=list)
+    update: List[NodeUpdate] = Field(default_factory=list)
+    remove: List[str] = Field(default_factory=list)  # also drops the nodes' edges
+
+
+class EdgesPatch(BaseModel):
+    add_data: List[DataEdge] = Field(default_factory=list)
+    remove_data: List[DataEdge] = Field(default_factory=list)
+    add_exec: List[ExecEdge] = Field(default_factory=list)
+    remove_exec: List[ExecEdge] = Field(default_factory=list)
+
+
+class GraphPatch(BaseModel):
+    """Structural edit of a stored graph, applied as remove, add, then update."""
+
+    meta: Dict[str, Any] | None = None  # keys to set; a None value deletes the key
+    nodes: NodesPatch = Field(default_factory=NodesPatch)
+    edges: EdgesPatch = Field(default_factory=EdgesPatch)
@@ -245,23 +245,27 @@ function connectWS() {
   ws.onopen = () => $("#status").textContent = "ws: connected";
   ws.onclose = () => $("#status").textContent = "ws: disconnected";
   ws.onmessage = (ev) => {
-    const evt = JSON.parse(ev.data);
-    if (evt.type === "NodeStarted") {
-      const nid = evt.payload.node_id;
-      const node = idToNode[nid];
-      if (node) { node.__state = "running"; canvas.draw(true, true); }
-    } else if (evt.type === "NodeFinished") {
-      const nid = evt.payload.node_id;
-      const node = idToNode[nid];
-      if (node) {
-        node.__state = "done";
-        setTimeout(() => { node.__state = undefined; canvas.draw(true, true); }, 800);
-        canvas.draw(true, true);
-      }
-    }
+    const frame = JSON.parse(ev.data);
+    for (const evt of (Array.isArray(frame) ? frame : [frame])) handleEvent(evt);
   };
 }
 
+function handleEvent(evt) {
+  if (evt.type === "NodeStarted") {
+    const nid = evt.payload.node_id;
+    const node = idToNode[nid];
+    if (node) { node.__state = "running"; canvas.draw(true, true); }
+  } else if (evt.type === "NodeFinished") {
+    const nid = evt.payload.node_id;
+    const node = idToNode[nid];
+    if (node) {
+      node.__state = "done";
+      setTimeout(() => { node.__state = undefined; canvas.draw(true, true); }, 800);
+      canvas.draw(true, true);
+    }
+  }
+}
+
 // ---------- Toolbar ----------
 function initToolbar() {
   $("#btn-import").onclick = () => $("#file").click();
@@ -0,0 +1,361 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from urllib.parse import quote, unquote
+
+from pydantic import ValidationError
+
+from runtime.plan import ExecutionPlan, compile_plan
+from server.schemas import GraphModel, GraphPatch
+
+
+class VersionConflictError(RuntimeError):
+    """Raised when an If-Match precondition does not name the current version."""
+
+
+class PatchError(ValueError):
+    """Raised when a patch does not apply to the graph (unknown or duplicate node ids)."""
+
+
+class GraphVersion:
+    """One immutable version of a stored graph, with its plan compiled on demand.
+
+    The graph is kept as its serialized JSON ``body`` (served as is by GET) plus the
+    compiled plan. The validated GraphModel handed to the store is only held until
+    the plan has been compiled from it; ``graph`` re-parses the body after that.
+    """
+
+    __slots__ = (
+        "graph_id", "version", "key", "created_at", "body", "nodes", "_graph", "_plan", "_lock"
+    )
+
+    def __init__(
+        self, graph_id: str, version: int, body: bytes, nodes: int, graph: GraphModel | None = None
+    ) -> None:
+        self.graph_id = graph_id
+        self.version = version
+        self.key = hashlib.sha256(body).hexdigest()
+        self.created_at = time.time()
+        self.body = body
+        self.nodes = nodes
+        self._graph = graph
+        self._plan: ExecutionPlan | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}-{self.key[:16]}"'
+
+    @property
+    def graph(self) -> GraphModel:
+        graph = self._graph
+        return graph if graph is not None else GraphModel.model_validate_json(self.body)
+
+    def unload(self) -> None:
+        """Drop the compiled plan (and graph); ``plan`` recompiles from the body."""
+        with self._lock:
+            self._plan = None
+            self._graph = None
+
+    def plan(self) -> ExecutionPlan:
+        if self._plan is None:
+            with self._lock:
+                if self._plan is None:
+                    self._plan = compile_plan(self.graph, key=self.key)
+                    self._graph = None
+        return self._plan
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "id": self.graph_id,
+            "version": self.version,
+            "etag": self.etag,
+            "created_at": self.created_at,
+            "nodes": self.nodes,
+        }
+
+
+def apply_patch(doc: Dict[str, Any], patch: GraphPatch) -> None:
+    """Apply ``patch`` in place to ``doc``, a graph in its JSON form.
+
+    Raises PatchError for unknown or duplicate node ids, including the endpoints
+    of added edges. The result should still be validated as a GraphModel.
+    """
+    if patch.meta:
+        meta = doc.setdefault("meta", {})
+        for k, v in patch.meta.items():
+            if v is None:
+                meta.pop(k, None)
+            else:
+                meta[k] = v
+
+    nodes: List[Dict[str, Any]] = doc["nodes"]
+    edges: Dict[str, List[Dict[str, Any]]] = doc["edges"]
+    ids = {n["id"] for n in nodes}
+    np, ep = patch.nodes, patch.edges
+
+    if np.remove:
+        gone = set(np.remove)
+        missing = sorted(gone - ids)
+        if missing:
+            raise PatchError(f"Cannot remove unknown nodes: {missing}")
+        nodes[:] = [n for n in nodes if n["id"] not in gone]
+        edges["data"] = [
+            e for e in edges["data"] if e["src"][0] not in gone and e["dst"][0] not in gone
+        ]
+        edges["exec"] = [e for e in edges["exec"] if e["src"] not in gone and e["dst"] not in gone]
+        ids -= gone
+
+    for n in np.add:
+        if n.id in ids:
+            raise PatchError(f"Node already exists: {n.id}")
+        ids.add(n.id)
+        nodes.append(n.model_dump(mode="json"))
+
+    if np.update:
+        by_id = {n["id"]: n for n in nodes}
+        for u in np.update:
+            node = by_id.get(u.id)
+            if node is None:
+                raise PatchError(f"Cannot update unknown node: {u.id}")
+            node.update(u.model_dump(mode="json", exclude_unset=True))
+
+    if ep.remove_data:
+        drop = {(*e.src, *e.dst) for e in ep.remove_data}
+        edges["data"] = [e for e in edges["data"] if (*e["src"], *e["dst"]) not in drop]
+    if ep.remove_exec:
+        drop = {(e.src, e.dst) for e in ep.remove_exec}
+        edges["exec"] = [e for e in edges["exec"] if (e["src"], e["dst"]) not in drop]
+    ends = {e.src[0] for e in ep.add_data} | {e.dst[0] for e in ep.add_data}
+    ends |= {e.src for e in ep.add_exec} | {e.dst for e in ep.add_exec}
+    missing = sorted(ends - ids)
+    if missing:
+        raise PatchError(f"Cannot add edges to unknown nodes: {missing}")
+    edges["data"].extend(e.model_dump(mode="json") for e in ep.add_data)
+    edges["exec"].extend(e.model_dump(mode="json") for e in ep.add_exec)
+
+
+class GraphStore:
+    """Graphs keyed by id, each with a history of immutable versions.
+
+    Up to ``max_resident`` versions stay in memory with their compiled plans (LRU).
+    With a ``root`` directory, every version is also written to disk so cold ones
+    can be evicted and reloaded. Without one, cold versions keep only their body
+    and are recompiled when used again, and each graph keeps its last
+    ``max_history`` versions.
+
+    Disk reads and writes happen outside the store lock; writers of one graph are
+    serialized by a per-graph lock and publish the new head under the store lock.
+    """
+
+    def __init__(
+        self, root: str | Path | None = None, max_resident: int = 256, max_history: int = 64
+    ) -> None:
+        self._root = Path(root) if root else None
+        self._max_resident = max_resident
+        self._max_history = max_history
+        self._heads: Dict[str, int] = {}
+        self._first: Dict[str, int] = {}  # oldest version kept, when history is capped
+        self._cold: Dict[Tuple[str, int], GraphVersion] = {}  # evicted, without a root
+        self._etags: Dict[str, str] = {}
+        self._info: Dict[str, Dict[str, Any]] = {}  # describe() of each head
+        self._resident: "OrderedDict[Tuple[str, int], GraphVersion]" = OrderedDict()
+        self._writers: Dict[str, threading.Lock] = {}
+        self._lock = threading.RLock()
+        if self._root is not None:
+            self._scan()
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return sorted(self._heads)
+
+    def versions(self, graph_id: str) -> List[int]:
+        with self._lock:
+            if graph_id not in self._heads:
+                raise KeyError(f"Unknown graph: {graph_id}")
+            return list(range(self._first.get(graph_id, 1), self._heads[graph_id] + 1))
+
+    def head_etag(self, graph_id: str) -> str | None:
+        with self._lock:
+            return self._etags.get(graph_id)
+
+    def heads(self) -> List[Dict[str, Any]]:
+        """describe() of every graph's head version, without loading any version."""
+        with self._lock:
+            return [dict(self._info[gid]) for gid in sorted(self._info)]
+
+    def get(self, graph_id: str, version: int | None = None) -> GraphVersion:
+        with self._lock:
+            v = self._resolve(graph_id, version)
+            gv = self._resident.get((graph_id, v))
+            if gv is not None:
+                self._resident.move_to_end((graph_id, v))
+                return gv
+            if self._root is None:
+                gv = self._load(graph_id, v)
+                self._admit(gv)
+                return gv
+        loaded = self._load(graph_id, v)
+        with self._lock:
+            self._resolve(graph_id, v)  # not deleted meanwhile
+            gv = self._resident.get((graph_id, v))
+            if gv is None:  # else another reader admitted it first
+                gv = loaded
+                self._admit(gv)
+            else:
+                self._resident.move_to_end((graph_id, v))
+            return gv
+
+    def put(self, graph_id: str, graph: GraphModel, *, if_match: str | None = None) -> GraphVersion:
+        """Store ``graph`` as the next version. ``if_match`` must name the current head."""
+        body = graph.model_dump_json().encode("utf-8")
+        with self._writer(graph_id):
+            with self._lock:
+                self._check(graph_id, if_match)
+            return self._commit(graph_id, body, len(graph.nodes), graph)
+
+    def patch(
+        self, graph_id: str, patch: GraphPatch, *, if_match: str | None = None
+    ) -> GraphVersion:
+        """Store the head version with ``patch`` applied as the next version."""
+        with self._writer(graph_id):
+            with self._lock:
+                self._check(graph_id, if_match)
+            doc = json.loads(self.get(graph_id).body)
+            apply_patch(doc, patch)
+            try:
+                graph = GraphModel.model_validate(doc)
+            except ValidationError as exc:
+                raise PatchError(f"Patched graph is invalid: {exc}") from exc
+            body = graph.model_dump_json().encode("utf-8")
+            return self._commit(graph_id, body, len(graph.nodes), graph)
+
+    def delete(self, graph_id: str, *, if_match: str | None = None) -> None:
+        with self._writer(graph_id):
+            with self._lock:
+                current = self._etags.get(graph_id)
+                if current is None:
+                    raise KeyError(f"Unknown graph: {graph_id}")
+                if if_match is not None and if_match != "*" and if_match != current:
+                    raise VersionConflictError(
+                        f"Graph {graph_id} is at {current}, not {if_match}"
+                    )
+                del self._heads[graph_id]
+                del self._etags[graph_id]
+                del self._info[graph_id]
+                self._first.pop(graph_id, None)
+                for k in [k for k in self._resident if k[0] == graph_id]:
+                    del self._resident[k]
+                for k in [k for k in self._cold if k[0] == graph_id]:
+                    del self._cold[k]
+            if self._root is not None:
+                d = self._dir(graph_id)
+                for f in d.glob("*.json"):
+                    f.unlink()
+                d.rmdir()
+
+    def _resolve(self, graph_id: str, version: int | None) -> int:
+        # caller holds self._lock
+        head = self._heads.get(graph_id)
+        if head is None:
+            raise KeyError(f"Unknown graph: {graph_id}")
+        v = head if version is None else version
+        if not self._first.get(graph_id, 1) <= v <= head:
+            raise KeyError(f"Unknown version {v} of graph {graph_id}")
+        return v
+
+    def _writer(self, graph_id: str) -> threading.Lock:
+        with self._lock:
+            return self._writers.setdefault(graph_id, threading.Lock())
+
+    def _check(self, graph_id: str, if_match: str | None) -> None:
+        # caller holds self._lock
+        current = self._etags.get(graph_id)
+        if if_match is not None and if_match != "*" and if_match != current:
+            raise VersionConflictError(
+                f"Graph {graph_id} is at {current or 'no version'}, not {if_match}"
+            )
+        if if_match == "*" and current is None:
+            raise VersionConflictError(f"Graph {graph_id} does not exist")
+
+    def _commit(
+        self, graph_id: str, body: bytes, nodes: int, graph: GraphModel | None = None
+    ) -> GraphVersion:
+        # caller holds self._writer(graph_id), so the head cannot move until we publish
+        with self._lock:
+            version = self._heads.get(graph_id, 0) + 1
+        gv = GraphVersion(graph_id, version, body, nodes, graph)
+        if self._root is not None:
+            self._write(gv)
+        with self._lock:
+            self._heads[graph_id] = gv.version
+            self._etags[graph_id] = gv.etag
+            self._info[graph_id] = gv.describe()
+            self._admit(gv)
+            if self._root is None:
+                first = self._first.get(graph_id, 1)
+                keep = max(1, gv.version - self._max_history + 1)
+                for v in range(first, keep):
+                    self._resident.pop((graph_id, v), None)
+                    self._cold.pop((graph_id, v), None)
+                self._first[graph_id] = max(first, keep)
+        return gv
+
+    def _admit(self, gv: GraphVersion) -> None:
+        # caller holds self._lock
+        self._resident[(gv.graph_id, gv.version)] = gv
+        self._resident.move_to_end((gv.graph_id, gv.version))
+        while len(self._resident) > self._max_resident:
+            key, old = self._resident.popitem(last=False)
+            if self._root is None:
+                old.unload()
+                self._cold[key] = old
+
+    def _dir(self, graph_id: str) -> Path:
+        assert self._root is not None
+        return self._root / quote(graph_id, safe="")
+
+    def _write(self, gv: GraphVersion) -> None:
+        """Write ``gv`` to a temporary file and rename it into place."""
+        d = self._dir(gv.graph_id)
+        d.mkdir(parents=True, exist_ok=True)
+        tmp = d / f"{gv.version}.json.tmp"
+        tmp.write_bytes(gv.body)
+        tmp.replace(d / f"{gv.version}.json")
+
+    def _load(self, graph_id: str, version: int) -> GraphVersion:
+        """A cold version: popped from memory (caller holds self._lock) or read from disk.
+        A version read from disk keeps its validated graph for the first plan()."""
+        if self._root is None:
+            gv = self._cold.pop((graph_id, version), None)
+            if gv is None:
+                raise KeyError(f"Unknown version {version} of graph {graph_id}")
+            return gv
+        try:
+            body = (self._dir(graph_id) / f"{version}.json").read_bytes()
+        except FileNotFoundError as exc:
+            raise KeyError(f"Unknown version {version} of graph {graph_id}") from exc
+        graph = GraphModel.model_validate_json(body)
+        return GraphVersion(graph_id, version, body, len(graph.nodes), graph)
+
+    def _scan(self) -> None:
+        """Rebuild heads from disk; etags need the head's hash, so heads are loaded."""
+        assert self._root is not None
+        if not self._root.is_dir():
+            return
+        for d in self._root.iterdir():
+            versions = [int(f.stem) for f in d.glob("*.json") if f.stem.isdigit()]
+            if not versions:
+                continue
+            graph_id = unquote(d.name)
+            head = self._load(graph_id, max(versions))
+            self._heads[graph_id] = head.version
+            self._etags[graph_id] = head.etag
+            self._info[graph_id] = head.describe()
+            self._admit(head)
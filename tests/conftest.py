@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Tuple
+
+import pytest
+
+import nodes  # noqa: F401  (registers node types lazily, see core.plugins)
+from runtime.engine import Engine
+from runtime.events import EventBus
+from runtime.services import ServiceContainer
+from server.schemas import GraphModel
+
+GraphFactory = Callable[..., GraphModel]
+
+
+def build_graph(
+    specs: List[Dict[str, Any]],
+    exec_edges: List[Tuple[str, str]] = (),  # type: ignore[assignment]
+    data_edges: List[Tuple[str, str, str, str]] = (),  # type: ignore[assignment]
+) -> GraphModel:
+    """GraphModel from node dicts, (src, dst) exec edges and (src, port, dst, port) data edges."""
+    return GraphModel.model_validate({
+        "nodes": specs,
+        "edges": {
+            "exec": [{"src": s, "dst": d} for s, d in exec_edges],
+            "data": [{"src": [s, sp], "dst": [d, dp]} for s, sp, d, dp in data_edges],
+        },
+    })
+
+
+@pytest.fixture
+def graph() -> GraphFactory:
+    return build_graph
+
+
+@pytest.fixture
+def bus() -> EventBus:
+    return EventBus()
+
+
+@pytest.fixture
+def engine(bus: EventBus) -> Engine:
+    engine = Engine(ServiceContainer(), bus)
+    yield engine
+    engine.close()
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+
+    from server.app import create_app
+
+    return TestClient(create_app())
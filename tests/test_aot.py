@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Mapping
+
+import pytest
+from pydantic import ValidationError
+
+from core.node import Node, NodeContext
+from core.registry import register_node
+from runtime.aot import AotCompiler, generate
+from server.schemas import GraphModel, NodeInstance
+
+CONCAT = [
+    {"id": "a", "type": "AgentFlow/Const", "params": {"value": "x"}},
+    {"id": "b", "type": "AgentFlow/Const", "params": {"value": "y"}},
+    {"id": "c", "type": "AgentFlow/Concat", "inputs": {"b": "?"}},
+    {"id": "d", "type": "AgentFlow/Branch", "params": {"bb_key": "k", "equals": "xy"}},
+]
+CONCAT_EXEC = [("a", "c"), ("b", "c"), ("c", "d")]
+CONCAT_DATA = [("a", "out", "c", "a"), ("b", "out", "c", "b"), ("c", "out", "d", "value")]
+
+
+@register_node
+class _Upper(Node):
+    TYPE_NAME = "Test/AotUpper"
+    INPUTS = {"text": "string"}
+    OUTPUTS = {"out": "string"}
+
+    async def run(self, ctx: NodeContext, inputs: Mapping[str, Any], params: Mapping[str, Any]):
+        await asyncio.sleep(0)
+        return {"out": str(inputs.get("text")).upper()}
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_compiled_run_matches_engine(engine, graph, parallel):
+    g = graph(CONCAT, CONCAT_EXEC, CONCAT_DATA)
+    expected = engine.run(g, inputs={"q": 1}, run_id="r")
+    got = AotCompiler(engine).run(g, inputs={"q": 1}, run_id="r", parallel=parallel)
+    assert got == expected
+    assert got["last_outputs"]["d"] == {"out": "xy"}
+    assert got["blackboard"] == {"q": 1, "k": "xy", "k__match": True}
+
+
+def test_compiled_run_async(engine, graph):
+    g = graph(CONCAT, CONCAT_EXEC, CONCAT_DATA)
+    got = asyncio.run(AotCompiler(engine).run_async(g, run_id="r"))
+    assert got == engine.run(g, run_id="r")
+
+
+def test_sequential_run_async_awaits_async_nodes(engine, graph):
+    specs = [
+        {"id": "a", "type": "AgentFlow/Const", "params": {"value": "x"}},
+        {"id": "b", "type": "Test/AotUpper"},
+    ]
+    g = graph(specs, [("a", "b")], [("a", "out", "b", "text")])
+    compiled = AotCompiler(engine).compile(g)
+    assert not compiled.parallel
+    got = asyncio.run(compiled.run_async(run_id="r"))
+    assert got == engine.run(g, run_id="r")
+    assert got["last_outputs"]["b"] == {"out": "X"}
+    assert compiled.run(run_id="r") == got
+
+
+def test_targets(engine, graph):
+    g = graph(CONCAT, CONCAT_EXEC, CONCAT_DATA)
+    got = AotCompiler(engine).run(g, run_id="r", mode="dataflow", targets=["c"])
+    assert got == engine.run(g, run_id="r", mode="dataflow", targets=["c"])
+    assert set(got["last_outputs"]) == {"a", "b", "c"}
+
+
+def test_hooks_publish_node_events(engine, graph, bus):
+    g = graph(CONCAT, CONCAT_EXEC, CONCAT_DATA)
+    seen = []
+    sub = bus.subscribe(lambda evt: seen.append((evt.type, evt.fields.get("node_id"))))
+    try:
+        compiled = AotCompiler(engine).compile(g)
+        assert compiled.hooks
+        compiled.run(run_id="r")
+    finally:
+        bus.unsubscribe(sub)
+        for evt in sub.drain():
+            seen.append((evt.type, evt.fields.get("node_id")))
+    assert ("NodeFinished", "d") in seen
+    assert ("GraphFinished", None) in seen
+
+
+def test_disk_cache_is_reused(engine, graph, tmp_path):
+    g = graph(CONCAT, CONCAT_EXEC, CONCAT_DATA)
+    first = AotCompiler(engine, tmp_path).compile(g, hooks=False)
+    assert first.path is not None and first.path.parent == tmp_path
+    second = AotCompiler(engine, tmp_path).compile(g, hooks=False)
+    assert second.path == first.path
+    assert second.source == first.source
+    assert second.run(run_id="r") == engine.run(g, run_id="r")
+
+
+def test_node_ids_with_control_characters_are_rejected(graph):
+    with pytest.raises(ValidationError):
+        graph([{"id": "a\nb", "type": "AgentFlow/Const"}])
+
+
+def test_user_strings_cannot_inject_code(engine, tmp_path):
+    marker = tmp_path / "pwned"
+    evil = f"a\n        open({str(marker)!r}, 'w').write('x')\n        #"
+    # bypass validation: the generator must be safe even for ids the schema would reject
+    node = NodeInstance.model_construct(id=evil, type="AgentFlow/Const", params={"value": 1})
+    g = GraphModel(nodes=[NodeInstance(id="ok", type="AgentFlow/Const")])
+    g.nodes[0] = node
+    plan = engine.compile(g)
+    source = generate(plan)
+    assert "\n        open(" not in source
+    AotCompiler(engine).run(plan)
+    assert not marker.exists()
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import threading
+from typing import Any, Mapping
+
+import pytest
+from fastapi import WebSocketDisconnect
+
+from core.node import Node, NodeContext
+from core.registry import register_node
+
+CONST = "AgentFlow/Const"
+
+
+def _put(client, graph_id):
+    url = f"/api/graphs/{graph_id}"
+    nodes = [{"id": "a", "type": CONST, "params": {"value": 1}}]
+    assert client.put(url, json={"nodes": nodes}).status_code == 200
+    return url
+
+
+def test_run(client):
+    url = _put(client, "app-run")
+    payloads = (
+        {}, {"parallel": True}, {"incremental": True}, {"compiled": True},
+        {"compiled": True, "parallel": True},
+    )
+    for payload in payloads:
+        r = client.post(f"{url}/run", json=payload)
+        assert r.status_code == 200, payload
+        assert r.json()["last_outputs"]["a"] == {"out": 1}
+
+
+@register_node
+class _LoopThread(Node):
+    TYPE_NAME = "Test/LoopThread"
+
+    async def run(self, ctx: NodeContext, inputs: Mapping[str, Any], params: Mapping[str, Any]):
+        return {"out": threading.current_thread().name}
+
+
+def test_parallel_runs_leave_server_loop(client):
+    url = "/api/graphs/app-run-loop"
+    nodes = [{"id": "a", "type": "Test/LoopThread"}]
+    assert client.put(url, json={"nodes": nodes}).status_code == 200
+    for payload in ({"parallel": True}, {"compiled": True, "parallel": True}):
+        r = client.post(f"{url}/run", json=payload)
+        assert r.status_code == 200, payload
+        assert r.json()["last_outputs"]["a"] == {"out": "agentflow-run-loop"}, payload
+
+
+def test_parallel_incremental_run_is_rejected(client):
+    url = _put(client, "app-parallel-incremental")
+    r = client.post(f"{url}/run", json={"parallel": True, "incremental": True})
+    assert r.status_code == 400
+
+
+def _batch_lines(r):
+    assert r.status_code == 200
+    return sorted((json.loads(line) for line in r.text.splitlines()), key=lambda x: x["index"])
+
+
+def test_batch_json(client):
+    url = _put(client, "app-batch-json")
+    r = client.post(f"{url}/run/batch", json={"inputs": [{"q": 1}, {"q": 2}]})
+    assert [x["blackboard"] for x in _batch_lines(r)] == [{"q": 1}, {"q": 2}]
+
+
+def test_batch_ndjson_is_read_as_a_stream(client):
+    url = _put(client, "app-batch-ndjson")
+
+    def body():
+        yield b'{"q": 1}\n{"q"'
+        yield b': 2}\nnot json\n'
+        yield b'{"q": 4}'
+
+    r = client.post(
+        f"{url}/run/batch?batch_size=1&concurrency=2", content=body(),
+        headers={"content-type": "application/x-ndjson"},
+    )
+    results = _batch_lines(r)
+    assert [x["ok"] for x in results] == [True, True, False, True]
+    assert [x.get("blackboard") for x in results] == [{"q": 1}, {"q": 2}, None, {"q": 4}]
+
+
+def test_batch_size_is_clamped(client, monkeypatch):
+    from server import app
+
+    seen = []
+    run_many = app._ENGINE.run_many
+
+    def spy(*args, **kwargs):
+        seen.append(kwargs["batch_size"])
+        return run_many(*args, **kwargs)
+
+    monkeypatch.setattr(app._ENGINE, "run_many", spy)
+    url = _put(client, "app-batch-size")
+    for size in (10**9, 8):
+        r = client.post(f"{url}/run/batch", json={"inputs": [{}], "batch_size": size})
+        assert [x["ok"] for x in _batch_lines(r)] == [True]
+    assert seen == [app._BATCH_MAX_SIZE, 8]
+
+
+@pytest.mark.parametrize("max_chars", ["abc", "0", "-5"])
+def test_ws_events_rejects_bad_max_chars(client, max_chars):
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect(f"/ws/events?max_chars={max_chars}"):
+            pass
+    assert exc.value.code == 1008
+
+
+def test_ws_events_accepts_max_chars(client):
+    with client.websocket_connect("/ws/events?max_chars=10&verbosity=full") as ws:
+        ws.send_text("ping")
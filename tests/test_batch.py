@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, List, Mapping
+
+from core.node import Node, NodeContext
+from core.registry import register_node
+
+
+@register_node
+class _Exclusive(Node):
+    """Fails if one instance is ever used by two threads at once."""
+
+    TYPE_NAME = "Test/Exclusive"
+    SCOPE = "process"
+    INPUTS = {"x": "any"}
+    OUTPUTS = {"out": "any"}
+
+    def setup(self, services) -> None:
+        self.busy = threading.Lock()
+
+    def run(self, ctx: NodeContext, inputs: Mapping[str, Any], params: Mapping[str, Any]):
+        if not self.busy.acquire(blocking=False):
+            raise RuntimeError("instance shared between threads")
+        try:
+            time.sleep(0.002)
+            return {"out": inputs.get("x")}
+        finally:
+            self.busy.release()
+
+
+@register_node
+class _Vector(Node):
+    TYPE_NAME = "Test/Vector"
+    INPUTS = {"x": "int"}
+    OUTPUTS = {"out": "int"}
+    sizes: List[int] = []
+
+    def run_batch(self, ctxs, inputs, params):
+        self.sizes.append(len(inputs))
+        if any(ctx.blackboard.get("x") == "bad" for ctx in ctxs):
+            raise ValueError("bad chunk")
+        return [{"out": ctx.blackboard.get("x") * 2} for ctx in ctxs]
+
+
+def _graph(graph):
+    return graph([{"id": "e", "type": "Test/Exclusive", "inputs": {"x": 0}}])
+
+
+def test_run_many_matches_run(engine, graph):
+    g = graph([{"id": "a", "type": "AgentFlow/Const", "params": {"value": 1}}])
+    results = list(engine.run_many(g, [{"q": i} for i in range(5)], batch_size=2))
+    results.sort(key=lambda r: r["index"])
+    assert [r["index"] for r in results] == list(range(5))
+    assert all(r["ok"] and r["last_outputs"]["a"] == {"out": 1} for r in results)
+    assert results[3]["blackboard"] == {"q": 3}
+
+
+def test_invalid_item_fails_alone(engine, graph):
+    results = list(engine.run_many(_graph(graph), [{}, 7, None]))
+    assert [r["ok"] for r in results] == [True, False, True]
+
+
+def test_concurrent_chunks_do_not_share_instances(engine, graph):
+    results = list(engine.run_many(_graph(graph), [{}] * 64, concurrency=8, batch_size=1))
+    assert [r.get("error") for r in results if not r["ok"]] == []
+    assert len(results) == 64
+
+
+def test_run_batch_is_called_once_per_chunk(engine, graph):
+    g = graph([{"id": "v", "type": "Test/Vector"}])
+    _Vector.sizes.clear()
+    results = list(engine.run_many(g, [{"x": i} for i in range(5)], batch_size=2))
+    assert _Vector.sizes == [2, 2, 1]
+    assert [r["last_outputs"]["v"]["out"] for r in results] == [0, 2, 4, 6, 8]
+
+
+def test_run_batch_failure_fails_its_chunk_only(engine, graph):
+    g = graph([{"id": "v", "type": "Test/Vector"}])
+    items = [{"x": 1}, {"x": 2}, {"x": "bad"}, {"x": 3}, {"x": 4}]
+    results = list(engine.run_many(g, items, batch_size=2))
+    assert [r["ok"] for r in results] == [True, True, False, False, True]
+    assert results[3]["error"] == "v: ValueError: bad chunk"
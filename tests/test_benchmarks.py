@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from bench_scheduler import SHAPES, _best
+from suite import Result, compare
+
+ENV = {"python": "3.11", "platform": "p", "machine": "m"}
+
+
+def _baseline(calibration=None, **env):
+    return {
+        "env": {**ENV, **env, "calibration": calibration},
+        "results": [
+            {"name": "t", "value": 1.0, "unit": "s", "better": "lower"},
+            {"name": "rate", "value": 100.0, "unit": "req/s", "better": "higher"},
+        ],
+    }
+
+
+def _results(t, rate):
+    return [Result("t", t, "s"), Result("rate", rate, "req/s", "higher")]
+
+
+def test_slower_host_is_not_a_regression():
+    env = {**ENV, "calibration": 2.0}
+    assert compare(_results(2.0, 50.0), _baseline(1.0), 0.25, env) == []
+    regressions = compare(_results(3.0, 30.0), _baseline(1.0), 0.25, env)
+    assert [line.split(":")[0] for line in regressions] == ["t", "rate"]
+
+
+def test_uncalibrated_baseline_only_compares_on_its_host():
+    assert len(compare(_results(2.0, 100.0), _baseline(), 0.25, ENV)) == 1
+    other = {**ENV, "machine": "other"}
+    assert compare(_results(2.0, 100.0), _baseline(), 0.25, other) == []
+
+
+def test_run_on_a_model_is_no_slower_than_on_its_plan(engine):
+    graph = SHAPES["chain"](1000)
+    plan = engine.compile(graph)
+    by_plan = _best(lambda: engine.run(plan), 5)
+    by_model = _best(lambda: engine.run(graph), 5)
+    assert by_model <= by_plan * 1.25
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import random
+import threading
+
+import pytest
+
+from core.blackboard import Blackboard
+from core.persistent import PersistentMap
+
+
+def _chain():
+    glob = Blackboard("global")
+    graph = Blackboard("graph", glob)
+    return Blackboard("run", graph), graph, glob
+
+
+def test_scopes_fall_back_outward():
+    run, graph, glob = _chain()
+    glob.set("k", "global")
+    assert run.get("k") == "global" and "k" in run
+    run.set("k", "graph", scope="graph")
+    assert run.get("k") == "graph"
+    run.set("k", "run")
+    assert run.get("k") == "run" and glob.get("k") == "global"
+    assert run.board("global") is glob
+    assert run.delete("k")
+    assert run.get("k") == "graph"
+    assert not run.delete("k")
+    with pytest.raises(KeyError):
+        glob.board("run")
+    with pytest.raises(ValueError):
+        Blackboard("session")
+
+
+def test_versions_and_compare_and_set():
+    bb = Blackboard()
+    assert bb.version("k") == 0
+    assert bb.compare_and_set("k", 0, "a")
+    v = bb.version("k")
+    assert not bb.compare_and_set("k", 0, "b")
+    assert bb.compare_and_set("k", v, "c")
+    assert bb.get("k") == "c" and bb.version("k") > v
+    assert bb.set("other", 1) > bb.version("k")
+
+
+def test_snapshot_is_isolated_from_later_writes():
+    bb = Blackboard()
+    bb.set("a", 1)
+    bb.set("b", 2)
+    snap = bb.snapshot()
+    bb.set("a", 10)
+    bb.delete("b")
+    assert dict(snap) == {"a": 1, "b": 2}
+    assert snap.version("b") > 0
+    assert bb.as_dict() == {"a": 10}
+
+
+def test_as_dict_is_in_write_order():
+    bb = Blackboard()
+    for key in ("c", "a", "b"):
+        bb.set(key, key)
+    bb.set("c", "again")
+    assert list(bb.as_dict()) == ["a", "b", "c"]
+
+
+def test_subscribe():
+    bb = Blackboard("graph")
+    seen, only_a = [], []
+    stop = bb.subscribe(lambda *args: seen.append(args))
+    bb.subscribe(lambda *args: only_a.append(args[1]), keys=["a"])
+    bb.subscribe(lambda *args: 1 / 0)  # failing listeners are logged, not raised
+    v = bb.set("a", 1)
+    bb.set("b", 2)
+    bb.delete("a")
+    stop()
+    bb.set("c", 3)
+    assert seen[0] == ("graph", "a", 1, v)
+    assert [s[1] for s in seen] == ["a", "b", "a"] and seen[-1][3] == 0
+    assert only_a == ["a", "a"]
+
+
+def test_concurrent_updates_are_not_lost():
+    bb = Blackboard()
+
+    def bump():
+        for _ in range(500):
+            bb.update("n", lambda n: n + 1, 0)
+
+    threads = [threading.Thread(target=bump) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert bb.get("n") == 4000
+
+
+class _Collide:
+    def __init__(self, name):
+        self.name = name
+
+    def __hash__(self):
+        return 7
+
+    def __eq__(self, other):
+        return isinstance(other, _Collide) and other.name == self.name
+
+
+def test_persistent_map_matches_dict():
+    rng = random.Random(0)
+    ref = {}
+    m = PersistentMap()
+    versions = []
+    keys = [str(i) for i in range(300)] + [_Collide(i) for i in range(5)]
+    for _ in range(3000):
+        key = rng.choice(keys)
+        if rng.random() < 0.3:
+            ref.pop(key, None)
+            m = m.delete(key)
+        else:
+            ref[key] = rng.random()
+            m = m.set(key, ref[key])
+        versions.append((m, dict(ref)))
+    for snapshot, expected in versions[::300]:
+        assert len(snapshot) == len(expected)
+        assert dict(snapshot.items()) == expected
+
+
+def test_persistent_map_hash_collisions():
+    m = PersistentMap({_Collide(i): i for i in range(3)})
+    smaller = m.delete(_Collide(1))
+    assert [m[_Collide(i)] for i in range(3)] == [0, 1, 2]
+    assert _Collide(1) not in smaller and len(smaller) == 2
+    assert len(smaller.delete(_Collide(9))) == 2
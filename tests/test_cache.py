@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from typing import Any, List, Mapping
+
+import pytest
+
+from core.node import Node, NodeContext
+from core.registry import register_node
+from runtime.cache import MemoryCache, SQLiteCache, cache_from_spec, cache_key
+from runtime.engine import Engine
+from runtime.events import EventBus
+from runtime.services import ServiceContainer
+
+
+@register_node
+class _Square(Node):
+    TYPE_NAME = "Test/Square"
+    CACHEABLE = True
+    INPUTS = {"x": "int"}
+    OUTPUTS = {"out": "int"}
+    calls: List[int] = []
+
+    def run(self, ctx: NodeContext, inputs: Mapping[str, Any], params: Mapping[str, Any]):
+        self.calls.append(inputs["x"])
+        return {"out": inputs["x"] ** 2}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    def make(**kw):
+        if request.param == "memory":
+            return MemoryCache(**kw)
+        return SQLiteCache(tmp_path / "cache.sqlite3", **kw)
+
+    return make
+
+
+def test_cache_key():
+    assert cache_key("T", {"a": 1, "b": [1, 2]}, {}) == cache_key("T", {"b": (1, 2), "a": 1}, {})
+    assert cache_key("T", {}, {"x": 1}) != cache_key("U", {}, {"x": 1})
+    assert cache_key("T", {}, {"x": object()}) is None
+
+
+def test_get_set_and_lru(make_cache):
+    cache = make_cache(maxsize=2)
+    cache.set("a", {"out": 1})
+    cache.set("b", {"out": 2})
+    assert cache.get("a") == {"out": 1}
+    cache.set("c", {"out": 3})
+    assert cache.get("b") is None and cache.get("a") == {"out": 1}
+    assert len(cache) == 2
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 1)
+
+
+def test_ttl(make_cache, monkeypatch):
+    import runtime.cache
+
+    now = [1000.0]
+    monkeypatch.setattr(runtime.cache.time, "time", lambda: now[0])
+    cache = make_cache(ttl=10)
+    cache.set("a", {"out": 1})
+    now[0] += 5
+    assert cache.get("a") == {"out": 1}
+    now[0] += 6
+    assert cache.get("a") is None
+
+
+def test_sqlite_survives_reopen(tmp_path):
+    SQLiteCache(tmp_path / "c.sqlite3").set("a", {"out": [1]})
+    assert SQLiteCache(tmp_path / "c.sqlite3").get("a") == {"out": [1]}
+
+
+def test_cache_from_spec(tmp_path):
+    assert cache_from_spec("off") is None
+    assert isinstance(cache_from_spec("memory:5"), MemoryCache)
+    assert isinstance(cache_from_spec(f"sqlite:{tmp_path / 'c.db'}"), SQLiteCache)
+    with pytest.raises(ValueError):
+        cache_from_spec("redis")
+
+
+@pytest.mark.parametrize("override, runs", [(None, [3]), (False, [3, 3])])
+def test_engine_serves_cacheable_nodes_from_cache(graph, override, runs):
+    engine = Engine(ServiceContainer(), EventBus(), cache=MemoryCache())
+    g = graph([{"id": "s", "type": "Test/Square", "inputs": {"x": 3}, "cache": override}])
+    _Square.calls.clear()
+    try:
+        first, second = engine.run(g, run_id="r"), engine.run(g, run_id="r")
+    finally:
+        engine.close()
+    assert first == second and second["last_outputs"]["s"] == {"out": 9}
+    assert _Square.calls == runs
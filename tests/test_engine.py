@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Mapping
+
+import pytest
+
+from core.node import Node, NodeContext
+from core.registry import register_node
+from runtime.engine import Engine
+from runtime.events import EventBus
+from runtime.plan import GraphError
+from runtime.services import ServiceContainer
+
+CONST = "AgentFlow/Const"
+
+
+@register_node
+class _Sleep(Node):
+    """Sleeps, tracking how many instances are sleeping at once."""
+
+    TYPE_NAME = "Test/Sleep"
+    PARAMS = {"s": "float"}
+    OUTPUTS = {"out": "any"}
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def run(self, ctx: NodeContext, inputs: Mapping[str, Any], params: Mapping[str, Any]):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        time.sleep(params.get("s", 0.05))
+        with cls.lock:
+            cls.active -= 1
+        return {"out": ctx.node_id}
+
+
+@register_node
+class _AsyncEcho(Node):
+    TYPE_NAME = "Test/AsyncEcho"
+    INPUTS = {"x": "any"}
+    OUTPUTS = {"out": "any"}
+
+    async def run(self, ctx: NodeContext, inputs: Mapping[str, Any], params: Mapping[str, Any]):
+        await asyncio.sleep(0)
+        return {"out": inputs.get("x")}
+
+
+@pytest.fixture
+def sleep():
+    _Sleep.active = _Sleep.peak = 0
+    return _Sleep
+
+
+def _fan(n):
+    return [{"id": f"s{i}", "type": "Test/Sleep"} for i in range(n)]
+
+
+def test_run_async_matches_run(engine, graph):
+    g = graph(
+        [{"id": "a", "type": CONST, "params": {"value": 3}}, {"id": "e", "type": "Test/AsyncEcho"}],
+        [("a", "e")], [("a", "out", "e", "x")],
+    )
+    got = asyncio.run(engine.run_async(g, run_id="r"))
+    assert got == engine.run(g, run_id="r")
+    assert got["last_outputs"]["e"] == {"out": 3}
+
+
+def test_run_async_overlaps_independent_branches(engine, graph, sleep):
+    asyncio.run(engine.run_async(graph(_fan(4))))
+    assert sleep.peak > 1
+
+
+def test_run_is_sequential(engine, graph, sleep):
+    engine.run(graph(_fan(3)))
+    assert sleep.peak == 1
+
+
+@pytest.mark.parametrize("limits", [
+    {"max_concurrency": 2},
+    {"type_limits": {"Test/Sleep": 2}},
+])
+def test_run_async_limits(graph, sleep, limits):
+    engine = Engine(ServiceContainer(), EventBus(), **limits)
+    try:
+        asyncio.run(engine.run_async(graph(_fan(6), [], []), run_id="r"))
+    finally:
+        engine.close()
+    assert sleep.peak == 2
+
+
+DATAFLOW = [
+    {"id": "a", "type": CONST, "params": {"value": "x"}},
+    {"id": "b", "type": CONST, "params": {"value": "y"}},
+    {"id": "c", "type": "AgentFlow/Concat"},
+    {"id": "z", "type": CONST, "params": {"value": "unused"}},
+]
+DATAFLOW_DATA = [("a", "out", "c", "a"), ("b", "out", "c", "b")]
+
+
+def test_dataflow_mode_waits_for_producers(engine, graph):
+    # c is listed before its producers and has no exec edges
+    g = graph([DATAFLOW[2], *DATAFLOW[:2]], [], DATAFLOW_DATA)
+    assert engine.run(g, mode="dataflow")["last_outputs"]["c"] == {"out": "xy"}
+    assert engine.run(g)["last_outputs"]["c"] == {"out": ""}
+
+
+def test_targets_run_only_dependencies(engine, graph):
+    g = graph(DATAFLOW, [], DATAFLOW_DATA)
+    got = engine.run(g, targets=["c"])
+    assert got["last_outputs"] == {"a": {"out": "x"}, "b": {"out": "y"}, "c": {"out": "xy"}}
+    got = asyncio.run(engine.run_async(g, targets=["a"]))
+    assert list(got["last_outputs"]) == ["a"]
+
+
+def test_dataflow_errors(engine, graph):
+    g = graph(DATAFLOW[:3], [], DATAFLOW_DATA + [("c", "out", "a", "x")])
+    with pytest.raises(GraphError, match="Data flow has a cycle"):
+        engine.run(g, mode="dataflow")
+    with pytest.raises(GraphError, match="Target references unknown node: nope"):
+        engine.run(graph(DATAFLOW), targets=["nope"])
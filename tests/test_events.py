@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+from runtime.events import Event, summarize, truncate
+
+
+class _Loud:
+    def __repr__(self) -> str:
+        return "x" * 1000
+
+
+def test_truncate_nested():
+    got = truncate({"s": "a" * 10, "l": list(range(150))}, 4)
+    assert got["s"] == "aaaa... (+6 chars)"
+    assert len(got["l"]) == 101 and got["l"][-1] == "... (+50 items)"
+
+
+def test_summarize_scalars_and_sizes():
+    assert summarize("abc") == {"type": "str", "len": 3, "preview": "abc"}
+    assert summarize({"n": 1}) == {"n": {"type": "int", "preview": 1}}
+    assert summarize(None) == {"type": "NoneType", "preview": None}
+
+
+def test_summarize_preview_is_bounded():
+    got = summarize(list(range(10**6)), 40)
+    assert got["len"] == 10**6
+    assert got["preview"].startswith("[0, 1, 2") and len(got["preview"]) <= 40 + 30
+    assert len(summarize(_Loud(), 40)["preview"]) <= 40 + 30
+
+
+def test_summarize_bounds_wide_dicts():
+    got = summarize({str(i): i for i in range(500)})
+    assert len(got) == 101 and got["..."] == "+400 keys"
+
+
+def _evt(i, node="n"):
+    return Event("NodeFinished", {"run_id": "r", "node_id": node, "i": i})
+
+
+@pytest.mark.parametrize("policy, kept", [
+    ("drop_oldest", [1, 2]),
+    ("drop_newest", [0, 1]),
+    ("coalesce", [0, 2]),
+])
+def test_overflow_policies(bus, policy, kept):
+    sub = bus.open(maxsize=2, policy=policy)
+    bus.publish(_evt(0, "a"))
+    bus.publish(_evt(1, "b"))
+    bus.publish(_evt(2, "b"))
+    assert [e.fields["i"] for e in sub.drain()] == kept
+    assert sub.take_dropped() == 1 and sub.take_dropped() == 0
+
+
+def test_active_only_while_subscribed(bus):
+    assert not bus.active
+    sub = bus.open()
+    assert bus.active
+    sub.close()
+    assert not bus.active
+    bus.publish(_evt(0))
+    assert len(sub) == 0
+
+
+def test_next_batch_waits_for_events(bus):
+    sub = bus.open()
+
+    async def consume():
+        task = asyncio.ensure_future(sub.next_batch(max_items=2))
+        await asyncio.sleep(0.01)
+        assert not task.done()
+        threading.Thread(target=lambda: [bus.publish(_evt(i)) for i in range(3)]).start()
+        first = await task
+        return first, await sub.next_batch()
+
+    first, rest = asyncio.run(consume())
+    assert [e.fields["i"] for e in first + rest] == [0, 1, 2]
+
+
+def test_callbacks_run_off_the_publishing_thread(bus):
+    seen, done = [], threading.Event()
+
+    def bad(evt):
+        raise RuntimeError("ignored")
+
+    def good(evt):
+        seen.append((evt.fields["i"], threading.current_thread().name))
+        if len(seen) == 3:
+            done.set()
+
+    bus.subscribe(bad)
+    bus.subscribe(good)
+    for i in range(3):
+        bus.publish(_evt(i))
+    assert done.wait(5)
+    assert [i for i, _ in seen] == [0, 1, 2]
+    assert {name for _, name in seen} == {"agentflow-events"}
+
+
+def test_engine_publishes_run_events(engine, bus, graph):
+    sub = bus.open()
+    engine.run(graph([{"id": "a", "type": "AgentFlow/Const"}]), run_id="r")
+    types = [e.type for e in sub.drain()]
+    assert types[0] == "GraphStarted" and types[-1] == "GraphFinished"
+    assert "NodeFinished" in types
+
+
+def test_detail_is_built_lazily_and_once():
+    calls = []
+
+    def detail():
+        calls.append(1)
+        return {"outputs": {"out": "x" * 500}}
+
+    evt = Event("NodeFinished", {"node_id": "a"}, detail)
+    assert evt.render("ids") == {"type": "NodeFinished", "payload": {"node_id": "a"}}
+    assert calls == []
+    summary = evt.render("summary")["payload"]
+    assert summary["outputs"]["out"]["len"] == 500
+    assert len(evt.render("full", max_chars=10)["payload"]["outputs"]["out"]) < 40
+    assert evt.render()["payload"]["outputs"]["out"] == "x" * 500
+    assert calls == [1]
+
+
+def test_subscription_verbosity(bus):
+    sub = bus.open(verbosity="ids")
+    bus.publish(Event("E", {"run_id": "r"}, lambda: {"big": 1}))
+    assert sub.render(sub.drain()[0]) == {"type": "E", "payload": {"run_id": "r"}}
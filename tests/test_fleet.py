@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from runtime.events import EventBus
+from runtime.fleet import WorkerCrashedError, WorkerFleet
+
+CONST = "AgentFlow/Const"
+
+
+@pytest.fixture
+def fleet():
+    fleet = WorkerFleet(1, max_plans=2)
+    yield fleet
+    fleet.close()
+
+
+def test_run_matches_engine(engine, graph, fleet):
+    g = graph([{"id": "a", "type": CONST, "params": {"value": 1}}])
+    assert fleet.run(engine.compile(g), run_id="r") == engine.run(g, run_id="r")
+
+
+def test_plan_cache_evicts_least_recently_used(engine, graph, fleet):
+    plans = {
+        name: engine.compile(graph([{"id": "a", "type": CONST, "params": {"value": name}}]))
+        for name in "ABC"
+    }
+    for name in "ABACA":
+        got = fleet.run(plans[name], run_id=name)
+        assert got["last_outputs"]["a"] == {"out": name}
+    assert list(fleet._workers[0].plans) == [plans["C"].key, plans["A"].key]
+
+
+class _ExitOnLoad:
+    """Kills the worker process that unpickles it."""
+
+    def __reduce__(self):
+        return os._exit, (3,)
+
+
+def test_crashed_worker_is_replaced(engine, graph, fleet):
+    plan = engine.compile(graph([{"id": "a", "type": CONST, "params": {"value": 1}}]))
+    assert fleet.run(plan, run_id="r1")["last_outputs"]["a"] == {"out": 1}
+    with pytest.raises(WorkerCrashedError):
+        fleet.run(plan, inputs={"boom": _ExitOnLoad()}, run_id="r2")
+    assert fleet.run(plan, run_id="r3")["last_outputs"]["a"] == {"out": 1}
+    assert fleet.stats()["restarts"] == 1
+
+
+def test_plan_is_resent_when_the_worker_lacks_it(engine, graph, fleet):
+    plan = engine.compile(graph([{"id": "a", "type": CONST, "params": {"value": 2}}]))
+    fleet._ensure_workers()
+    fleet._workers[0].plans[plan.key] = None  # as if checked just before a restart
+    assert fleet.run(plan, run_id="r")["last_outputs"]["a"] == {"out": 2}
+
+
+def test_parallel_incremental_run_is_rejected(engine, graph, fleet):
+    plan = engine.compile(graph([{"id": "a", "type": CONST}]))
+    with pytest.raises(ValueError):
+        fleet.run(plan, parallel=True, session="s")
+
+
+@pytest.mark.parametrize("verbosity", ["ids", "full"])
+def test_events_carry_details_only_when_wanted(engine, graph, verbosity):
+    bus = EventBus()
+    sub = bus.open(verbosity=verbosity)
+    fleet = WorkerFleet(1, bus=bus, max_detail_chars=3)
+    try:
+        plan = engine.compile(graph([{"id": "a", "type": CONST, "params": {"value": "long"}}]))
+        fleet.run(plan, inputs={"q": "query"}, run_id="r")
+    finally:
+        fleet.close()
+    finished = [evt for evt in sub.drain() if evt.type == "GraphFinished"]
+    assert [evt.fields for evt in finished] == [{"run_id": "r"}]
+    if verbosity == "ids":
+        assert finished[0]._detail is None
+    else:
+        assert finished[0].detail == {"blackboard": {"q": "que... (+2 chars)"}}
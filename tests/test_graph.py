@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import json
+
+from core.graph import CompactGraph
+
+NODES = [
+    {"id": "a", "type": "AgentFlow/Const", "params": {"value": 1}},
+    {"id": "b", "type": "AgentFlow/Const"},
+    {"id": "c", "type": "AgentFlow/Concat", "position": [1, 2], "cache": False},
+]
+EXEC = [("a", "c"), ("b", "c")]
+DATA = [("a", "out", "c", "a"), ("b", "out", "c", "b")]
+
+
+def test_model_round_trip(graph):
+    model = graph(NODES, EXEC, DATA)
+    assert CompactGraph.from_model(model).to_model() == model
+
+
+def test_adjacency(graph):
+    g = CompactGraph.from_model(graph(NODES, EXEC, DATA))
+    a, b, c = (g.ids.index(i) for i in "abc")
+    assert len(g) == 3 and g.type_of(c) == "AgentFlow/Concat"
+    assert list(g.exec_next(a)) == [c]
+    assert sorted(g.exec_prev(c)) == [a, b] and g.exec_prev_count(c) == 2
+    ports = g.ports
+    assert sorted((ports[dp], s, ports[sp]) for dp, s, sp in g.data_in(c)) == [
+        ("a", a, "out"), ("b", b, "out")
+    ]
+
+
+def test_ir_round_trip():
+    ir = {
+        "version": "0.1.0",
+        "meta": {"name": "g"},
+        "graph": {
+            "nodes": [{"id": "a", "kind": "K", "inputs": {"x": 1}}, {"id": "b", "kind": "K"}],
+            "edges": {
+                "exec": [{"from": ["a", "done"], "to": ["b", "go"], "label": "l"}],
+                "data": [{"from": ["a", "out"], "to": ["b", "x"]}],
+            },
+        },
+    }
+    assert CompactGraph.from_ir(ir).to_ir() == ir
+
+
+def test_ir_round_trip_keeps_extra_keys():
+    ir = {
+        "version": "0.1.0",
+        "source": "editor",
+        "meta": {},
+        "graph": {
+            "name": "g",
+            "nodes": [{"id": "a", "kind": "K"}],
+            "edges": {"exec": [], "groups": [["a"]], "data": []},
+            "layout": {"a": [0, 0]},
+        },
+        "signature": "abc",
+    }
+    out = CompactGraph.from_ir(ir).to_ir()
+    assert json.dumps(out) == json.dumps(ir)
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from typing import Any, List, Mapping
+
+from core.node import Node, NodeContext
+from core.registry import register_node
+
+
+@register_node
+class _Writer(Node):
+    TYPE_NAME = "Test/Writer"
+    PARAMS = {"key": "string", "value": "any"}
+
+    def run(self, ctx: NodeContext, inputs: Mapping[str, Any], params: Mapping[str, Any]):
+        ctx.blackboard.set(params["key"], params["value"])
+        return {}
+
+
+@register_node
+class _Copy(Node):
+    TYPE_NAME = "Test/Copy"
+    PARAMS = {"src": "string", "dst": "string"}
+    OUTPUTS = {"out": "any"}
+    calls: List[str] = []
+
+    def run(self, ctx: NodeContext, inputs: Mapping[str, Any], params: Mapping[str, Any]):
+        self.calls.append(ctx.node_id)
+        value = ctx.blackboard.get(params["src"])
+        ctx.blackboard.set(params["dst"], value)
+        return {"out": value}
+
+
+@register_node
+class _Counter(Node):
+    TYPE_NAME = "Test/Counter"
+    OUTPUTS = {"n": "int"}
+
+    def run(self, ctx: NodeContext, inputs: Mapping[str, Any], params: Mapping[str, Any]):
+        return {"n": ctx.blackboard.update("n", lambda n: n + 1, 0, scope="graph")}
+
+
+@register_node
+class _Delete(Node):
+    TYPE_NAME = "Test/Delete"
+    PARAMS = {"key": "string"}
+
+    def run(self, ctx: NodeContext, inputs: Mapping[str, Any], params: Mapping[str, Any]):
+        ctx.blackboard.delete(params["key"])
+        return {}
+
+
+def _chain(value):
+    return [
+        {"id": "w", "type": "Test/Writer", "params": {"key": "x", "value": value}},
+        {"id": "m", "type": "Test/Copy", "params": {"src": "x", "dst": "y"}},
+        {"id": "r", "type": "Test/Copy", "params": {"src": "y", "dst": "z"}},
+    ]
+
+
+def _fresh(graph, g, **kw):
+    from runtime.engine import Engine
+    from runtime.events import EventBus
+    from runtime.services import ServiceContainer
+
+    other = Engine(ServiceContainer(), EventBus())
+    try:
+        return other.run(g, run_id="r", **kw)
+    finally:
+        other.close()
+
+
+def test_edit_upstream_writer_reaches_transitive_reader(engine, graph):
+    def nodes(value):
+        return [
+            {"id": "w", "type": "Test/Writer", "params": {"key": "x", "value": value}},
+            {"id": "m", "type": "Test/Writer", "params": {"key": "other", "value": 0}},
+            {"id": "r", "type": "Test/Copy", "params": {"src": "x", "dst": "z"}},
+        ]
+
+    edges = [("w", "m"), ("m", "r")]
+    engine.run(graph(nodes(1), edges), run_id="r", session="s")
+    g = graph(nodes(2), edges)
+    got = engine.run(g, run_id="r", session="s")
+    assert got == _fresh(graph, g)
+    assert got["last_outputs"]["r"] == {"out": 2}
+
+
+def test_reader_of_an_unchanged_key_is_reused(engine, graph):
+    nodes = _chain(1) + [{"id": "o", "type": "Test/Writer", "params": {"key": "k", "value": 0}}]
+    edges = [("w", "m"), ("m", "r"), ("r", "o")]
+    engine.run(graph(nodes, edges), run_id="r", session="s")
+    nodes[-1]["params"]["value"] = 1
+    _Copy.calls.clear()
+    got = engine.run(graph(nodes, edges), run_id="r", session="s")
+    assert _Copy.calls == []
+    assert got == _fresh(graph, graph(nodes, edges))
+
+
+def test_graph_scope_counter_keeps_counting(engine, graph):
+    g = graph([{"id": "c", "type": "Test/Counter"}])
+    counts = [engine.run(g, run_id="r", session="s")["last_outputs"]["c"]["n"] for _ in range(3)]
+    assert counts == [1, 2, 3]
+
+
+def test_replayed_delete_removes_key(engine, graph):
+    nodes = [
+        {"id": "w", "type": "Test/Writer", "params": {"key": "x", "value": 1}},
+        {"id": "d", "type": "Test/Delete", "params": {"key": "x"}},
+    ]
+    g = graph(nodes, [("w", "d")])
+    first = engine.run(g, run_id="r", session="s")
+    again = engine.run(g, run_id="r", session="s")
+    assert "x" not in first["blackboard"]
+    assert again == first
+
+
+def test_opaque_access_is_never_reused(engine, graph):
+    from core.blackboard import Blackboard
+    from runtime.incremental import RecordingBlackboard
+
+    rec = RecordingBlackboard(Blackboard())
+    rec.get("a")
+    assert not rec.opaque
+    rec.snapshot()
+    assert rec.opaque
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from typing import Any, List, Mapping
+
+import pytest
+
+from core.node import Node, NodeContext
+from core.registry import register_node
+from runtime.instances import InstancePool
+from runtime.services import ServiceContainer
+
+EVENTS: List[str] = []
+
+
+class _Tracked(Node):
+    SCOPE = "process"
+
+    def setup(self, services) -> None:
+        EVENTS.append(f"setup {id(self)}")
+
+    def teardown(self) -> None:
+        EVENTS.append(f"teardown {id(self)}")
+
+    def run(self, ctx: NodeContext, inputs: Mapping[str, Any], params: Mapping[str, Any]):
+        return {}
+
+
+class _PerGraph(_Tracked):
+    SCOPE = "graph"
+
+
+@register_node
+class _PerRun(_Tracked):
+    TYPE_NAME = "Test/PerRun"
+    SCOPE = "run"
+
+
+@pytest.fixture
+def pool():
+    EVENTS.clear()
+    pool = InstancePool(ServiceContainer(), max_idle=1, max_graphs=1)
+    yield pool
+    pool.close()
+
+
+def _kinds():
+    return [e.split()[0] for e in EVENTS]
+
+
+def test_process_scope_is_shared(pool):
+    with pool.lease(_Tracked, "p1", "a") as first:
+        pass
+    with pool.lease(_Tracked, "p2", "b") as again:
+        assert again is first
+    assert _kinds() == ["setup"]
+    assert pool.stats() == {"idle": 1, "created": 1, "reused": 1, "torn_down": 0}
+
+
+def test_concurrent_leases_get_separate_instances(pool):
+    with pool.lease(_Tracked, "p", "a") as one, pool.lease(_Tracked, "p", "a") as two:
+        assert one is not two
+    assert _kinds() == ["setup", "setup", "teardown"]  # max_idle=1
+
+
+def test_graph_scope_is_per_plan_and_node(pool):
+    with pool.lease(_PerGraph, "p1", "a") as first:
+        pass
+    with pool.lease(_PerGraph, "p1", "b") as other:
+        assert other is not first
+    with pool.lease(_PerGraph, "p1", "a") as again:
+        assert again is first
+    with pool.lease(_PerGraph, "p2", "a"):  # max_graphs=1 evicts p1
+        pass
+    assert _kinds().count("teardown") == 2
+
+
+def test_run_scope_and_errors_tear_down(pool):
+    with pool.lease(_PerRun, "p", "a"):
+        pass
+    with pytest.raises(ValueError):
+        with pool.lease(_Tracked, "p", "a"):
+            raise ValueError
+    assert _kinds() == ["setup", "teardown", "setup", "teardown"]
+    assert pool.stats()["idle"] == 0
+
+
+def test_run_scope_is_pooled_until_the_run_ends(pool):
+    with pool.lease(_PerRun, "p", "a", "r1") as first:
+        pass
+    with pool.lease(_PerRun, "p", "a", "r1") as again:
+        assert again is first
+    with pool.lease(_PerRun, "p", "a", "r2") as other:
+        assert other is not first
+    with pool.lease(_PerGraph, "r1", "a"):  # a plan key equal to the run id is unaffected
+        pass
+    pool.end_run("r1")
+    assert _kinds() == ["setup", "setup", "setup", "teardown"]
+    assert pool.stats()["idle"] == 2  # r2's and the graph-scoped instance
+
+
+def test_evict_graph(pool):
+    with pool.lease(_PerGraph, "p", "a"):
+        pass
+    pool.evict_graph("p")
+    assert _kinds() == ["setup", "teardown"]
+
+
+def test_engine_reuses_warm_instances(engine, graph):
+    g = graph([{"id": "a", "type": "AgentFlow/Const"}])
+    engine.run(g)
+    engine.run(g)
+    stats = engine.instances.stats()
+    assert (stats["created"], stats["reused"]) == (1, 1)
+
+
+def test_engine_tears_down_run_scope_at_run_end(engine, graph):
+    EVENTS.clear()
+    g = graph([{"id": "a", "type": "Test/PerRun"}])
+    engine.run(g, run_id="r")
+    assert _kinds() == ["setup", "teardown"]
+    assert engine.instances.stats()["idle"] == 0
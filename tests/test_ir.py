@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from src.builder import FlowBuilder
+from src.ir import (
+    IR_VERSION,
+    IRDocument,
+    LazyNode,
+    add_exec_edge,
+    add_node,
+    convert_ir,
+    iter_ir,
+    load_ir,
+    new_ir,
+    open_ir,
+    save_ir,
+)
+
+
+def _doc():
+    doc = IRDocument()
+    doc.add_nodes([("a", "Const"), ("b", "Print"), ("c", "Print")])
+    doc.add_exec_edges([("a", "b"), ("b", "c")])
+    doc.add_data_edge("a", "out", "b", "value")
+    return doc
+
+
+def test_round_trips_plain_ir():
+    ir = new_ir()
+    add_node(ir, "a", "Const")
+    add_node(ir, "b", "Print")
+    add_exec_edge(ir, "a", "b")
+    ir["graph"]["extra"] = 1
+    assert IRDocument(ir).to_ir() == ir
+
+
+def test_lookup_and_edges_of():
+    doc = _doc()
+    assert len(doc) == 3 and "a" in doc and "z" not in doc
+    assert doc.node("b")["kind"] == "Print"
+    with pytest.raises(KeyError):
+        doc.node("z")
+    assert len(doc.edges_of("b")) == 3
+    assert doc.edges_of("c") == [{"from": ["b", "out"], "to": ["c", "exec"]}]
+
+
+def test_remove_node_drops_its_edges():
+    doc = _doc()
+    doc.remove_node("b")
+    doc.remove_node("missing")
+    assert [n["id"] for n in doc.nodes()] == ["a", "c"]
+    assert doc.exec_edges() == [] and doc.data_edges() == []
+    assert doc.edges_of("a") == [] and doc.edges_of("c") == []
+
+
+@pytest.mark.parametrize(
+    "edit",
+    [
+        lambda d: d.add_nodes([("x", "K"), ("a", "K")]),
+        lambda d: d.add_nodes([("x", "K"), ("x", "K")]),
+        lambda d: d.add_exec_edges([("a", "c"), ("a", "b")]),
+        lambda d: d.add_exec_edges([("a", "c"), ("a", "missing")]),
+        lambda d: d.add_data_edges([("c", "o", "a", "i"), ("c", "o", "a", "i")]),
+    ],
+)
+def test_bulk_edits_are_all_or_nothing(edit):
+    doc = _doc()
+    before = doc.to_ir()
+    with pytest.raises(ValueError):
+        edit(doc)
+    assert doc.to_ir() == before
+
+
+def test_remove_edges():
+    doc = _doc()
+    doc.remove_exec_edge("a", "b")
+    doc.remove_data_edge("a", "out", "b", "value")
+    assert doc.edges_of("a") == []
+    with pytest.raises(ValueError, match="No such exec edge"):
+        doc.remove_exec_edge("a", "b")
+
+
+def test_duplicate_node_ids_in_loaded_ir_are_rejected():
+    ir = new_ir()
+    ir["graph"]["nodes"] = [{"id": "a", "kind": "K"}, {"id": "a", "kind": "K"}]
+    with pytest.raises(ValueError, match="already exists"):
+        IRDocument(ir)
+
+
+def test_run_script(tmp_path):
+    builder = FlowBuilder()
+    script = [
+        "# build",
+        "add node a AgentFlow/Const",
+        "",
+        "add node b AgentFlow/Print",
+        "add exec a b",
+        "add data a out b value",
+    ]
+    assert builder.run_script(script) == 4
+    graph = builder.graph()
+    assert [n["type"] for n in graph["nodes"]] == ["AgentFlow/Const", "AgentFlow/Print"]
+    assert graph["edges"] == {
+        "data": [{"src": ["a", "out"], "dst": ["b", "value"]}],
+        "exec": [{"src": "a", "dst": "b"}],
+    }
+
+    path = tmp_path / "flow.txt"
+    path.write_text("add node c X\nadd exec a c\n", encoding="utf-8")
+    builder.execute(f"source {path}")
+    assert "c" in builder.doc
+
+
+def test_failed_script_restores_the_flow():
+    builder = FlowBuilder()
+    builder.execute("add node a K")
+    before = builder.ir
+    with pytest.raises(ValueError, match="line 3: add exec a b"):
+        builder.run_script(["add node b K", "add exec a b", "add exec a b"])
+    assert builder.ir == before
+
+
+def test_edits_to_builder_ir_are_kept():
+    builder = FlowBuilder()
+    builder.execute("add node a K")
+    assert builder.ir is builder.ir
+    builder.ir["meta"]["title"] = "edited"
+    builder.ir["graph"]["nodes"].append({"id": "b", "kind": "K"})
+    builder.execute("add exec a b")
+    assert builder.ir["meta"]["title"] == "edited"
+    assert [e["to"][0] for e in builder.doc.exec_edges()] == ["b"]
+    copy = builder.to_ir()
+    copy["graph"]["nodes"].clear()
+    assert len(builder.doc) == 2
+
+
+def test_nested_source_stays_quiet(tmp_path, capsys):
+    inner = tmp_path / "inner.txt"
+    inner.write_text("add node a K\n", encoding="utf-8")
+    FlowBuilder().run_script([f"source {inner}", "add node b K"])
+    assert capsys.readouterr().out == ""
+
+
+def _rich_ir():
+    ir = new_ir()
+    ir["meta"]["title"] = "naïve ✓"
+    g = ir["graph"]
+    g["nodes"] = [
+        {"id": f"n{i}", "kind": "Const", "params": {"value": i * 0.5}, "inputs": {}}
+        for i in range(50)
+    ]
+    g["nodes"].append({"id": "bare"})
+    g["edges"]["exec"] = [
+        {"from": [f"n{i}", "out"], "to": [f"n{i + 1}", "exec"]} for i in range(49)
+    ]
+    g["edges"]["data"] = [{"from": ["n0", "out"], "to": ["n1", "value"], "label": "x"}]
+    g["edges"]["control"] = [1, 2]
+    g["layout"] = "grid"
+    return ir
+
+
+@pytest.mark.parametrize("fmt", ["json", "stream", "binary"])
+def test_formats_round_trip(tmp_path, fmt):
+    ir = _rich_ir()
+    path = tmp_path / "flow.ir"
+    save_ir(ir, path, fmt)
+    assert load_ir(path) == ir
+    assert json.dumps(load_ir(path)) == json.dumps(ir)
+
+
+@pytest.mark.parametrize("fmt", ["json", "stream", "binary"])
+def test_convert_keeps_key_order(tmp_path, fmt):
+    ir = {
+        "meta": {"id": "x"},
+        "graph": {"edges": {"data": [], "exec": [], "zz": 1}, "extra": 2, "nodes": []},
+        "version": IR_VERSION,
+        "tail": 3,
+    }
+    src = tmp_path / "flow.json"
+    src.write_text(json.dumps(ir), encoding="utf-8")
+    convert_ir(src, tmp_path / "flow.ir", fmt)
+    convert_ir(tmp_path / "flow.ir", tmp_path / "back.json", "json")
+    assert json.dumps(load_ir(tmp_path / "back.json")) == json.dumps(ir)
+
+
+@pytest.mark.parametrize("fmt", ["json", "stream", "binary"])
+def test_iter_ir_streams_entries(tmp_path, fmt):
+    path = tmp_path / "flow.ir"
+    save_ir(_rich_ir(), path, fmt)
+    events = list(iter_ir(path))
+    assert sum(1 for section, _, _ in events if section == "node") == 51
+    assert ("edges", "control", [1, 2]) in events
+    assert ("graph", "layout", "grid") in events
+
+
+def test_scanner_handles_values_split_across_chunks(tmp_path, monkeypatch):
+    from src import ir as ir_module
+
+    real = ir_module._JsonScanner.__init__
+    monkeypatch.setattr(
+        ir_module._JsonScanner, "__init__", lambda self, fp, chunk=7: real(self, fp, chunk)
+    )
+    path = tmp_path / "flow.json"
+    save_ir(_rich_ir(), path, "stream")
+    nodes = [v for section, _, v in iter_ir(path) if section == "node"]
+    assert nodes == _rich_ir()["graph"]["nodes"]
+
+
+def test_open_binary_is_lazy(tmp_path):
+    path = tmp_path / "flow.afir"
+    save_ir(_rich_ir(), path, "binary")
+    doc = open_ir(path)
+    nodes = doc["graph"]["nodes"]
+    assert len(nodes) == 51
+    node = nodes[3]
+    assert isinstance(node, LazyNode)
+    assert node["id"] == "n3" and node._rest is None
+    assert node["params"] == {"value": 1.5}
+    assert dict(nodes[-1]) == {"id": "bare"}
+    assert doc["graph"]["edges"]["data"][0]["label"] == "x"
+    assert doc["graph"]["edges"]["exec"][-1] == {"from": ["n48", "out"], "to": ["n49", "exec"]}
+    doc.close()
+    assert doc["graph"]["nodes"].ir.mm.closed
+    with open_ir(path) as again:
+        assert again["graph"]["nodes"][0]["id"] == "n0"
+    assert again["graph"]["nodes"].ir.mm.closed
+
+
+def test_convert_between_formats(tmp_path):
+    src = tmp_path / "flow.json"
+    save_ir(_rich_ir(), src)
+    convert_ir(src, tmp_path / "flow.afir")
+    convert_ir(tmp_path / "flow.afir", tmp_path / "back.json")
+    assert load_ir(tmp_path / "back.json") == _rich_ir()
+    assert (tmp_path / "flow.afir").read_bytes()[:4] == b"AFIR"
+
+
+def test_truncated_binary_is_rejected(tmp_path):
+    path = tmp_path / "flow.afir"
+    save_ir(_rich_ir(), path, "binary")
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        open_ir(path)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Mapping
+
+import pytest
+
+from core.node import Node, NodeContext
+from core.registry import register_node
+from runtime.jobs import CANCELLED, FAILED, RUNNING, SUCCEEDED, QueueFullError, RunQueue
+
+
+@register_node
+class _Gate(Node):
+    """Blocks until the test opens ``gate``."""
+
+    TYPE_NAME = "Test/Gate"
+    gate = threading.Event()
+
+    def run(self, ctx: NodeContext, inputs: Mapping[str, Any], params: Mapping[str, Any]):
+        if params.get("fail"):
+            raise ValueError("boom")
+        assert self.gate.wait(5)
+        return {}
+
+
+@pytest.fixture
+def runs(engine):
+    _Gate.gate.clear()
+    runs = RunQueue(engine, workers=1, maxsize=1)
+    yield runs
+    _Gate.gate.set()
+    runs.shutdown()
+
+
+def _plan(engine, graph, *ids, **params):
+    nodes = [{"id": i, "type": "Test/Gate", "params": params} for i in ids]
+    return engine.compile(graph(nodes, list(zip(ids, ids[1:], strict=False))))
+
+
+def _wait_for(job, status):
+    deadline = time.monotonic() + 5
+    while job.status != status and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert job.status == status
+
+
+def test_job_succeeds(runs, engine, graph):
+    _Gate.gate.set()
+    job = runs.submit(_plan(engine, graph, "a"), {"q": 1})
+    assert job.wait(5) and job.status == SUCCEEDED
+    assert job.result["blackboard"] == {"q": 1}
+    assert runs.get(job.run_id) is job
+
+
+def test_job_failure_is_recorded(runs, engine, graph):
+    job = runs.submit(_plan(engine, graph, "a", fail=True))
+    assert job.wait(5) and job.status == FAILED
+    assert job.error == "ValueError: boom"
+
+
+def test_full_queue_and_cancellation(runs, engine, graph):
+    running = runs.submit(_plan(engine, graph, "a", "b"))
+    _wait_for(running, RUNNING)
+    queued = runs.submit(_plan(engine, graph, "c"))
+    with pytest.raises(QueueFullError):
+        runs.submit(_plan(engine, graph, "d"))
+    assert runs.cancel(queued.run_id).status == CANCELLED
+    runs.cancel(running.run_id)
+    _Gate.gate.set()
+    assert running.wait(5) and running.status == CANCELLED
+
+
+def test_cancel_frees_queue_slot(runs, engine, graph):
+    running = runs.submit(_plan(engine, graph, "a"))
+    _wait_for(running, RUNNING)
+    for _ in range(3):
+        queued = runs.submit(_plan(engine, graph, "b"))
+        assert runs.pending() == 1
+        runs.cancel(queued.run_id)
+        assert runs.pending() == 0
+    last = runs.submit(_plan(engine, graph, "c"))
+    with pytest.raises(QueueFullError):
+        runs.submit(_plan(engine, graph, "d"))
+    _Gate.gate.set()
+    assert last.wait(5) and last.status == SUCCEEDED
+    assert queued.status == CANCELLED and queued.started_at is None
+
+
+def test_unknown_run(runs):
+    with pytest.raises(KeyError):
+        runs.get("nope")
+
+
+def test_submit_endpoint(client):
+    url = "/api/graphs/jobs-endpoint"
+    nodes = [{"id": "a", "type": "AgentFlow/Const", "params": {"value": 1}}]
+    assert client.put(url, json={"nodes": nodes}).status_code == 200
+    r = client.post(f"{url}/runs", json={"inputs": {"q": 2}})
+    assert r.status_code == 202
+    run_id = r.json()["run_id"]
+    deadline = time.monotonic() + 5
+    while client.get(f"/api/runs/{run_id}").json()["status"] != SUCCEEDED:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    result = client.get(f"/api/runs/{run_id}/result").json()
+    assert result["last_outputs"]["a"] == {"out": 1} and result["blackboard"] == {"q": 2}
+    assert client.get("/api/runs/nope").status_code == 404
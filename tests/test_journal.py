@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+from typing import Any, List, Mapping
+
+import pytest
+
+from core.node import Node, NodeContext
+from core.registry import register_node
+from runtime.journal import RUNNING, SUCCEEDED, RunJournal
+
+
+@register_node
+class _Step(Node):
+    TYPE_NAME = "Test/Step"
+    OUTPUTS = {"out": "any"}
+    calls: List[str] = []
+
+    def run(self, ctx: NodeContext, inputs: Mapping[str, Any], params: Mapping[str, Any]):
+        self.calls.append(ctx.node_id)
+        ctx.blackboard.set(ctx.node_id, ctx.blackboard.get("seed", 0) + 1)
+        return {"out": ctx.node_id}
+
+
+@register_node
+class _GraphWrite(Node):
+    TYPE_NAME = "Test/GraphWrite"
+
+    def run(self, ctx: NodeContext, inputs: Mapping[str, Any], params: Mapping[str, Any]):
+        ctx.blackboard.set("shared", ctx.run_id, scope="graph")
+        return {}
+
+
+@register_node
+class _Flaky(Node):
+    TYPE_NAME = "Test/Flaky"
+    fail = True
+
+    def run(self, ctx: NodeContext, inputs: Mapping[str, Any], params: Mapping[str, Any]):
+        if _Flaky.fail:
+            raise RuntimeError("flaky")
+        return {}
+
+
+def _engine(path):
+    from runtime.engine import Engine
+    from runtime.events import EventBus
+    from runtime.services import ServiceContainer
+
+    return Engine(ServiceContainer(), EventBus(), journal=RunJournal(path, commit_interval=0))
+
+
+def _flow(graph):
+    nodes = [
+        {"id": "a", "type": "Test/Step"},
+        {"id": "f", "type": "Test/Flaky"},
+        {"id": "b", "type": "Test/Step"},
+    ]
+    return graph(nodes, [("a", "f"), ("f", "b")])
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    _Step.calls.clear()
+    _Flaky.fail = True
+
+
+def test_resume_skips_completed_nodes(graph, tmp_path):
+    path = tmp_path / "journal.db"
+    engine = _engine(path)
+    try:
+        with pytest.raises(RuntimeError, match="flaky"):
+            engine.run(_flow(graph), run_id="r1", inputs={"seed": 10})
+        (run,) = engine.journal.runs(RUNNING)
+        assert run["run_id"] == "r1" and run["nodes_completed"] == 1
+    finally:
+        engine.journal.close()
+        engine.close()
+
+    _Flaky.fail = False
+    engine = _engine(path)  # a restarted process
+    try:
+        result = engine.resume("r1")
+        assert _Step.calls == ["a", "b"]
+        assert result["blackboard"] == {"seed": 10, "a": 11, "b": 11}
+        assert result["last_outputs"]["a"] == {"out": "a"}
+        assert [r["status"] for r in engine.journal.runs()] == [SUCCEEDED]
+        with pytest.raises(KeyError):
+            engine.resume("missing")
+    finally:
+        engine.journal.close()
+        engine.close()
+
+
+def test_graph_scope_writes_are_not_restored(graph, tmp_path):
+    path = tmp_path / "journal.db"
+    g = graph(
+        [{"id": "w", "type": "Test/GraphWrite"}, {"id": "f", "type": "Test/Flaky"}], [("w", "f")]
+    )
+    engine = _engine(path)
+    try:
+        with pytest.raises(RuntimeError, match="flaky"):
+            engine.run(g, run_id="r1")
+        assert engine.graph_blackboard(engine.compile(g)).get("shared") == "r1"
+        assert engine.journal.load("r1").blackboard == {}
+    finally:
+        engine.journal.close()
+        engine.close()
+
+    _Flaky.fail = False
+    engine = _engine(path)
+    try:
+        engine.resume("r1")  # "w" is not run again and its graph-scope write is lost
+        assert engine.graph_blackboard(engine.compile(g)).get("shared") is None
+    finally:
+        engine.journal.close()
+        engine.close()
+
+
+def test_load_and_compact(tmp_path, graph):
+    from runtime.plan import compile_plan
+
+    journal = RunJournal(tmp_path / "journal.db", commit_interval=0)
+    try:
+        journal.begin("r", compile_plan(graph([{"id": "a", "type": "Test/Step"}])), {"x": 0})
+        journal.write("r", "x", 1)
+        journal.write("r", "x", 2)
+        journal.write("r", "y", 1)
+        journal.delete("r", "y")
+        journal.node("r", "a", {"out": 1})
+        before = journal.load("r")
+        journal.compact()
+        after = journal.load("r")
+        assert after.blackboard == before.blackboard == {"x": 2}
+        assert after.outputs == {"a": {"out": 1}}
+        journal.write("r", "unpicklable", lambda: None)  # logged and skipped
+        journal.finish("r")
+        journal.write("r", "x", 3)  # after finish: ignored
+        assert journal.load("r").blackboard == {"x": 2}
+        assert journal.load("r").status == SUCCEEDED
+    finally:
+        journal.close()
+
+
+def test_each_plan_is_stored_once(tmp_path, graph, monkeypatch):
+    from runtime import journal as journal_module
+    from runtime.plan import compile_plan
+
+    plan = compile_plan(graph([{"id": "a", "type": "Test/Step"}]))
+    dumped = []
+    dumps = journal_module.pickle.dumps
+    monkeypatch.setattr(
+        journal_module.pickle, "dumps", lambda obj, **kw: (dumped.append(obj), dumps(obj, **kw))[1]
+    )
+    journal = RunJournal(tmp_path / "journal.db", commit_interval=0, retain=0)
+    try:
+        for run_id in ("r1", "r2"):
+            journal.begin(run_id, plan, {})
+            journal.finish(run_id)
+        journal.flush()
+        assert dumped.count(plan) == 1
+        journal.compact()  # drops the finished runs and their plan
+        journal.begin("r3", plan, {})
+        assert journal.load("r3").plan.key == plan.key
+        assert dumped.count(plan) == 2
+    finally:
+        journal.close()
+
+
+def test_resume_endpoint_without_journal(client):
+    assert client.post("/api/runs/r/resume").status_code == 404
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+from pydantic import ValidationError
+
+from ir import canonicalize, ir_version, new_ir, save_ir
+from runtime.loader import GraphLoader, parse_graph
+from server.schemas import GraphModel
+
+CONST = "AgentFlow/Const"
+
+
+def _ir(value=1):
+    ir = new_ir()
+    ir["graph"]["nodes"] = [
+        {"id": "a", "kind": CONST, "params": {"value": value}, "inputs": {}, "outputs": {}},
+        {"id": "b", "kind": CONST, "params": {"value": 2}, "position": [1, 2]},
+    ]
+    ir["graph"]["edges"]["exec"] = [{"from": ["a", "out"], "to": ["b", "exec"]}]
+    ir["graph"]["edges"]["data"] = [{"from": ["a", "out"], "to": ["b", "value"]}]
+    return ir
+
+
+def test_canonicalize_upgrades_ir():
+    doc = canonicalize(_ir())
+    assert doc["version"].startswith("0.2")
+    assert doc["nodes"][0] == {
+        "id": "a", "type": CONST, "params": {"value": 1}, "inputs": {},
+    }
+    assert doc["nodes"][1]["position"] == [1, 2]
+    assert doc["edges"] == {
+        "data": [{"src": ["a", "out"], "dst": ["b", "value"]}],
+        "exec": [{"src": "a", "dst": "b"}],
+    }
+    assert canonicalize(doc) == doc
+
+
+def test_ir_version():
+    assert ir_version(_ir()) == "0.1"
+    assert ir_version({"nodes": []}) == "0.2"
+    with pytest.raises(ValueError, match="Unsupported"):
+        ir_version({"version": "9.0"})
+    with pytest.raises(ValueError, match="Invalid IR"):
+        canonicalize({"graph": {"nodes": [{"id": "a"}]}})
+
+
+def test_parse_graph_accepts_both_versions():
+    v1 = parse_graph(json.dumps(_ir()).encode())
+    v2 = parse_graph(json.dumps(canonicalize(_ir())).encode())
+    assert v1 == v2
+    assert [n.type for n in v1.nodes] == [CONST, CONST]
+    assert parse_graph(b'{"nodes": []}').nodes == []
+
+
+def test_parse_graph_decides_on_structure():
+    ir = _ir()
+    del ir["version"]
+    body = json.dumps(ir).replace('"graph"', '"gr\\u0061ph"').encode()
+    assert [n.id for n in parse_graph(body).nodes] == ["a", "b"]
+    doc = {"version": "0.2.0", "meta": {"note": '"graph"'}, "nodes": []}
+    assert parse_graph(json.dumps(doc).encode()) == GraphModel.model_validate(doc)
+    with pytest.raises(ValidationError):
+        parse_graph(b"not json")
+    with pytest.raises(ValidationError):
+        parse_graph(b"[]")
+
+
+@pytest.mark.parametrize("fmt", ["json", "binary"])
+def test_loader_caches_by_file_state(tmp_path, fmt):
+    path = tmp_path / "flow.ir"
+    save_ir(_ir(), path, fmt)
+    loader = GraphLoader()
+    plan = loader.plan(path)
+    assert loader.plan(path) is plan
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert loader.plan(path) is plan  # touched, same content
+    save_ir(_ir(value=5), path, fmt)
+    graph = loader.load(path)
+    assert graph.nodes[0].params == {"value": 5}
+    assert loader.plan(path) is not plan
+    loader.invalidate(path)
+    assert loader.load(path) is not graph
+
+
+def test_loader_evicts_least_recently_used(tmp_path):
+    loader = GraphLoader(maxsize=1)
+    a, b = tmp_path / "a.json", tmp_path / "b.json"
+    save_ir(_ir(), a)
+    save_ir(_ir(), b)
+    graph = loader.load(a)
+    loader.load(b)
+    assert loader.load(a) is not graph
+
+
+def test_engine_runs_a_graph_file(engine, tmp_path):
+    path = tmp_path / "flow.json"
+    save_ir(_ir(), path)
+    result = engine.run(path, run_id="r")
+    assert result["last_outputs"] == {"a": {"out": 1}, "b": {"out": 2}}
+
+
+def test_put_accepts_ir(client):
+    url = "/api/graphs/loader-ir"
+    assert client.put(url, content=json.dumps(_ir())).status_code == 200
+    stored = client.get(url).json()
+    assert [n["type"] for n in stored["nodes"]] == [CONST, CONST]
+    assert stored["edges"]["exec"] == [{"src": "a", "dst": "b"}]
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import gc
+import pickle
+
+import pytest
+
+import runtime.plan
+from runtime.plan import GraphError, PlanCache, compile_plan, topological_order
+
+CONST = "AgentFlow/Const"
+
+
+def _nodes(*ids):
+    return [{"id": i, "type": CONST, "params": {"value": i}} for i in ids]
+
+
+def test_plan_cache_reuses_plans_by_content(graph):
+    cache = PlanCache(maxsize=2)
+    a = cache.get(graph(_nodes("a")))
+    assert cache.get(graph(_nodes("a"))) is a
+    assert a.key in cache and len(cache) == 1
+    assert cache.get(graph(_nodes("b"))) is not a
+
+
+def test_plan_cache_evicts_least_recently_used(graph):
+    cache = PlanCache(maxsize=2)
+    a, b = cache.get(graph(_nodes("a"))), cache.get(graph(_nodes("b")))
+    cache.get(graph(_nodes("a")))
+    c = cache.get(graph(_nodes("c")))
+    assert a.key in cache and b.key not in cache and c.key in cache
+    cache.invalidate(a.key)
+    assert a.key not in cache
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_plan_cache_hashes_each_model_once(graph, monkeypatch):
+    hashed = []
+    real = runtime.plan.graph_key
+    monkeypatch.setattr(runtime.plan, "graph_key", lambda g: hashed.append(g) or real(g))
+    cache = PlanCache()
+    g = graph(_nodes("a"))
+    plan = cache.get(g)
+    assert cache.get(g) is plan and len(hashed) == 1
+    g.nodes[0].params["value"] = "b"
+    cache.forget(g)
+    assert cache.get(g) is not plan and len(hashed) == 2
+    del g, hashed[:]
+    gc.collect()
+    assert cache._keys == {}
+
+
+def test_engine_compiles_once(engine, graph):
+    g = graph(_nodes("a"))
+    plan = engine.compile(g)
+    assert engine.compile(graph(_nodes("a"))) is plan
+    assert engine.compile(plan) is plan
+    assert engine.run(plan, run_id="r") == engine.run(g, run_id="r")
+
+
+def test_plan_is_immutable_and_picklable(graph):
+    plan = compile_plan(graph(_nodes("a", "b"), [("a", "b")]))
+    with pytest.raises(TypeError):
+        plan.nodes[0].params["value"] = 2  # type: ignore[index]
+    copy = pickle.loads(pickle.dumps(plan))
+    assert copy.key == plan.key and copy.nodes[1].exec_prev == (0,)
+    assert dict(copy.nodes[0].params) == {"value": "a"}
+
+
+@pytest.mark.parametrize("nodes, exec_edges, message", [
+    (_nodes("a", "a"), [], "Duplicate node ids"),
+    (_nodes("a"), [("a", "x")], "unknown node: x"),
+])
+def test_compile_errors(graph, nodes, exec_edges, message):
+    with pytest.raises(GraphError, match=message):
+        compile_plan(graph(nodes, exec_edges))
+
+
+def test_topological_order_reports_stuck_nodes():
+    order, stuck = topological_order([[1], [2], [1], []], [0, 2, 1, 0])
+    assert order == [0, 3] and stuck == [1, 2]
+
+
+def test_exec_cycle_is_named(graph):
+    with pytest.raises(GraphError) as err:
+        compile_plan(graph(_nodes("a", "b", "c"), [("a", "b"), ("b", "c"), ("c", "b")]))
+    assert "cycle (c -> b -> c)" in str(err.value) or "cycle (b -> c -> b)" in str(err.value)
+    assert str(err.value).endswith("unreachable nodes: ['b', 'c']")
+
+
+def test_exec_order_follows_edges(graph):
+    ids = [f"n{i}" for i in range(6)]
+    edges = [("n5", "n0"), ("n0", "n3"), ("n5", "n3"), ("n3", "n1"), ("n2", "n1"), ("n4", "n2")]
+    plan = compile_plan(graph(_nodes(*ids), edges))
+    order = [plan.nodes[i].id for i in plan.exec_schedule.order()]
+    assert sorted(order) == ids
+    for src, dst in edges:
+        assert order.index(src) < order.index(dst)
+    assert [plan.nodes[i].id for i in plan.order] == order
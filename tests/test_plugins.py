@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import hashlib
+import sys
+
+import pytest
+
+from core.plugins import Manifest, OpaqueModuleError, default_manifest, discover, scan_source
+from core.registry import NodeRegistry
+
+PLUGIN = '''
+from core.node import Node
+from core.registry import register_node
+
+
+class Base(Node):
+    INPUTS = {"x": "int"}
+    PARAMS = {"n": "int"}
+
+
+@register_node
+class Lazy(Base):
+    TYPE_NAME = "Test/PluginLazy"
+    OUTPUTS: dict = {"out": "int"}
+
+    def run(self, ctx, inputs, params):
+        return {"out": inputs.get("x", 0) + params.get("n", 0)}
+'''
+
+OPAQUE = '''
+from core.node import Node
+from core.registry import register_node
+
+NAME = "Test/PluginOpaque"
+
+
+@register_node
+class Opaque(Node):
+    TYPE_NAME = NAME
+'''
+
+
+@pytest.fixture
+def plugins(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    d = tmp_path / "plugins"
+    d.mkdir()
+    yield d
+    for f in d.glob("*.py"):
+        sys.modules.pop(f.stem, None)
+
+
+def test_scan_source_reads_literal_metadata():
+    (info,) = scan_source(PLUGIN, "mod")
+    assert (info.type, info.module, info.cls) == ("Test/PluginLazy", "mod", "Lazy")
+    assert info.inputs == {"x": "int"} and info.params == {"n": "int"}
+    assert info.outputs == {"out": "int"}
+
+
+def test_scan_source_rejects_computed_metadata():
+    with pytest.raises(OpaqueModuleError, match="TYPE_NAME is not a literal"):
+        scan_source(OPAQUE, "mod")
+    with pytest.raises(OpaqueModuleError, match="no literal TYPE_NAME"):
+        scan_source("@register_node\nclass A:\n    INPUTS = {}\n", "mod")
+
+
+def test_discover_registers_without_importing(plugins, tmp_path):
+    (plugins / "af_lazy_plugin.py").write_text(PLUGIN, encoding="utf-8")
+    registry = NodeRegistry()
+    manifest = tmp_path / "manifest.json"
+    discover(registry, paths=[plugins], manifest=manifest, use_entry_points=False)
+    assert "Test/PluginLazy" in registry.list_types()
+    assert "AgentFlow/Const" in registry.list_types()
+    assert "af_lazy_plugin" not in sys.modules
+    (described,) = [d for d in registry.describe() if d["type"] == "Test/PluginLazy"]
+    assert described["inputs"] == {"x": "int"}
+    cls = registry.get("Test/PluginLazy")
+    assert cls.__name__ == "Lazy" and "af_lazy_plugin" in sys.modules
+    assert manifest.exists()
+
+
+def test_opaque_modules_are_imported(plugins, tmp_path):
+    (plugins / "af_opaque_plugin.py").write_text(OPAQUE, encoding="utf-8")
+    discover(
+        NodeRegistry(), paths=[plugins], manifest=tmp_path / "m.json", use_entry_points=False
+    )
+    assert "af_opaque_plugin" in sys.modules
+
+
+def test_manifest_rescans_changed_files(plugins, tmp_path):
+    path = plugins / "af_changing_plugin.py"
+    path.write_text(PLUGIN, encoding="utf-8")
+    manifest = Manifest(tmp_path / "m.json")
+    assert [i.type for i in manifest.nodes("af_changing_plugin", path)] == ["Test/PluginLazy"]
+    manifest.save()
+
+    reloaded = Manifest(tmp_path / "m.json")
+    assert reloaded.nodes("af_changing_plugin", path)[0].cls == "Lazy"
+    assert not reloaded.dirty
+    path.write_text(PLUGIN.replace("PluginLazy", "PluginRenamed"), encoding="utf-8")
+    assert reloaded.nodes("af_changing_plugin", path)[0].type == "Test/PluginRenamed"
+    assert reloaded.dirty
+
+
+def test_shipped_manifest_is_current():
+    manifest = Manifest(default_manifest())
+    nodes_dir = default_manifest().parent
+    for f in nodes_dir.glob("*.py"):
+        if f.stem == "__init__":
+            continue
+        entry = manifest.modules[f"nodes.{f.stem}"]
+        assert entry["sha256"] == hashlib.sha256(f.read_bytes()).hexdigest(), f.name
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import pytest
+
+from runtime.profiling import Histogram, Profiler, RunProfile
+
+CONST = "AgentFlow/Const"
+
+
+def _profiled_engine():
+    from runtime.engine import Engine
+    from runtime.events import EventBus
+    from runtime.services import ServiceContainer
+
+    return Engine(ServiceContainer(), EventBus(), profiler=Profiler())
+
+
+def test_histogram_buckets_are_cumulative():
+    h = Histogram([0.1, 1.0])
+    for v in (0.05, 0.5, 0.7, 5.0):
+        h.observe(v)
+    assert h.cumulative() == [("0.1", 1), ("1.0", 3), ("+Inf", 4)]
+    assert h.count == 4
+
+
+def test_run_records_node_timings(graph):
+    engine = _profiled_engine()
+    try:
+        g = graph(
+            [
+                {"id": "a", "type": CONST, "params": {"value": "abc"}},
+                {"id": "b", "type": CONST, "params": {"value": 1}},
+            ],
+            [("a", "b")],
+        )
+        engine.run(g, run_id="p1")
+        profile = engine.profiler.get("p1").as_dict()
+    finally:
+        engine.close()
+    assert profile["run_id"] == "p1"
+    timings = {n["node_id"]: n for n in profile["nodes"]}
+    assert set(timings) == {"a", "b"}
+    assert timings["a"]["output_bytes"] == 3
+    assert all(n["wall"] >= 0 and n["queue_wait"] >= 0 for n in timings.values())
+    assert profile["wall"] >= max(n["start"] + n["wall"] for n in timings.values())
+
+
+def test_chrome_trace_has_a_span_per_node():
+    profile = RunProfile("t")
+    profile.node("a", CONST, ready=0.0, start=0.5, end=1.0, cpu=None, out={}, cached=False)
+    profile.wall = 1.0
+    events = profile.chrome_trace()["traceEvents"]
+    names = [e["name"] for e in events]
+    assert names == ["run t", "a (queued)", "a"]
+    assert events[-1]["ts"] == 0.5e6 and events[-1]["dur"] == 0.5e6
+
+
+def test_profiler_keeps_last_runs_and_counts_cached_nodes():
+    profiler = Profiler(keep=2)
+    for run_id in ("r1", "r2", "r3"):
+        profile = profiler.begin(run_id)
+        profile.node("a", CONST, 0.0, 0.0, 0.1, 0.1, {"out": 1}, cached=run_id == "r3")
+        profiler.finish(profile)
+    with pytest.raises(KeyError):
+        profiler.get("r1")
+    assert profiler.get("r3").run_id == "r3"
+    lines = profiler.prometheus()
+    assert f'agentflow_node_cached_total{{type="{CONST}"}} 1' in lines
+    assert f'agentflow_node_wall_seconds_count{{type="{CONST}"}} 2' in lines
+    assert "agentflow_run_seconds_count 3" in lines
+
+
+def test_profile_and_metrics_endpoints(client):
+    url = "/api/graphs/app-profile"
+    nodes = [{"id": "a", "type": CONST, "params": {"value": 1}}]
+    assert client.put(url, json={"nodes": nodes}).status_code == 200
+    run_id = client.post(f"{url}/run", json={}).json()["run_id"]
+
+    r = client.get(f"/api/runs/{run_id}/profile")
+    assert r.status_code == 200
+    assert [n["node_id"] for n in r.json()["nodes"]] == ["a"]
+    r = client.get(f"/api/runs/{run_id}/profile", params={"format": "chrome"})
+    assert "attachment" in r.headers["content-disposition"]
+    assert any(e["name"] == "a" for e in r.json()["traceEvents"])
+    assert client.get("/api/runs/missing/profile").status_code == 404
+
+    text = client.get("/api/metrics").text
+    assert "# TYPE agentflow_node_wall_seconds histogram" in text
+    assert f'agentflow_node_wall_seconds_count{{type="{CONST}"}}' in text
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import json
+import threading
+
+import pytest
+from pydantic import ValidationError
+
+from server.schemas import GraphModel, GraphPatch
+from server.store import GraphStore, PatchError, VersionConflictError
+
+CONST = "AgentFlow/Const"
+
+
+def _store(graph) -> GraphStore:
+    store = GraphStore()
+    store.put("g", graph([
+        {"id": "a", "type": CONST, "params": {"value": 1}},
+        {"id": "b", "type": CONST},
+    ], [("a", "b")]))
+    return store
+
+
+def _patch(**kw) -> GraphPatch:
+    return GraphPatch.model_validate(kw)
+
+
+def test_patch_applies_as_remove_add_update(graph):
+    store = _store(graph)
+    gv = store.patch("g", _patch(
+        nodes={
+            "remove": ["b"],
+            "add": [{"id": "c", "type": CONST}],
+            "update": [{"id": "a", "params": {"value": 2}}],
+        },
+        edges={"add_exec": [{"src": "a", "dst": "c"}]},
+    ))
+    g = gv.graph
+    assert gv.version == 2
+    assert [(n.id, n.params) for n in g.nodes] == [("a", {"value": 2}), ("c", {})]
+    assert [(e.src, e.dst) for e in g.edges.exec] == [("a", "c")]
+    assert store.get("g", 1).graph.nodes[1].id == "b"
+
+
+def test_update_keeps_fields_left_out(graph):
+    store = _store(graph)
+    store.patch("g", _patch(nodes={"update": [{"id": "a", "position": [1, 2]}]}))
+    a = store.get("g").graph.nodes[0]
+    assert (a.type, a.params, a.position) == (CONST, {"value": 1}, (1.0, 2.0))
+
+
+@pytest.mark.parametrize("field", ["type", "params", "inputs"])
+def test_update_rejects_null(field):
+    with pytest.raises(ValidationError):
+        _patch(nodes={"update": [{"id": "a", field: None}]})
+
+
+@pytest.mark.parametrize("edges", [
+    {"add_exec": [{"src": "a", "dst": "nope"}]},
+    {"add_data": [{"src": ["nope", "out"], "dst": ["a", "x"]}]},
+])
+def test_edges_to_unknown_nodes_are_rejected(graph, edges):
+    store = _store(graph)
+    with pytest.raises(PatchError, match="nope"):
+        store.patch("g", _patch(edges=edges))
+    assert store.versions("g") == [1]
+
+
+def test_edges_to_removed_nodes_are_rejected(graph):
+    store = _store(graph)
+    with pytest.raises(PatchError):
+        store.patch("g", _patch(
+            nodes={"remove": ["b"]}, edges={"add_exec": [{"src": "a", "dst": "b"}]}
+        ))
+
+
+def test_stored_patch_is_a_valid_graph(graph):
+    store = _store(graph)
+    gv = store.patch("g", _patch(meta={"title": "t"}))
+    assert GraphModel.model_validate_json(gv.body).meta == {"title": "t"}
+
+
+def test_patch_endpoint(client):
+    url = "/api/graphs/patch-endpoint"
+    assert client.put(url, json={"nodes": [{"id": "a", "type": CONST}]}).status_code == 200
+    r = client.patch(url, json={"nodes": {"update": [{"id": "a", "type": None}]}})
+    assert r.status_code == 422
+    r = client.patch(url, json={"edges": {"add_exec": [{"src": "a", "dst": "x"}]}})
+    assert r.status_code == 409
+    r = client.patch(url, json={"nodes": {"add": [{"id": "b", "type": CONST}]}})
+    assert r.status_code == 200 and r.json()["revision"] == 2
+    assert json.loads(client.get(url).content)["nodes"][1]["id"] == "b"
+
+
+def test_in_memory_store_unloads_cold_versions(graph):
+    store = GraphStore(max_resident=2)
+    for i in range(4):
+        store.put("g", graph([{"id": "a", "type": CONST, "params": {"value": i}}]))
+    assert len(store._resident) == 2
+    first = store.get("g", 1)
+    assert first._plan is None
+    assert first.plan().nodes[0].params == {"value": 0}
+    assert store.get("g", 1) is first
+
+
+def test_in_memory_store_caps_history(graph):
+    store = GraphStore(max_history=3)
+    for i in range(5):
+        store.put("g", graph([{"id": "a", "type": CONST, "params": {"value": i}}]))
+    assert store.versions("g") == [3, 4, 5]
+    with pytest.raises(KeyError):
+        store.get("g", 2)
+    assert len(store._resident) + len(store._cold) == 3
+    assert store.get("g", 3).graph.nodes[0].params == {"value": 2}
+
+
+def test_versions_and_if_match(graph):
+    store = GraphStore()
+    first = store.put("g", graph([]))
+    with pytest.raises(VersionConflictError):
+        store.put("new", graph([]), if_match="*")
+    second = store.put("g", graph([{"id": "a", "type": CONST}]), if_match=first.etag)
+    with pytest.raises(VersionConflictError):
+        store.put("g", graph([]), if_match=first.etag)
+    assert store.versions("g") == [1, 2] and store.head_etag("g") == second.etag
+    assert store.get("g", 1).graph.nodes == [] and store.get("g") is second
+    store.delete("g", if_match=second.etag)
+    assert store.ids() == [] and store.head_etag("g") is None
+
+
+def test_heads_are_listed_without_loading_versions(graph, tmp_path):
+    store = GraphStore(tmp_path, max_resident=1)
+    store.put("a", graph([{"id": "n", "type": CONST}]))
+    head = store.put("b", graph([]))
+    assert list(store._resident) == [("b", 1)]
+    assert [(h["id"], h["etag"], h["nodes"]) for h in store.heads()] == [
+        ("a", store.head_etag("a"), 1), ("b", head.etag, 0),
+    ]
+    assert list(store._resident) == [("b", 1)]
+
+
+def test_disk_store_evicts_and_reloads(graph, tmp_path):
+    store = GraphStore(tmp_path, max_resident=1)
+    for i in range(3):
+        store.put("a/b", graph([{"id": "n", "type": CONST, "params": {"value": i}}]))
+    assert len(store._resident) == 1
+    assert store.get("a/b", 1).graph.nodes[0].params == {"value": 0}
+
+    reopened = GraphStore(tmp_path)
+    assert reopened.ids() == ["a/b"] and reopened.versions("a/b") == [1, 2, 3]
+    assert reopened.head_etag("a/b") == store.head_etag("a/b")
+    reopened.delete("a/b")
+    assert GraphStore(tmp_path).ids() == []
+
+
+def test_disk_io_runs_outside_the_store_lock(graph, tmp_path, monkeypatch):
+    store = GraphStore(tmp_path, max_resident=1)
+
+    def unlocked() -> bool:
+        reader = threading.Thread(target=store.ids, daemon=True)
+        reader.start()
+        reader.join(1)
+        return not reader.is_alive()
+
+    seen = []
+    write, load = store._write, store._load
+    monkeypatch.setattr(store, "_write", lambda gv: (seen.append(unlocked()), write(gv))[1])
+    monkeypatch.setattr(store, "_load", lambda *a: (seen.append(unlocked()), load(*a))[1])
+    store.put("g", graph([]))
+    store.put("g", graph([{"id": "a", "type": CONST}]))
+    first = store.get("g", 1)
+    assert seen == [True, True, True]
+    assert first._graph is not None  # plan() compiles the loaded model, no re-parse
+    assert first.plan().nodes == ()
+
+
+def test_graph_endpoints(client):
+    url = "/api/graphs/store-endpoints"
+    r = client.put(url, json={"nodes": []})
+    etag = r.json()["etag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    r = client.put(url, json={"nodes": [{"id": "a", "type": CONST}]}, headers={"If-Match": etag})
+    assert r.json()["revision"] == 2
+    assert client.put(url, json={"nodes": []}, headers={"If-Match": etag}).status_code == 412
+    assert client.get(f"{url}/versions").json()["versions"] == [1, 2]
+    listed = {g["id"]: g for g in client.get("/api/graphs").json()["graphs"]}
+    assert (listed["store-endpoints"]["version"], listed["store-endpoints"]["nodes"]) == (2, 1)
+    assert client.get(url, params={"version": 1}).json()["nodes"] == []
+    assert client.delete(url).status_code == 200
+    assert client.get(url).status_code == 404
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, List, Mapping
+
+import pytest
+
+from core.node import Node, NodeContext
+from core.registry import register_node
+from runtime.streams import OutputStream, materialize, settled
+
+
+@register_node
+class _Tokens(Node):
+    """Streams "a", "b", "c"; with ``wait``, holds "c" back until a consumer saw "a"."""
+
+    TYPE_NAME = "Test/Tokens"
+    PARAMS = {"wait": "bool"}
+    OUTPUTS = {"out": "string"}
+    first_seen = threading.Event()
+
+    def run(self, ctx: NodeContext, inputs: Mapping[str, Any], params: Mapping[str, Any]):
+        def tokens():
+            yield "a"
+            yield "b"
+            if params.get("wait"):
+                assert self.first_seen.wait(5), "consumer did not start while streaming"
+            yield "c"
+
+        return {"out": tokens()}
+
+
+@register_node
+class _Collect(Node):
+    TYPE_NAME = "Test/Collect"
+    EXECUTOR = "thread"
+    INPUTS = {"text": "string"}
+    OUTPUTS = {"chunks": "any"}
+    STREAM_INPUTS = frozenset({"text"})
+
+    def run(self, ctx: NodeContext, inputs: Mapping[str, Any], params: Mapping[str, Any]):
+        chunks: List[Any] = []
+        for chunk in inputs["text"]:
+            chunks.append(chunk)
+            _Tokens.first_seen.set()
+        return {"chunks": chunks}
+
+
+def _pipeline(graph, wait=False):
+    nodes = [
+        {"id": "t", "type": "Test/Tokens", "params": {"wait": wait}},
+        {"id": "s", "type": "Test/Collect"},
+        {"id": "j", "type": "AgentFlow/Concat", "inputs": {"b": "!"}},
+    ]
+    data = [("t", "out", "s", "text"), ("t", "out", "j", "a")]
+    return graph(nodes, [("t", "s"), ("t", "j")], data)
+
+
+def test_stream_readers_see_every_chunk():
+    stream = OutputStream()
+    early = stream.reader()
+    stream.append("a")
+    late = stream.reader()
+    stream.append("b")
+    stream.close()
+    assert list(early) == list(late) == ["a", "b"]
+    assert stream.value() == "ab"
+
+
+def test_async_reader_and_errors():
+    stream = OutputStream()
+
+    async def read():
+        return [chunk async for chunk in stream.reader()]
+
+    async def main():
+        task = asyncio.ensure_future(read())
+        await asyncio.sleep(0)
+        threading.Thread(target=lambda: (stream.append(b"x"), stream.close())).start()
+        return await task
+
+    assert asyncio.run(main()) == [b"x"]
+    broken = OutputStream()
+    broken.close(ValueError("lost"))
+    with pytest.raises(ValueError):
+        broken.value()
+    with pytest.raises(ValueError):
+        list(broken.reader())
+
+
+def test_materialize_and_settled():
+    out = materialize({"out": (i for i in range(3)), "n": 1})
+    assert out == {"out": [0, 1, 2], "n": 1}
+    assert settled({"out": OutputStream.of("x")}) == {"out": "x"}
+
+
+def test_run_joins_streams(engine, graph):
+    got = engine.run(_pipeline(graph))
+    assert got["last_outputs"]["t"] == {"out": "abc"}
+    assert got["last_outputs"]["s"] == {"chunks": ["a", "b", "c"]}
+    assert got["last_outputs"]["j"] == {"out": "abc!"}
+
+
+def test_run_async_pipelines_stream_consumers(engine, graph):
+    _Tokens.first_seen.clear()
+    got = asyncio.run(engine.run_async(_pipeline(graph, wait=True)))
+    assert got["last_outputs"]["s"] == {"chunks": ["a", "b", "c"]}
+    assert got["last_outputs"]["j"] == {"out": "abc!"}
+
+
+def test_chunks_are_published(engine, bus, graph):
+    sub = bus.open()
+    engine.run(_pipeline(graph))
+    chunks = [e for e in sub.drain() if e.type == "NodeOutputChunk"]
+    assert [(e.fields["seq"], e.detail["chunk"]) for e in chunks] == [(0, "a"), (1, "b"), (2, "c")]